@@ -0,0 +1 @@
+#Módulo de benchmarks
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+Compara el servidor WSGI (src/app.py, servidor con hilos de Werkzeug) con el ASGI
+(src/asgi.py sobre uvicorn) con la misma base SQLite sembrada y las mismas rutas de lectura.
+
+Uso (desde la raíz del repositorio, con requirements-async.txt instalado):
+    python -m benchmarks.bench_asgi_vs_wsgi --users 1000 --requests 2000 --concurrency 1 16 64
+
+Imprime (o escribe en --output) un JSON con req/s y latencias p50/p95/p99 en ms por
+servidor, ruta y nivel de concurrencia.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+
+from benchmarks.common import REPO_ROOT, drive, free_port, login, seed, start_server, wait_ready
+
+SERVERS = {
+    'wsgi': [sys.executable, '-c',
+             "from werkzeug.serving import run_simple; from src.app import app; "
+             "run_simple('127.0.0.1', {port}, app, threaded=True)"],
+    'asgi': [sys.executable, '-m', 'uvicorn', 'src.asgi:app',
+             '--host', '127.0.0.1', '--port', '{port}', '--log-level', 'warning'],
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=2000, help='Peticiones por ruta y nivel de concurrencia')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16, 64])
+    parser.add_argument('--servers', nargs='+', choices=sorted(SERVERS), default=sorted(SERVERS))
+    parser.add_argument('--output', help='Archivo JSON de resultados (por defecto, salida estándar)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_biciusuarios_')
+    sqlite_uri = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    env = dict(os.environ, SQLITE_URI=sqlite_uri, MYSQL_URI='', APP_ENV='production',
+               PROFILE_CACHE_PATH=os.path.join(workdir, 'profile_cache.db'), PYTHONPATH=REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+    seed(sqlite_uri, args.users)
+
+    routes = {
+        'GET /biciusuarios/?limit=50': lambda: '/biciusuarios/?limit=50',
+        'GET /biciusuarios/<id>': lambda: f'/biciusuarios/{random.randint(1, args.users)}',
+        'GET /auth/users?limit=50': lambda: '/auth/users?limit=50',
+        'GET /auth/users/<id>': lambda: f'/auth/users/{random.randint(1, args.users)}',
+    }
+
+    def get(paths, headers):
+        return lambda: ('GET', paths(), None, headers)
+
+    report = {'users': args.users, 'requests': args.requests, 'results': {}}
+    for name in args.servers:
+        port = free_port()
+        command = [part.format(port=port) for part in SERVERS[name]]
+        server = start_server(command, env)
+        try:
+            wait_ready(port)
+            headers = login(port)
+            report['results'][name] = {
+                route: {str(c): drive(port, get(paths, headers), args.requests, c, ok_status=(200,))
+                        for c in args.concurrency}
+                for route, paths in routes.items()
+            }
+        finally:
+            server.terminate()
+            server.wait()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+"""
+Benchmark HTTP reproducible de todas las rutas de users_controllers.py y biciusuario_bd.py.
+
+Por cada escala (número de biciusuarios sembrados) crea una base SQLite nueva, arranca la
+aplicación de create_app() en el servidor con hilos de Werkzeug y lanza cada ruta con
+concurrencia fija. Las rutas que borran datos van al final y sobre IDs altos, para no
+alterar las medidas de las demás.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_http --scales 1000 100000 1000000 --output resultados.json
+    # Guardar una referencia y, más adelante, fallar si alguna ruta empeora más de un 20 %:
+    python -m benchmarks.bench_http --scales 1000 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_http --scales 1000 --baseline benchmarks/baseline.json --tolerance 0.2
+
+El JSON tiene, por escala, el pico de RSS del servidor (MiB) y, por ruta, req/s, errores y
+latencias p50/p95/p99 en ms. Con --baseline el proceso termina con código 1 si alguna ruta
+supera el p95 de referencia o cae por debajo de su throughput en más de --tolerance.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+
+from benchmarks.common import PASSWORD, REPO_ROOT, drive, free_port, peak_rss_mb, seed, start_server, wait_ready
+from services.seed_services import seed_bicicleta_serial, seed_username
+
+# create_app() explícito: el mismo arranque que usan gunicorn y src.app
+SERVER = [sys.executable, '-c',
+          "from werkzeug.serving import run_simple; from src.app import create_app; "
+          "run_simple('127.0.0.1', {port}, create_app(), threaded=True)"]
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Tamaño del grupo de perfiles propios usados por PUT /biciusuarios/<id>
+OWN_PROFILES = 64
+
+
+class TokenMinter:
+    """Emite tokens JWT con la misma configuración que la API, sin pasar por el login."""
+
+    def __init__(self):
+        from flask import Flask
+        from flask_jwt_extended import JWTManager
+        from config.jwt import JWT_SECRET_KEY, JWT_ACCESS_TOKEN_EXPIRES
+
+        self._app = Flask(__name__)
+        self._app.config['JWT_SECRET_KEY'] = JWT_SECRET_KEY
+        self._app.config['JWT_ACCESS_TOKEN_EXPIRES'] = JWT_ACCESS_TOKEN_EXPIRES
+        JWTManager(self._app)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def headers(self, user_id: int, content_type: bool = False) -> dict:
+        from flask_jwt_extended import create_access_token
+
+        with self._lock:
+            token = self._cache.get(user_id)
+            if token is None:
+                with self._app.app_context():
+                    token = self._cache[user_id] = create_access_token(identity=str(user_id))
+        headers = {'Authorization': f'Bearer {token}'}
+        if content_type:
+            headers.update(JSON_HEADERS)
+        return headers
+
+
+def build_routes(scale: int, requests: int, tokens: TokenMinter, rng: random.Random) -> list:
+    """
+    Lista de (nombre, total, generador de peticiones, estados válidos) en orden de ejecución.
+    POST /biciusuarios/ no se incluye: llama a BiciusuariosService.create_biciusuario, que no existe.
+    """
+    auth = tokens.headers(1)
+    unique = itertools.count(1)
+    lock = threading.Lock()
+
+    def next_unique() -> int:
+        with lock:
+            return next(unique)
+
+    def random_id() -> int:
+        with lock:
+            return rng.randint(1, scale)
+
+    def own_profile() -> int:
+        with lock:
+            return rng.randint(1, min(scale, OWN_PROFILES))
+
+    def body(payload) -> bytes:
+        return json.dumps(payload).encode('utf-8')
+
+    # Los borrados consumen IDs desde arriba: la cuarta parte más alta de la escala como máximo
+    deletes = max(1, min(requests, scale // 4))
+    delete_ids = itertools.count(scale, -1)
+
+    def next_delete_id() -> int:
+        with lock:
+            return next(delete_ids)
+
+    def delete_user():
+        # Solo se puede eliminar el propio usuario
+        user_id = next_delete_id()
+        return 'DELETE', f'/auth/users/{user_id}', None, tokens.headers(user_id)
+
+    def delete_own_profile():
+        user_id = next_delete_id()
+        return 'DELETE', f'/biciusuarios/{user_id}', None, tokens.headers(user_id)
+
+    def update_own_user():
+        # Solo se puede modificar el propio usuario
+        user_id = own_profile()
+        return ('PUT', f'/auth/users/{user_id}', body({'nombre_biciusuario': f'Editado {next_unique()}'}),
+                tokens.headers(user_id, content_type=True))
+
+    def import_rows():
+        # La importación solo admite filas del propio perfil
+        n = next_unique()
+        user_id = own_profile()
+        rows = [{'tipo': 'bicicleta', 'biciusuario_id': user_id, 'serial': f'IMP-B{n}',
+                 'marca': 'Marca', 'modelo': 'Modelo', 'color': 'Azul'},
+                {'tipo': 'registro', 'biciusuario_id': user_id, 'serial': f'IMP-R{n}'}]
+        payload = '\n'.join(json.dumps(row) for row in rows).encode('utf-8')
+        return 'POST', '/biciusuarios/import', payload, dict(tokens.headers(user_id),
+                                                              **{'Content-Type': 'application/x-ndjson'})
+
+    def update_own_profile():
+        user_id = own_profile()
+        payload = {'nombre_biciusuario': f'Biciusuario {user_id} ({next_unique()})',
+                   'bicicletas': [{'serial': seed_bicicleta_serial(user_id), 'color': 'Verde'}]}
+        return 'PUT', f'/biciusuarios/{user_id}', body(payload), tokens.headers(user_id, content_type=True)
+
+    return [
+        ('POST /auth/register', requests, lambda: (
+            'POST', '/auth/register',
+            body({'username': f'nuevo{next_unique()}', 'password': PASSWORD, 'nombre_biciusuario': 'Nuevo'}),
+            JSON_HEADERS), (201,)),
+        ('POST /auth/login', requests, lambda: (
+            'POST', '/auth/login', body({'username': seed_username(random_id()), 'password': PASSWORD}),
+            JSON_HEADERS), (200,)),
+        ('GET /auth/hashing/stats', requests, lambda: ('GET', '/auth/hashing/stats', None, auth), (200,)),
+        ('GET /auth/users?limit=50', requests, lambda: ('GET', '/auth/users?limit=50', None, auth), (200,)),
+        ('GET /auth/users/<id>', requests, lambda: ('GET', f'/auth/users/{random_id()}', None, auth), (200,)),
+        ('PUT /auth/users/<id>', requests, update_own_user, (200,)),
+        ('GET /biciusuarios/?limit=50', requests, lambda: ('GET', '/biciusuarios/?limit=50', None, auth), (200,)),
+        ('GET /biciusuarios/<id>', requests, lambda: ('GET', f'/biciusuarios/{random_id()}', None, auth), (200,)),
+        ('GET /biciusuarios/cache/stats', requests, lambda: ('GET', '/biciusuarios/cache/stats', None, auth), (200,)),
+        # El export recorre la tabla completa: pocas repeticiones bastan
+        ('GET /biciusuarios/export', min(requests, 4), lambda: ('GET', '/biciusuarios/export', None, auth), (200,)),
+        ('POST /biciusuarios/import', requests, import_rows, (200,)),
+        ('PUT /biciusuarios/<id>', requests, update_own_profile, (200,)),
+        ('DELETE /auth/users/<id>', deletes, delete_user, (200,)),
+        ('DELETE /biciusuarios/<id>', deletes, delete_own_profile, (200,)),
+    ]
+
+
+def run_scale(scale: int, args, tokens: TokenMinter) -> dict:
+    """Siembra una base de 'scale' biciusuarios, arranca el servidor y mide todas las rutas."""
+    workdir = tempfile.mkdtemp(prefix=f'bench_http_{scale}_')
+    sqlite_uri = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    seed(sqlite_uri, scale, bcrypt_rounds=args.bcrypt_rounds)
+
+    # La cola de bcrypt admite toda la concurrencia del benchmark: se mide latencia, no rechazos 503
+    env = dict(os.environ, SQLITE_URI=sqlite_uri, MYSQL_URI='', APP_ENV='production',
+               BCRYPT_ROUNDS=str(args.bcrypt_rounds),
+               BCRYPT_QUEUE_MAX=os.environ.get('BCRYPT_QUEUE_MAX', str(args.concurrency * 2)),
+               PROFILE_CACHE_PATH=os.path.join(workdir, 'profile_cache.db'),
+               PYTHONPATH=REPO_ROOT)
+    port = free_port()
+    server = start_server([part.format(port=port) for part in SERVER], env)
+    try:
+        wait_ready(port)
+        rng = random.Random(args.seed)
+        results = {}
+        for name, total, next_request, ok_status in build_routes(scale, args.requests, tokens, rng):
+            results[name] = drive(port, next_request, total, args.concurrency, ok_status)
+            print(f"[{scale}] {name}: {results[name]['req_per_s']} req/s, p95 {results[name]['p95_ms']} ms",
+                  file=sys.stderr)
+        return {'peak_rss_mb': peak_rss_mb(server.pid), 'routes': results}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    """Regresiones de 'report' frente a 'baseline': p95 más alto o throughput más bajo que el margen."""
+    regressions = []
+    for scale, current in report['scales'].items():
+        reference = baseline.get('scales', {}).get(scale)
+        if reference is None:
+            continue
+        for route, stats in current['routes'].items():
+            base = reference['routes'].get(route)
+            if base is None:
+                continue
+            if stats['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+                regressions.append(f"[{scale}] {route}: p95 {stats['p95_ms']} ms > referencia {base['p95_ms']} ms")
+            if stats['req_per_s'] < base['req_per_s'] * (1 - tolerance):
+                regressions.append(
+                    f"[{scale}] {route}: {stats['req_per_s']} req/s < referencia {base['req_per_s']} req/s")
+            if stats['errors'] > base['errors']:
+                regressions.append(f"[{scale}] {route}: {stats['errors']} errores (referencia {base['errors']})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1000, 100000, 1000000],
+                        help='Número de biciusuarios sembrados en cada corrida')
+    parser.add_argument('--requests', type=int, default=500, help='Peticiones por ruta')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--bcrypt-rounds', type=int, default=4,
+                        help='Coste de bcrypt del servidor y de los hashes sembrados')
+    parser.add_argument('--seed', type=int, default=1234, help='Semilla de los IDs aleatorios')
+    parser.add_argument('--output', help='Archivo JSON de resultados (por defecto, salida estándar)')
+    parser.add_argument('--baseline', help='JSON de referencia con el que comparar los resultados')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Margen de regresión admitido (0.2 = 20 %%)')
+    parser.add_argument('--save-baseline', help='Guarda los resultados como nueva referencia en esta ruta')
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    tokens = TokenMinter()
+    report = {
+        'requests': args.requests, 'concurrency': args.concurrency, 'bcrypt_rounds': args.bcrypt_rounds,
+        'scales': {str(scale): run_scale(scale, args, tokens) for scale in args.scales},
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            f.write(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESIÓN {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
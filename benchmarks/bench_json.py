@@ -0,0 +1,113 @@
+"""
+Mide la codificación JSON de páginas grandes de /biciusuarios con cada codificador.
+
+1. Codificación: serializa una página de PAGE_SIZE_MAX perfiles (con bicicletas y registros)
+   con el proveedor por defecto de Flask, con la biblioteca estándar compacta y con orjson.
+2. HTTP: arranca el servidor WSGI con JSON_ENCODER=stdlib y con JSON_ENCODER=auto y lanza
+   GET /biciusuarios/?limit=<PAGE_SIZE_MAX> contra ambos.
+
+Uso (desde la raíz del repositorio, con requirements-fast.txt instalado):
+    python -m benchmarks.bench_json --users 5000 --bicicletas 3 --registros 3 --requests 300
+
+Imprime (o escribe en --output) un JSON con los µs por página de cada codificador y,
+por servidor, req/s y latencias p50/p95/p99 en ms.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import timeit
+
+from benchmarks.common import REPO_ROOT, drive, free_port, login, seed, start_server, wait_ready
+
+SERVER = [sys.executable, '-c',
+          "from werkzeug.serving import run_simple; from src.app import app; "
+          "run_simple('127.0.0.1', {port}, app, threaded=True)"]
+
+def load_page(sqlite_uri: str, limit: int) -> dict:
+    """Página completa de perfiles, tal como la produce BiciusuariosService."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from services.biciusuarios_services import BiciusuariosService
+    from services.profile_cache import NullCacheBackend, ProfileCache
+
+    engine = create_engine(sqlite_uri)
+    with Session(engine) as session:
+        page = BiciusuariosService(session, cache=ProfileCache(NullCacheBackend())).get_biciusuarios_page(limit)
+    engine.dispose()
+    return page
+
+def encoders() -> dict:
+    """Codificadores a comparar; orjson solo si está instalado."""
+    from flask import Flask
+    from flask.json.provider import DefaultJSONProvider
+
+    flask_default = DefaultJSONProvider(Flask(__name__))
+    found = {
+        'flask_default': lambda page: flask_default.dumps(page).encode('utf-8'),
+        'stdlib_compact': lambda page: json.dumps(page, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+    }
+    try:
+        import orjson
+        found['orjson'] = orjson.dumps
+    except ImportError:
+        pass
+    return found
+
+def time_encoders(page: dict, repeat: int) -> dict:
+    results = {}
+    for name, encode in encoders().items():
+        seconds = min(timeit.repeat(lambda: encode(page), number=repeat, repeat=5)) / repeat
+        results[name] = {'us_per_page': round(seconds * 1e6, 1), 'bytes': len(encode(page))}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--bicicletas', type=int, default=3, help='Bicicletas por usuario')
+    parser.add_argument('--registros', type=int, default=3, help='Registros por usuario')
+    parser.add_argument('--requests', type=int, default=300, help='Peticiones HTTP por servidor')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=200, help='Codificaciones por medición')
+    parser.add_argument('--output', help='Archivo JSON de resultados (por defecto, salida estándar)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_json_')
+    sqlite_uri = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    sys.path.insert(0, REPO_ROOT)
+    seed(sqlite_uri, args.users, bicicletas_por_usuario=args.bicicletas, registros_por_usuario=args.registros)
+
+    from config.pagination import MAX_PAGE_SIZE
+    page = load_page(sqlite_uri, MAX_PAGE_SIZE)
+    report = {
+        'users': args.users,
+        'page_size': len(page['items']),
+        'encoding': time_encoders(page, args.repeat),
+        'http': {},
+    }
+
+    path = f'/biciusuarios/?limit={MAX_PAGE_SIZE}'
+    for encoder in ('stdlib', 'auto'):
+        env = dict(os.environ, SQLITE_URI=sqlite_uri, MYSQL_URI='', APP_ENV='production',
+                   PROFILE_CACHE_BACKEND='none', JSON_ENCODER=encoder, PYTHONPATH=REPO_ROOT)
+        port = free_port()
+        server = start_server([part.format(port=port) for part in SERVER], env)
+        try:
+            wait_ready(port)
+            headers = login(port)
+            report['http'][encoder] = drive(port, lambda: ('GET', path, None, headers),
+                                            args.requests, args.concurrency, ok_status=(200,))
+        finally:
+            server.terminate()
+            server.wait()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Compara los listados de solo lectura con el ORM (objetos User + _to_dict) y con el modelo
+de lectura de SQLAlchemy Core (repositories/profiles_read_model.py), sobre la misma base sembrada.
+
+Para cada listado mide, por fila servida:
+- CPU (time.process_time) en µs,
+- memoria asignada en el pico de la página (tracemalloc) en bytes.
+Además comprueba que ambas rutas producen exactamente la misma salida.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_read_model --users 5000 --bicicletas 3 --registros 3 --pages 20
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.common import REPO_ROOT, seed
+
+def listings(page_size: int) -> dict:
+    """Cada listado como par (ORM, Core) de funciones (session, after) -> (items, next_cursor)."""
+    from repositories.profiles_read_model import ProfilesReadModel
+    from repositories.users_repository import UsersRepository
+    from services.biciusuarios_services import BiciusuariosService
+
+    def orm_profiles(session, after):
+        users, next_cursor = UsersRepository(session).get_users_page(page_size, after, load_relations=True)
+        return [BiciusuariosService._to_dict(user) for user in users], next_cursor
+
+    def orm_users(session, after):
+        users, next_cursor = UsersRepository(session).get_users_page(page_size, after)
+        return [{'id': u.id, 'username': u.username, 'nombre_biciusuario': u.nombre_biciusuario}
+                for u in users], next_cursor
+
+    return {
+        'biciusuarios': (orm_profiles, lambda s, after: ProfilesReadModel(s).get_profiles_page(page_size, after)),
+        'auth_users': (orm_users, lambda s, after: ProfilesReadModel(s).get_profiles_page(page_size, after, relations=())),
+    }
+
+def measure(engine, page, pages: int) -> dict:
+    """Recorre 'pages' páginas con una sesión nueva por página, como una petición."""
+    from sqlalchemy.orm import Session
+
+    rows, cpu, peak_bytes, after, output = 0, 0.0, 0, None, []
+    for _ in range(pages):
+        with Session(engine) as session:
+            tracemalloc.start()
+            start = time.process_time()
+            items, after = page(session, after)
+            cpu += time.process_time() - start
+            peak_bytes += tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        rows += len(items)
+        output.extend(items)
+        if after is None:
+            break
+    return {
+        'rows': rows,
+        'cpu_us_per_row': round(cpu / rows * 1e6, 1),
+        'peak_bytes_per_row': round(peak_bytes / rows),
+    }, output
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--bicicletas', type=int, default=3, help='Bicicletas por usuario')
+    parser.add_argument('--registros', type=int, default=3, help='Registros por usuario')
+    parser.add_argument('--page-size', type=int, default=200)
+    parser.add_argument('--pages', type=int, default=20, help='Páginas recorridas por medición')
+    parser.add_argument('--output', help='Archivo JSON de resultados (por defecto, salida estándar)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_read_model_')
+    sqlite_uri = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    sys.path.insert(0, REPO_ROOT)
+    seed(sqlite_uri, args.users, bicicletas_por_usuario=args.bicicletas, registros_por_usuario=args.registros)
+
+    from sqlalchemy import create_engine
+    engine = create_engine(sqlite_uri)
+    report = {'users': args.users, 'page_size': args.page_size, 'results': {}}
+    for name, (orm_page, core_page) in listings(args.page_size).items():
+        # Una pasada previa calienta la caché de compilación de SQLAlchemy y la de páginas de SQLite
+        measure(engine, orm_page, 1)
+        measure(engine, core_page, 1)
+        orm, orm_output = measure(engine, orm_page, args.pages)
+        core, core_output = measure(engine, core_page, args.pages)
+        report['results'][name] = {
+            'orm': orm,
+            'core': core,
+            'cpu_speedup': round(orm['cpu_us_per_row'] / core['cpu_us_per_row'], 2),
+            'identical_output': orm_output == core_output,
+        }
+    engine.dispose()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
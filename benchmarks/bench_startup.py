@@ -0,0 +1,71 @@
+"""
+Mide el arranque en frío de la API: cada corrida es un intérprete nuevo que importa
+src.app y atiende sus primeras peticiones con el cliente de pruebas de Flask.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_startup --runs 10
+    # Con un MySQL inalcanzable, para ver la prueba de conexión acotada por DB_CONNECT_TIMEOUT:
+    python -m benchmarks.bench_startup --mysql-uri mysql+pymysql://u:p@10.255.255.1/db
+
+Imprime un JSON con la mediana y el máximo (ms, desde antes de importar la aplicación) de:
+    import_ms          -> 'import src.app' terminado
+    first_response_ms  -> primera respuesta sin base de datos (GET /)
+    first_db_response_ms -> primera respuesta que consulta la base de datos (GET /auth/users)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Se ejecuta en cada proceso hijo; los tiempos se miden desde antes de 'import src.app'
+CHILD = """
+import json, time
+t0 = time.perf_counter()
+from src.app import app
+t_import = time.perf_counter()
+client = app.test_client()
+assert client.get('/').status_code == 200
+t_first = time.perf_counter()
+from flask_jwt_extended import create_access_token
+with app.app_context():
+    token = create_access_token(identity='1')
+assert client.get('/auth/users?limit=1', headers={'Authorization': f'Bearer {token}'}).status_code == 200
+t_db = time.perf_counter()
+print(json.dumps({'import_ms': (t_import - t0) * 1000, 'first_response_ms': (t_first - t0) * 1000,
+                  'first_db_response_ms': (t_db - t0) * 1000}))
+"""
+
+def run_once(env: dict) -> dict:
+    output = subprocess.run([sys.executable, '-c', CHILD], cwd=REPO_ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--mysql-uri', default='', help='MYSQL_URI para las corridas (vacío = solo SQLite)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_startup_')
+    sqlite_uri = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    env = dict(os.environ, SQLITE_URI=sqlite_uri, MYSQL_URI=args.mysql_uri, APP_ENV='production',
+               PYTHONPATH=REPO_ROOT)
+
+    # El esquema se crea una vez, fuera de las mediciones (flask init-db)
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'src.app', 'init-db'], cwd=REPO_ROOT, env=env,
+                   capture_output=True, check=True)
+
+    runs = [run_once(env) for _ in range(args.runs)]
+    report = {'runs': args.runs, 'mysql_uri': args.mysql_uri or None}
+    for key in ('import_ms', 'first_response_ms', 'first_db_response_ms'):
+        values = [r[key] for r in runs]
+        report[key] = {'median': round(statistics.median(values), 1), 'max': round(max(values), 1)}
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Utilidades compartidas por los benchmarks HTTP: siembra, servidores y carga concurrente."""
+import http.client
+import json
+import socket
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = 'bench'
+
+# (método, ruta, cuerpo en bytes o None, cabeceras)
+RequestSpec = Tuple[str, str, Optional[bytes], dict]
+
+def seed(sqlite_uri: str, users: int, bcrypt_rounds: int = 4,
+         bicicletas_por_usuario: int = 1, registros_por_usuario: int = 1):
+    """
+    Crea el esquema y siembra 'users' biciusuarios (IDs 1..users, usuarioN) con una bicicleta
+    y un registro cada uno (o los indicados), con el mismo sembrador que 'flask seed'.
+    La contraseña es PASSWORD.
+    """
+    from sqlalchemy import create_engine
+    from models.users_model import Base
+    from services.seed_services import seed_synthetic_data
+
+    engine = create_engine(sqlite_uri)
+    Base.metadata.create_all(engine)
+    seed_synthetic_data(engine, users, bicicletas_por_usuario, registros_por_usuario,
+                        password=PASSWORD, rounds=bcrypt_rounds)
+    engine.dispose()
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(command, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(command, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def wait_ready(port: int, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"El servidor en el puerto {port} no respondió a tiempo")
+
+def login(port: int, username: str = 'usuario1') -> dict:
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    conn.request('POST', '/auth/login', json.dumps({'username': username, 'password': PASSWORD}),
+                 {'Content-Type': 'application/json'})
+    token = json.loads(conn.getresponse().read())['access_token']
+    return {'Authorization': f'Bearer {token}'}
+
+def peak_rss_mb(pid: int) -> Optional[float]:
+    """Pico de memoria residente (VmHWM) de un proceso vivo, en MiB. Solo Linux."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+def percentile(sorted_values: list, p: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def drive(port: int, next_request: Callable[[], RequestSpec], total: int, concurrency: int,
+          ok_status=(200, 201)) -> dict:
+    """Lanza 'total' peticiones repartidas en 'concurrency' conexiones keep-alive."""
+    def worker(n: int):
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        latencies, errors = [], 0
+        for _ in range(n):
+            method, path, body, headers = next_request()
+            start = time.perf_counter()
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - start)
+            if response.status not in ok_status:
+                errors += 1
+        conn.close()
+        return latencies, errors
+
+    concurrency = max(1, min(concurrency, total))
+    shares = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, shares))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(l for lats, _ in results for l in lats)
+    return {
+        'requests': len(latencies),
+        'errors': sum(e for _, e in results),
+        'req_per_s': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
@@ -0,0 +1 @@
+#Módulo de comandos
\ No newline at end of file
@@ -0,0 +1,66 @@
+import click
+from flask import Flask
+
+# --- Comandos de Administración (flask --app src.app <comando>) ---
+
+def register_commands(app: Flask):
+    """Registra los comandos de línea de órdenes de la API en la aplicación Flask."""
+
+    @app.cli.command('init-db')
+    def init_db():
+        """Crea las tablas, columnas e índices que falten en la base de datos."""
+        from config.database import create_tables, describe_engine_profile, get_engine
+
+        create_tables()
+        click.echo(f"Esquema actualizado: {describe_engine_profile(get_engine())}")
+
+    @app.cli.command('seed')
+    @click.option('--users', default=1000, show_default=True, help='Usuarios sintéticos a crear.')
+    @click.option('--bicicletas', default=1, show_default=True, help='Bicicletas por usuario.')
+    @click.option('--registros', default=1, show_default=True, help='Registros por usuario.')
+    @click.option('--password', default='biciusuario', show_default=True,
+                  help='Contraseña común de los usuarios sembrados.')
+    @click.option('--chunk-size', default=10000, show_default=True, help='Filas por sentencia INSERT.')
+    def seed(users, bicicletas, registros, password, chunk_size):
+        """Siembra datos sintéticos deterministas (usuarioN, BK<N>-<i>, RG<N>-<i>) para pruebas de carga."""
+        from config.database import create_tables, get_engine
+        from services.seed_services import seed_synthetic_data
+
+        create_tables()
+        result = seed_synthetic_data(get_engine(), users, bicicletas, registros, password, chunk_size=chunk_size)
+        click.echo(f"Sembrados {result['users']} usuarios (IDs {result['first_id']}-{result['last_id']}), "
+                   f"{result['bicicletas']} bicicletas y {result['registros']} registros "
+                   f"en {result['seconds']} s")
+
+    @app.cli.command('check-query-plans')
+    @click.option('--users', default=2000, show_default=True, help='Usuarios sembrados en la base temporal.')
+    @click.option('--verbose', is_flag=True, help='Muestra el plan de todas las sentencias, no solo las que fallan.')
+    def check_query_plans_command(users, verbose):
+        """Falla si alguna consulta de los repositorios recorre entera una tabla grande (EXPLAIN QUERY PLAN)."""
+        from commands.query_plans import check_query_plans
+
+        results = check_query_plans(users)
+        failures = [result for result in results if result.violations]
+        for result in results:
+            if verbose or result.violations:
+                status = 'FALLA' if result.violations else 'ok'
+                click.echo(f"[{status}] {result.scenario}\n    {result.statement}")
+                for line in result.plan:
+                    click.echo(f"      {line}")
+        click.echo(f"{len(results)} sentencias revisadas, {len(failures)} con recorridos completos de tablas grandes")
+        if failures:
+            raise SystemExit(1)
+
+    @app.cli.command('calibrate-bcrypt')
+    @click.option('--target-ms', default=250.0, show_default=True,
+                  help='Tiempo máximo de verificación de una contraseña, en milisegundos.')
+    @click.option('--min-rounds', default=10, show_default=True, help='Coste mínimo aceptable.')
+    @click.option('--max-rounds', default=16, show_default=True, help='Coste máximo a probar.')
+    def calibrate_bcrypt(target_ms, min_rounds, max_rounds):
+        """Elige el coste de bcrypt (BCRYPT_ROUNDS) que cabe en el presupuesto de latencia."""
+        from services.password_hasher import calibrate_bcrypt_rounds
+
+        result = calibrate_bcrypt_rounds(target_ms, min_rounds, max_rounds)
+        for rounds, elapsed_ms in result['timings_ms'].items():
+            click.echo(f"  coste {rounds:>2}: {elapsed_ms:>8.1f} ms")
+        click.echo(f"Coste recomendado para {target_ms:.0f} ms: BCRYPT_ROUNDS={result['rounds']}")
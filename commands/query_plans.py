@@ -0,0 +1,207 @@
+import logging
+import os
+import re
+import shutil
+import tempfile
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from models.users_model import Base, User
+from config.search import create_users_fts
+from repositories.users_repository import UsersRepository
+from repositories.biciusuarios_repository import RegistroBiciusuarioRepository
+from repositories.bicicletas_repository import BicicletasRepository
+from repositories.profiles_read_model import ProfilesReadModel
+from services.biciusuarios_services import BiciusuariosService
+from services.profile_cache import NullCacheBackend, ProfileCache
+from services.projection import parse_projection
+from services.seed_services import (seed_synthetic_data, seed_username, seed_bicicleta_serial,
+                                    seed_registro_serial, MARCAS, MODELOS, COLORES)
+
+logger = logging.getLogger(__name__)
+
+# --- Verificación de Planes de Consulta (flask --app src.app check-query-plans) ---
+# Ejecuta cada consulta de los repositorios y de BiciusuariosService contra una base SQLite
+# sembrada, captura el SQL emitido y pide su EXPLAIN QUERY PLAN. Falla si alguna recorre
+# por completo una tabla grande en lugar de usar un índice.
+
+# Tablas que crecen con el número de usuarios: recorrerlas enteras es un error
+LARGE_TABLES = ('users', 'bicicletas', 'registro_biciusuarios')
+
+# Usuarios sembrados para la verificación (los planes de SQLite no dependen del volumen sin ANALYZE)
+QUERY_PLAN_SEED_USERS = 2000
+
+# 'SCAN users', 'SCAN users USING COVERING INDEX ...' o, en SQLite < 3.36, 'SCAN TABLE users'
+_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)')
+
+# Sentencias cuyo plan se revisa (los INSERT no leen tablas)
+_CHECKED_STATEMENTS = ('SELECT', 'UPDATE', 'DELETE')
+
+
+class Scenario(NamedTuple):
+    """Una llamada a revisar. 'full_scan' marca los recorridos completos intencionados (export)."""
+    name: str
+    run: Callable[[Session], object]
+    full_scan: bool = False
+
+
+class PlanResult(NamedTuple):
+    scenario: str
+    statement: str
+    plan: List[str]
+    violations: List[str]
+
+
+def _users(s): return UsersRepository(s)
+def _registros(s): return RegistroBiciusuarioRepository(s)
+def _bicicletas(s): return BicicletasRepository(s)
+def _read_model(s): return ProfilesReadModel(s)
+def _biciusuarios(s): return BiciusuariosService(s, cache=ProfileCache(NullCacheBackend()))
+
+def build_scenarios(users: int) -> List[Scenario]:
+    """Llamadas representativas de cada método, sobre IDs y seriales de la siembra."""
+    mid = users // 2
+    password_hash = '$2b$04$' + 'x' * 53
+    return [
+        # UsersRepository
+        Scenario('UsersRepository.get_user_by_id', lambda s: _users(s).get_user_by_id(mid)),
+        Scenario('UsersRepository.get_user_by_id(load_relations)',
+                 lambda s: _users(s).get_user_by_id(mid, load_relations=True)),
+        Scenario('UsersRepository.get_users_page', lambda s: _users(s).get_users_page(50)),
+        Scenario('UsersRepository.get_users_page(after, load_relations)',
+                 lambda s: _users(s).get_users_page(50, after=mid, load_relations=True)),
+        Scenario('UsersRepository.get_users_page(columns, relations)', lambda s: _users(s).get_users_page(
+            50, after=mid, columns=('id', 'username'), relations=('registros',))),
+        Scenario('UsersRepository.get_version', lambda s: _users(s).get_version(mid)),
+        Scenario('UsersRepository.get_page_versions', lambda s: _users(s).get_page_versions(50)),
+        Scenario('UsersRepository.get_page_versions(after)', lambda s: _users(s).get_page_versions(50, after=mid)),
+        Scenario('UsersRepository.bump_version', lambda s: _users(s).bump_version(mid, expected_version=1)),
+        Scenario('UsersRepository.bump_versions', lambda s: _users(s).bump_versions([1, mid, users])),
+        Scenario('UsersRepository.get_nombres_by_ids', lambda s: _users(s).get_nombres_by_ids([1, mid, users])),
+        Scenario('UsersRepository.get_user_by_username',
+                 lambda s: _users(s).get_user_by_username(seed_username(mid))),
+        Scenario('UsersRepository.add', lambda s: _users(s).add(
+            User(username='plan_check', password_hash=password_hash, nombre_biciusuario='Plan'))),
+        Scenario('UsersRepository.update_user_scalars',
+                 lambda s: _users(s).update_user_scalars(mid, {'nombre_biciusuario': 'Plan'})),
+        Scenario('UsersRepository.update_password_hash',
+                 lambda s: _users(s).update_password_hash(_users(s).get_user_by_id(mid), password_hash)),
+        Scenario('UsersRepository.delete_user', lambda s: _users(s).delete_user(mid)),
+        # RegistroBiciusuarioRepository
+        Scenario('RegistroBiciusuarioRepository.get_registros_page', lambda s: _registros(s).get_registros_page(50)),
+        Scenario('RegistroBiciusuarioRepository.get_registros_page(after)',
+                 lambda s: _registros(s).get_registros_page(50, after=mid)),
+        Scenario('RegistroBiciusuarioRepository.get_registro_by_id', lambda s: _registros(s).get_registro_by_id(mid)),
+        Scenario('RegistroBiciusuarioRepository.create_registro', lambda s: _registros(s).create_registro(
+            {'nombre_biciusuario': 'Plan', 'serial': 'PLAN-R', 'biciusuario_id': mid})),
+        Scenario('RegistroBiciusuarioRepository.update_registro',
+                 lambda s: _registros(s).update_registro(mid, {'serial': 'PLAN-R2'})),
+        Scenario('RegistroBiciusuarioRepository.delete_registro', lambda s: _registros(s).delete_registro(mid)),
+        Scenario('RegistroBiciusuarioRepository.get_existing_serials', lambda s: _registros(s).get_existing_serials(
+            [seed_registro_serial(1), seed_registro_serial(mid), 'PLAN-R'])),
+        # BicicletasRepository
+        Scenario('BicicletasRepository.get_existing_serials', lambda s: _bicicletas(s).get_existing_serials(
+            [seed_bicicleta_serial(1), seed_bicicleta_serial(mid), 'PLAN-B'])),
+        Scenario('BicicletasRepository.search(serial)',
+                 lambda s: _bicicletas(s).search(50, serial=seed_bicicleta_serial(mid))),
+        Scenario('BicicletasRepository.search(marca, color)',
+                 lambda s: _bicicletas(s).search(50, marca=MARCAS[0], color=COLORES[0])),
+        Scenario('BicicletasRepository.search(marca, modelo, color, after)', lambda s: _bicicletas(s).search(
+            50, after=mid, marca=MARCAS[0], modelo=MODELOS[0], color=COLORES[0])),
+        Scenario('BicicletasRepository.search(modelo)', lambda s: _bicicletas(s).search(50, modelo=MODELOS[0])),
+        Scenario('BicicletasRepository.search(color)', lambda s: _bicicletas(s).search(50, color=COLORES[0])),
+        Scenario('BicicletasRepository.search(nombre)', lambda s: _bicicletas(s).search(50, nombre=f'biciusuario {mid}')),
+        # ProfilesReadModel
+        Scenario('ProfilesReadModel.get_profiles_page', lambda s: _read_model(s).get_profiles_page(50)),
+        Scenario('ProfilesReadModel.get_profiles_page(after)', lambda s: _read_model(s).get_profiles_page(50, after=mid)),
+        Scenario('ProfilesReadModel.get_profiles_page(columns, relations)', lambda s: _read_model(s).get_profiles_page(
+            50, after=mid, columns=('id', 'username'), relations=('bicicletas',))),
+        Scenario('ProfilesReadModel.iter_profiles', lambda s: list(_read_model(s).iter_profiles()), full_scan=True),
+        # BiciusuariosService
+        Scenario('BiciusuariosService.get_biciusuarios_page', lambda s: _biciusuarios(s).get_biciusuarios_page(50)),
+        Scenario('BiciusuariosService.get_biciusuarios_page(after)',
+                 lambda s: _biciusuarios(s).get_biciusuarios_page(50, after=mid)),
+        Scenario('BiciusuariosService.export_biciusuarios_ndjson',
+                 lambda s: list(_biciusuarios(s).export_biciusuarios_ndjson()), full_scan=True),
+        Scenario('BiciusuariosService.get_biciusuarios_page(projection)', lambda s: _biciusuarios(s).get_biciusuarios_page(
+            50, after=mid, projection=parse_projection('nombre_biciusuario', 'bicicletas'))),
+        Scenario('BiciusuariosService.get_biciusuario_by_id', lambda s: _biciusuarios(s).get_biciusuario_by_id(mid)),
+        Scenario('BiciusuariosService.get_biciusuario_by_id(projection)', lambda s: _biciusuarios(s).get_biciusuario_by_id(
+            mid, parse_projection(expand='registros'))),
+        Scenario('BiciusuariosService.get_biciusuario_version',
+                 lambda s: _biciusuarios(s).get_biciusuario_version(mid)),
+        Scenario('BiciusuariosService.get_biciusuarios_page_versions',
+                 lambda s: _biciusuarios(s).get_biciusuarios_page_versions(50, after=mid)),
+        Scenario('BiciusuariosService.update_biciusuario', lambda s: _biciusuarios(s).update_biciusuario(mid, {
+            'nombre_biciusuario': 'Plan',
+            'bicicletas': [{'serial': seed_bicicleta_serial(mid), 'color': 'Verde'}, {'serial': 'PLAN-B'}],
+            'registros': [{'serial': 'PLAN-R'}]}, expected_version=1)),
+        Scenario('BiciusuariosService.delete_biciusuario', lambda s: _biciusuarios(s).delete_biciusuario(mid)),
+    ]
+
+def _violations(statement: str, plan: List[str]) -> List[str]:
+    """
+    Recorridos completos de tablas grandes en el plan. Un SCAN sin WHERE, con LIMIT y sin ordenación
+    temporal es la primera página de una paginación por cursor: lee como mucho 'limit' filas.
+    """
+    normalized = ' '.join(statement.upper().split())
+    bounded = (' LIMIT ' in normalized and ' WHERE ' not in normalized
+               and not any('TEMP B-TREE' in line for line in plan))
+    found = []
+    for line in plan:
+        match = _SCAN.match(line)
+        # Los alias de SQLAlchemy (users_1) cuentan como su tabla
+        if match and re.sub(r'_\d+$', '', match.group(1)) in LARGE_TABLES and not bounded:
+            found.append(line)
+    return found
+
+def check_query_plans(users: int = QUERY_PLAN_SEED_USERS) -> List[PlanResult]:
+    """
+    Siembra una base SQLite temporal con el esquema completo (índices y FTS5), ejecuta cada
+    escenario en una transacción que se revierte y retorna el plan de cada sentencia emitida.
+    """
+    workdir = tempfile.mkdtemp(prefix='query_plans_')
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'plans.db')}")
+    Base.metadata.create_all(engine)
+    create_users_fts(engine)
+    seed_synthetic_data(engine, users, rounds=4)
+
+    captured = []
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters[0] if executemany and parameters else parameters))
+    event.listen(engine, 'before_cursor_execute', _capture)
+
+    scenarios = build_scenarios(users)
+    results = []
+    make_session = sessionmaker(bind=engine)
+    raw = engine.raw_connection()
+    try:
+        for scenario in scenarios:
+            captured.clear()
+            session = make_session()
+            try:
+                scenario.run(session)
+                session.flush()
+            finally:
+                session.rollback()
+                session.close()
+            for statement, parameters in captured:
+                if not statement.lstrip().upper().startswith(_CHECKED_STATEMENTS):
+                    continue
+                cursor = raw.cursor()
+                cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters or ())
+                plan = [row[-1] for row in cursor.fetchall()]
+                cursor.close()
+                violations = [] if scenario.full_scan else _violations(statement, plan)
+                # Las listas IN (?, ?, ...) de selectinload se abrevian en el informe
+                shown = re.sub(r'\(\?(?:, \?)+\)', '(?, ...)', ' '.join(statement.split()))
+                results.append(PlanResult(scenario.name, shown, plan, violations))
+    finally:
+        raw.close()
+        event.remove(engine, 'before_cursor_execute', _capture)
+        engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+    logger.info("Planes revisados: %s sentencias en %s escenarios", len(results), len(scenarios))
+    return results
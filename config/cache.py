@@ -0,0 +1,23 @@
+import os
+
+# --- Configuración de la Caché de Perfiles (GET /biciusuarios/<id>) ---
+
+# Backend de la caché:
+#   'memory' -> LRU+TTL en el proceso (cada worker tiene la suya). Solo es coherente con un
+#               único proceso: gunicorn.conf.py elige 'sqlite' por defecto si hay varios workers.
+#   'sqlite' -> almacén local compartido por todos los workers de la máquina.
+#   'none'   -> desactivada.
+PROFILE_CACHE_BACKEND = os.getenv("PROFILE_CACHE_BACKEND", "memory")
+
+# Número máximo de perfiles guardados; al superarlo se descarta el menos usado.
+PROFILE_CACHE_MAX_ENTRIES = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", 10000))
+
+# Segundos que un perfil permanece válido aunque nadie lo invalide.
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", 60))
+
+# Archivo del backend 'sqlite'.
+PROFILE_CACHE_PATH = os.getenv("PROFILE_CACHE_PATH", "profile_cache.db")
+
+# Backend 'sqlite': cada cuántas escrituras de un proceso se revisa el límite de entradas
+# (COUNT y borrado de las que caducan antes). Entre revisiones el límite puede excederse un poco.
+PROFILE_CACHE_EVICT_EVERY = int(os.getenv("PROFILE_CACHE_EVICT_EVERY", 100))
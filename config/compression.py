@@ -0,0 +1,91 @@
+import logging
+import os
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from flask import request
+
+from controllers.etags import representation_etag
+
+logger = logging.getLogger(__name__)
+
+# --- Compresión de Respuestas según Accept-Encoding (gzip / deflate) ---
+# Se aplica en un after_request: las respuestas completas se comprimen si superan
+# COMPRESSION_MIN_SIZE bytes; las respuestas en streaming (export) se comprimen bloque a bloque,
+# con un vaciado por bloque para que el cliente reciba cada línea sin esperar al final.
+
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+# Tamaño mínimo (bytes) para comprimir una respuesta completa: por debajo, la cabecera gzip no compensa
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+
+# Nivel de zlib (1 = más rápido, 9 = más compacto)
+COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', 6))
+
+# Tipos de contenido que se comprimen (las imágenes o archivos ya comprimidos no ganan nada)
+COMPRESSIBLE_MIMETYPES = frozenset((
+    'application/json', 'application/x-ndjson', 'application/msgpack', 'text/csv', 'text/plain', 'text/html',
+))
+
+# wbits de zlib para cada codificación: 'deflate' en HTTP es el formato zlib (RFC 1950)
+_WBITS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+
+
+def _compressor(encoding: str, level: int = COMPRESSION_LEVEL):
+    return zlib.compressobj(level, zlib.DEFLATED, _WBITS[encoding])
+
+def compress(data: bytes, encoding: str, level: int = COMPRESSION_LEVEL) -> bytes:
+    """Comprime un cuerpo completo con la codificación HTTP indicada ('gzip' o 'deflate')."""
+    compressor = _compressor(encoding, level)
+    return compressor.compress(data) + compressor.flush()
+
+def compress_stream(chunks: Iterable[bytes], encoding: str, level: int = COMPRESSION_LEVEL) -> Iterator[bytes]:
+    """Comprime un cuerpo en streaming; Z_SYNC_FLUSH entrega cada bloque en cuanto se produce."""
+    compressor = _compressor(encoding, level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        # Cierra el iterable original (p. ej., libera la sesión del export si el cliente se desconecta)
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+def negotiate_encoding(accept_encodings) -> Optional[str]:
+    """Codificación preferida por el cliente entre gzip y deflate (respetando q=0), o None."""
+    return accept_encodings.best_match(tuple(_WBITS))
+
+def init_compression(app):
+    """Comprime las respuestas de la aplicación Flask según Accept-Encoding si COMPRESSION_ENABLED."""
+    if not COMPRESSION_ENABLED:
+        return
+    logger.info("Compresión de respuestas activa (mínimo %s bytes, nivel %s)", COMPRESSION_MIN_SIZE, COMPRESSION_LEVEL)
+
+    @app.after_request
+    def _compress_response(response):
+        if (response.mimetype not in COMPRESSIBLE_MIMETYPES or response.direct_passthrough
+                or 'Content-Encoding' in response.headers or request.method == 'HEAD'
+                or response.status_code < 200 or response.status_code in (204, 304)):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < COMPRESSION_MIN_SIZE:
+                return response
+            response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        # El cuerpo comprimido no es idéntico byte a byte: su ETag fuerte lleva el sufijo '-gzip'/'-deflate'
+        representation_etag(response, encoding)
+        return response
@@ -1,14 +1,17 @@
 import os
 import logging
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import threading
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import Session as OrmSession, sessionmaker
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import NullPool
 from models.users_model import Base
+from config.search import create_users_fts
 from dotenv import load_dotenv
+from flask import g
 
 
-# --- Configuración de Logging ---
-logging.basicConfig(level=logging.INFO)
+# --- Configuración de Logging (centralizada en config/logging_config.py) ---
 logger = logging.getLogger(__name__)
 # --------------------------------
 
@@ -16,45 +19,264 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 MYSQL_URI = os.getenv('MYSQL_URI')
-SQLITE_URI = 'sqlite:///biciusuarios_local.db'
+SQLITE_URI = os.getenv('SQLITE_URI', 'sqlite:///biciusuarios_local.db')
+
+# Segundos máximos para establecer una conexión con MySQL. También acota por completo la
+# prueba inicial cuando el servidor no responde (en lugar de los timeouts del driver).
+DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', 3))
+
+# --- Perfiles de Motor (seleccionados con APP_ENV) ---
+# 'echo' registra cada sentencia SQL a nivel INFO: solo tiene sentido en desarrollo.
+# Los PRAGMA de SQLite se aplican en cada conexión nueva:
+#   - journal_mode=WAL: las lecturas no se bloquean detrás de las escrituras.
+#   - synchronous=NORMAL: seguro con WAL y mucho más barato que FULL.
+#   - busy_timeout: espera (ms) a que se libere un bloqueo en lugar de fallar al instante.
+#   - cache_size negativo = KiB de caché de páginas; mmap_size = bytes mapeados en memoria.
+ENGINE_PROFILES = {
+    'development': {
+        'echo': True,
+        'mysql': {'pool_size': 5, 'max_overflow': 5, 'pool_recycle': 1800,
+                  'pool_pre_ping': True, 'pool_timeout': 30},
+        'sqlite_pragmas': {'journal_mode': 'WAL', 'synchronous': 'NORMAL',
+                           'busy_timeout': 5000, 'cache_size': -16000, 'mmap_size': 67108864},
+    },
+    'production': {
+        'echo': False,
+        'mysql': {'pool_size': 10, 'max_overflow': 20, 'pool_recycle': 1800,
+                  'pool_pre_ping': True, 'pool_timeout': 10},
+        'sqlite_pragmas': {'journal_mode': 'WAL', 'synchronous': 'NORMAL',
+                           'busy_timeout': 5000, 'cache_size': -64000, 'mmap_size': 268435456},
+    },
+}
+
+APP_ENV = os.getenv('APP_ENV', 'development')
+
+def get_engine_profile(name: str = APP_ENV) -> dict:
+    """
+    Retorna el perfil de motor para el entorno dado. Las variables DB_POOL_SIZE,
+    DB_MAX_OVERFLOW, DB_POOL_RECYCLE y DB_ECHO permiten ajustar valores sueltos.
+    """
+    if name not in ENGINE_PROFILES:
+        logger.warning("APP_ENV desconocido '%s'. Usando el perfil 'development'.", name)
+        name = 'development'
+    base = ENGINE_PROFILES[name]
+    profile = {
+        'name': name,
+        'echo': os.getenv('DB_ECHO', str(base['echo'])).lower() in ('1', 'true', 'yes'),
+        'mysql': dict(base['mysql']),
+        'sqlite_pragmas': dict(base['sqlite_pragmas']),
+    }
+    for env_var, key in (('DB_POOL_SIZE', 'pool_size'), ('DB_MAX_OVERFLOW', 'max_overflow'),
+                         ('DB_POOL_RECYCLE', 'pool_recycle')):
+        if os.getenv(env_var):
+            profile['mysql'][key] = int(os.getenv(env_var))
+    return profile
+
+ENGINE_PROFILE = get_engine_profile()
+
+def _apply_sqlite_pragmas(engine, pragmas: dict):
+    """Ejecuta los PRAGMA del perfil cada vez que el pool abre una conexión SQLite."""
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def describe_engine_profile(engine) -> str:
+    """Resumen legible del perfil activo, para registrarlo al arrancar."""
+    if engine.dialect.name == 'sqlite':
+        settings = ', '.join(f"{k}={v}" for k, v in ENGINE_PROFILE['sqlite_pragmas'].items())
+    else:
+        settings = ', '.join(f"{k}={v}" for k, v in ENGINE_PROFILE['mysql'].items())
+    return (f"perfil '{ENGINE_PROFILE['name']}' ({engine.dialect.name}, "
+            f"echo={ENGINE_PROFILE['echo']}): {settings}")
 
 def create_tables():
     """
     Crea todas las tablas definidas en la Base de SQLAlchemy.
-    Esta función es esencial para la inicialización.
+    Ya no se ejecuta al importar: se invoca con 'flask --app src.app init-db'.
     """
+    engine = get_engine()
     logger.info("Creando tablas de la base de datos...")
     Base.metadata.create_all(bind=engine)
+    # create_all no toca tablas existentes: creamos aparte los índices que falten
+    # (por ejemplo, los añadidos en las claves foráneas de bicicletas y registros).
+    _add_missing_columns()
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    # Índice de texto completo de nombres (solo SQLite con FTS5)
+    create_users_fts(engine)
 
-def get_engine():
+def _add_missing_columns():
+    """
+    Añade a las tablas existentes las columnas nuevas del modelo que tienen valor por defecto
+    en el servidor (p. ej., users.version), para no tener que recrear bases de datos ya pobladas.
+    """
+    engine = get_engine()
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or column.server_default is None:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            default = column.server_default.arg
+            default = default.text if hasattr(default, 'text') else f"'{default}'"
+            logger.info("Añadiendo columna %s.%s", table.name, column.name)
+            with engine.begin() as conn:
+                conn.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type} "
+                    f"NOT NULL DEFAULT {default}"
+                ))
+
+def enable_sql_echo():
+    """
+    Equivalente a echo=True, pero a través del logging centralizado (cola en segundo plano)
+    en lugar del StreamHandler síncrono que SQLAlchemy instala con echo. Si LOG_LEVELS ya
+    fija un nivel para 'sqlalchemy.engine', se respeta.
+    """
+    sql_logger = logging.getLogger('sqlalchemy.engine')
+    if ENGINE_PROFILE['echo'] and sql_logger.level == logging.NOTSET:
+        sql_logger.setLevel(logging.INFO)
+
+def _probe_mysql() -> bool:
+    """
+    Comprueba que MySQL responde, esperando como máximo DB_CONNECT_TIMEOUT segundos.
+    Usa una conexión aparte (sin pool) con timeouts también de lectura y escritura, para
+    acotar el saludo inicial sin imponer ese límite a las consultas normales.
+    """
+    probe = create_engine(MYSQL_URI, poolclass=NullPool, connect_args={
+        'connect_timeout': DB_CONNECT_TIMEOUT,
+        'read_timeout': DB_CONNECT_TIMEOUT,
+        'write_timeout': DB_CONNECT_TIMEOUT,
+    })
+    try:
+        with probe.connect():
+            return True
+    except OperationalError:
+        return False
+    finally:
+        probe.dispose()
+
+def _create_engine():
     """
     Intenta crear una conexión con MySQL. Si falla, usa SQLite local.
+    Ambos motores se configuran según el perfil activo (ENGINE_PROFILE).
     """
     if MYSQL_URI:
-        try:
-            engine = create_engine(MYSQL_URI, echo=True)
-            # Probar conexión
-            conn = engine.connect()
-            conn.close()
-            logging.info('Conexión a MySQL exitosa.')
-            return engine
-        except OperationalError:
-            logging.warning('No se pudo conectar a MySQL. Usando SQLite local.')
+        # Probar conexión
+        if _probe_mysql():
+            logger.info('Conexión a MySQL exitosa.')
+            return create_engine(MYSQL_URI, connect_args={'connect_timeout': DB_CONNECT_TIMEOUT},
+                                 **ENGINE_PROFILE['mysql'])
+        logger.warning('No se pudo conectar a MySQL. Usando SQLite local.')
     # Fallback a SQLite
-    engine = create_engine(SQLITE_URI, echo=True)
+    engine = create_engine(SQLITE_URI)
+    _apply_sqlite_pragmas(engine, ENGINE_PROFILE['sqlite_pragmas'])
     return engine
 
-engine = get_engine()
-Session = sessionmaker(bind=engine)
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """
+    Retorna el motor del proceso, creándolo en el primer uso (no al importar el módulo):
+    importar la aplicación no abre conexiones ni espera a MySQL.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                enable_sql_echo()
+                _engine = _create_engine()
+                logger.info("Motor de base de datos: %s", describe_engine_profile(_engine))
+    return _engine
+
+def peek_engine():
+    """Retorna el motor si ya se creó, o None (para métricas y diagnósticos, sin crearlo)."""
+    return _engine
+
+def __getattr__(name):
+    # Compatibilidad con 'from config.database import engine': se resuelve al motor perezoso
+    if name == 'engine':
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class _LazyBindSession(OrmSession):
+    """Sesión que obtiene el motor al ejecutar su primera sentencia, no al crearse."""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.bind is None:
+            self.bind = get_engine()
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+Session = sessionmaker(class_=_LazyBindSession)
 SessionLocal = Session  # Alias para compatibilidad con imports existentes
-Base.metadata.create_all(engine)
+
+def dispose_engine_after_fork():
+    """
+    Llamar en cada proceso hijo tras un fork (hook post_fork de gunicorn.conf.py).
+    Olvida las conexiones heredadas sin cerrarlas, porque siguen perteneciendo al
+    proceso padre; el hijo abrirá las suyas en el primer uso.
+    """
+    if _engine is not None:
+        _engine.dispose(close=False)
+
+def dispose_engine():
+    """Cierra las conexiones del pool, si el motor llegó a crearse (apagado de un worker)."""
+    if _engine is not None:
+        _engine.dispose()
 
 def get_db_session():
     """
-    Retorna una nueva sesión de base de datos para ser utilizada en los servicios o controladores.
+    Retorna una nueva sesión de base de datos, independiente de cualquier petición.
+    Quien la crea es responsable de confirmarla y cerrarla (scripts y comandos CLI).
+    Dentro de una petición HTTP se debe usar get_request_session().
     """
     return Session()
 
+# --- Unidad de Trabajo por Petición ---
+
+def get_request_session():
+    """
+    Retorna la sesión de la petición HTTP en curso, creándola en el primer uso.
+    Todos los servicios de una misma petición comparten esta sesión y, por tanto,
+    una única transacción.
+    """
+    if 'db_session' not in g:
+        g.db_session = Session()
+    return g.db_session
+
+def init_db_session(app):
+    """
+    Vincula el ciclo de vida de la sesión a la petición:
+    - after_request: confirma si la respuesta es exitosa (< 400) y revierte si no.
+      Un fallo al confirmar se convierte en un 500 antes de enviar la respuesta.
+    - teardown_appcontext: revierte si hubo una excepción y cierra siempre la sesión,
+      devolviendo la conexión al pool.
+    """
+    @app.after_request
+    def _finish_unit_of_work(response):
+        session = g.get('db_session')
+        if session is not None:
+            if response.status_code < 400:
+                session.commit()
+            else:
+                session.rollback()
+        return response
+
+    @app.teardown_appcontext
+    def _close_request_session(exception):
+        session = g.pop('db_session', None)
+        if session is not None:
+            if exception is not None:
+                session.rollback()
+            session.close()
+
 # Alias para compatibilidad con imports existentes
 def get_db():
     """
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from config.database import DB_CONNECT_TIMEOUT, ENGINE_PROFILE, MYSQL_URI, SQLITE_URI, enable_sql_echo
+
+logger = logging.getLogger(__name__)
+
+# --- Motor Asíncrono (servidor ASGI, src/asgi.py) ---
+# Mismas bases de datos que el motor síncrono, con drivers asyncio:
+#   MySQL  -> asyncmy   (mysql+pymysql://...  => mysql+asyncmy://...)
+#   SQLite -> aiosqlite (sqlite:///...        => sqlite+aiosqlite:///...)
+
+def to_async_uri(uri: str) -> str:
+    """Traduce una URI síncrona de la configuración a su equivalente con driver asyncio."""
+    scheme, rest = uri.split('://', 1)
+    dialect = scheme.split('+', 1)[0]
+    driver = {'mysql': 'asyncmy', 'sqlite': 'aiosqlite'}.get(dialect)
+    if driver is None:
+        raise ValueError(f"Dialecto sin driver asíncrono configurado: {dialect}")
+    return f"{dialect}+{driver}://{rest}"
+
+def _create_sqlite_async_engine() -> AsyncEngine:
+    engine = create_async_engine(to_async_uri(SQLITE_URI))
+    pragmas = ENGINE_PROFILE['sqlite_pragmas']
+
+    # Los eventos de conexión se registran sobre el motor síncrono subyacente
+    @event.listens_for(engine.sync_engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return engine
+
+async def create_async_db_engine() -> AsyncEngine:
+    """
+    Intenta crear el motor asíncrono de MySQL y probar la conexión; si falla, usa SQLite local.
+    Equivalente asíncrono de config.database.get_engine(); la prueba espera como máximo
+    DB_CONNECT_TIMEOUT segundos.
+    """
+    if MYSQL_URI:
+        engine = create_async_engine(
+            to_async_uri(MYSQL_URI),
+            connect_args={'connect_timeout': DB_CONNECT_TIMEOUT}, **ENGINE_PROFILE['mysql']
+        )
+        async def _probe():
+            async with engine.connect():
+                pass
+        try:
+            # El saludo de MySQL también queda acotado, no solo la apertura del socket
+            await asyncio.wait_for(_probe(), DB_CONNECT_TIMEOUT)
+            logger.info('Conexión asíncrona a MySQL exitosa.')
+            return engine
+        except Exception as e:
+            await engine.dispose()
+            logger.warning('No se pudo conectar a MySQL (%s). Usando SQLite local (aiosqlite).', e)
+    return _create_sqlite_async_engine()
+
+
+async_engine: Optional[AsyncEngine] = None
+AsyncSessionLocal = async_sessionmaker(expire_on_commit=False, class_=AsyncSession)
+
+async def init_async_engine() -> AsyncEngine:
+    """Crea el motor asíncrono (al arrancar el servidor ASGI) y vincula la fábrica de sesiones."""
+    global async_engine
+    if async_engine is None:
+        enable_sql_echo()
+        async_engine = await create_async_db_engine()
+        AsyncSessionLocal.configure(bind=async_engine)
+    return async_engine
+
+async def dispose_async_engine():
+    """Cierra las conexiones del pool asíncrono (al detener el servidor ASGI)."""
+    global async_engine
+    if async_engine is not None:
+        await async_engine.dispose()
+        async_engine = None
@@ -0,0 +1,117 @@
+import json
+import logging
+import os
+from typing import Any
+
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+from controllers.etags import representation_etag
+from config.msgpack_encoding import MSGPACK_ENABLED, MSGPACK_MIMETYPE, encode_msgpack, wants_msgpack
+
+logger = logging.getLogger(__name__)
+
+# --- Codificación JSON de las Respuestas ---
+# Con orjson instalado (requirements-fast.txt) las respuestas se codifican con él, directamente
+# a bytes UTF-8; si no, con el módulo json de la biblioteca estándar.
+#   JSON_ENCODER=auto   -> orjson si está disponible (por defecto).
+#   JSON_ENCODER=stdlib -> siempre la biblioteca estándar.
+# JSON_SORT_KEYS decide el orden de las claves en todas las respuestas, de los dos servidores:
+# ordenadas (por defecto, como el proveedor de Flask) o en el orden de serialización.
+
+JSON_ENCODER = os.getenv("JSON_ENCODER", "auto").lower()
+JSON_SORT_KEYS = os.getenv("JSON_SORT_KEYS", "true").lower() in ("1", "true", "yes")
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Codificador efectivo: 'orjson' o 'stdlib'
+JSON_BACKEND = 'orjson' if orjson is not None and JSON_ENCODER != 'stdlib' else 'stdlib'
+
+
+class EncodedJSON(bytes):
+    """
+    Documento JSON ya codificado (UTF-8). Los servicios lo retornan para que el controlador
+    lo envíe tal cual: jsonify() y la respuesta JSON del servidor ASGI no lo vuelven a codificar.
+    """
+
+
+def _default(value: Any) -> Any:
+    # Tipos que orjson no conoce (Decimal, etc.): mismas conversiones que el proveedor de Flask
+    return DefaultJSONProvider.default(value)
+
+
+def encode_json(obj: Any, sort_keys: bool = JSON_SORT_KEYS) -> EncodedJSON:
+    """
+    Codifica 'obj' como JSON compacto en UTF-8 (sin escapar caracteres no ASCII).
+    Con orjson y con la biblioteca estándar se obtiene el mismo documento. Por defecto ordena
+    las claves según JSON_SORT_KEYS, igual que jsonify: los documentos que los servicios codifican
+    de antemano (páginas, exportación) salen en el mismo orden que el resto de respuestas.
+    """
+    if isinstance(obj, EncodedJSON):
+        return obj
+    if JSON_BACKEND == 'orjson':
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return EncodedJSON(orjson.dumps(obj, default=_default, option=option))
+    return EncodedJSON(json.dumps(obj, default=_default, sort_keys=sort_keys, ensure_ascii=False,
+                                  separators=(',', ':')).encode('utf-8'))
+
+
+def decode_json(data: str | bytes) -> Any:
+    """Decodifica un documento JSON (texto o bytes) con el codificador efectivo."""
+    if JSON_BACKEND == 'orjson':
+        # orjson no acepta subclases de bytes (EncodedJSON): una vista evita copiar el documento
+        return orjson.loads(memoryview(data) if isinstance(data, EncodedJSON) else data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Proveedor JSON de Flask (app.json) sobre encode_json: jsonify() escribe los bytes
+    del codificador directamente en la respuesta y deja pasar los EncodedJSON sin tocarlos.
+    'sort_keys' sale de JSON_SORT_KEYS, el mismo orden que usa encode_json por defecto.
+    Si la petición prefiere application/msgpack (Accept), responde el mismo documento en MessagePack.
+    """
+    sort_keys = JSON_SORT_KEYS
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return encode_json(obj, self.sort_keys).decode('utf-8')
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return decode_json(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        if args and kwargs:
+            raise TypeError("jsonify() behavior undefined when passed both args and kwargs")
+        obj = args[0] if len(args) == 1 else (args or kwargs)
+        if has_request_context() and wants_msgpack(request.accept_mimetypes):
+            if isinstance(obj, EncodedJSON):
+                obj = decode_json(obj)
+            response = self._app.response_class(encode_msgpack(obj), mimetype=MSGPACK_MIMETYPE)
+        else:
+            response = self._app.response_class(encode_json(obj, self.sort_keys), mimetype=self.mimetype)
+        if MSGPACK_ENABLED:
+            response.vary.add('Accept')
+        return response
+
+
+def configure_json(app):
+    """Instala FastJSONProvider como proveedor JSON de la aplicación Flask."""
+    app.json = FastJSONProvider(app)
+    logger.info("Codificación JSON de respuestas: %s (MessagePack: %s)", JSON_BACKEND,
+                'sí' if MSGPACK_ENABLED else 'no')
+
+    if MSGPACK_ENABLED:
+        @app.after_request
+        def _msgpack_etag(response):
+            # La versión MessagePack equivale a la JSON pero no es idéntica byte a byte:
+            # su ETag fuerte lleva el sufijo '-msgpack'
+            if response.mimetype == MSGPACK_MIMETYPE:
+                representation_etag(response, 'msgpack')
+            return response
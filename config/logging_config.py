@@ -0,0 +1,134 @@
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+# --- Configuración Centralizada de Logging ---
+# Una sola configuración para toda la API; los módulos solo piden logging.getLogger(__name__).
+# Los hilos que atienden peticiones solo encolan el registro; un hilo en segundo plano
+# (QueueListener) lo formatea y lo escribe, así la E/S de stderr sale de la ruta caliente.
+
+# Nivel por defecto del logger raíz.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Niveles por logger, p. ej.: "repositories=WARNING,sqlalchemy.engine=INFO,services.import_services=DEBUG"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+
+# Fracción (0-1) de los registros marcados como de alto volumen que se conservan.
+# Se marcan con extra=SAMPLED (búsquedas por ID, listados...); 1 = conservar todos.
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 0.01))
+
+LOG_FORMAT = os.getenv("LOG_FORMAT", "%(asctime)s %(levelname)s %(name)s [%(threadName)s] %(message)s")
+
+# Marca para registros de alto volumen: logger.info("...", x, extra=SAMPLED)
+SAMPLED = {'sampled': True}
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Deja pasar uno de cada N registros marcados con extra=SAMPLED (N = 1 / rate),
+    contando por separado cada llamada (logger y plantilla del mensaje).
+    Los registros sin marca, y los de nivel WARNING o superior, pasan siempre.
+    Se aplica antes de encolar, así los descartados no cuestan ni el formateo.
+    """
+
+    def __init__(self, rate: float = LOG_SAMPLE_RATE):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, 'sampled', False) or record.levelno >= logging.WARNING:
+            return True
+        if self.every == 0:
+            return False
+        key = (record.name, record.msg)
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        return count % self.every == 0
+
+
+def parse_log_levels(spec: str) -> dict:
+    """Convierte 'a=INFO,b.c=DEBUG' en {'a': 'INFO', 'b.c': 'DEBUG'}."""
+    levels = {}
+    for item in spec.split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+_stream_handler = None
+_sampling_filter = None
+_listener = None
+_config_lock = threading.Lock()
+
+def configure_logging(level: str = LOG_LEVEL, levels: str = LOG_LEVELS, sample_rate: float = LOG_SAMPLE_RATE):
+    """
+    Instala la configuración de logging del proceso (idempotente): niveles, SamplingFilter y
+    escritura en stderr. No arranca ningún hilo: hasta que se llame a start_log_listener()
+    (con la primera petición) los registros se escriben directamente. Así importar la aplicación
+    en el maestro de gunicorn, antes del fork, no deja un hilo en marcha.
+    """
+    global _stream_handler, _sampling_filter
+    with _config_lock:
+        if _stream_handler is not None:
+            return
+        _sampling_filter = SamplingFilter(sample_rate)
+        _stream_handler = logging.StreamHandler(sys.stderr)
+        _stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        _stream_handler.addFilter(_sampling_filter)
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_stream_handler)
+        root.setLevel(level)
+        for name, logger_level in parse_log_levels(levels).items():
+            logging.getLogger(name).setLevel(logger_level)
+
+def start_log_listener():
+    """
+    Pasa el logger raíz a QueueHandler -> cola -> QueueListener -> stderr (idempotente).
+    Se llama al atender la primera petición (create_app / lifespan de src/asgi.py), ya en el worker.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    configure_logging()
+    with _config_lock:
+        if _listener is not None:
+            return
+        log_queue = queue.SimpleQueue()
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.addFilter(_sampling_filter)
+
+        root = logging.getLogger()
+        root.addHandler(queue_handler)
+        root.removeHandler(_stream_handler)
+
+        # El filtro ya se aplicó antes de encolar: el listener solo formatea y escribe
+        _stream_handler.removeFilter(_sampling_filter)
+        _listener = QueueListener(log_queue, _stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_stop_listener)
+
+def _stop_listener():
+    # Vacía la cola antes de salir para no perder los últimos registros
+    if _listener is not None:
+        _listener.stop()
+
+def _restart_listener_after_fork():
+    # Si el padre ya había arrancado el listener (fork sin gunicorn), el hilo no sobrevive al fork:
+    # el hijo arranca el suyo sobre la misma cola
+    global _listener
+    if _listener is not None:
+        _listener = QueueListener(_listener.queue, *_listener.handlers, respect_handler_level=True)
+        _listener.start()
+
+os.register_at_fork(after_in_child=_restart_listener_after_fork)
@@ -0,0 +1,25 @@
+import os
+
+# --- Configuración de Métricas (GET /metrics, formato de texto de Prometheus) ---
+
+# Permite desactivar la instrumentación y la ruta /metrics por completo.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Token que el scraper envía en 'Authorization: Bearer <token>' para leer /metrics.
+# Sin token configurado la ruta no se expone (404): las métricas revelan rutas y volumen de tráfico.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Límites (segundos) de los buckets de latencia de las rutas HTTP.
+HTTP_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Límites (segundos) de los buckets de verificación de bcrypt (incluye la espera en la cola del pool).
+BCRYPT_LATENCY_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0)
+
+# Directorio compartido por los workers de un mismo servidor. Si está definido, cada proceso
+# vuelca sus métricas en '<pid>.json' y GET /metrics suma los ficheros de todos, así la lectura
+# es la misma atienda el worker que atienda. gunicorn.conf.py lo define con SERVER_WORKERS > 1.
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+
+# Segundos entre volcados del fichero de cada worker (un worker sin tráfico no pierde nada:
+# su último volcado ya contiene todas sus observaciones).
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))
@@ -0,0 +1,36 @@
+import logging
+import os
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+logger = logging.getLogger(__name__)
+
+# --- Respuestas MessagePack (Accept: application/msgpack) ---
+# Con msgpack instalado (requirements-fast.txt), un cliente que prefiera application/msgpack
+# en su cabecera Accept recibe el mismo documento en MessagePack en lugar de JSON.
+# MSGPACK_ENABLED=false lo desactiva aunque el paquete esté instalado.
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+# Nombre histórico que algunos clientes siguen enviando
+_MSGPACK_ALIASES = (MSGPACK_MIMETYPE, 'application/x-msgpack')
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_ENABLED = msgpack is not None and os.getenv('MSGPACK_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+
+def wants_msgpack(accept_mimetypes) -> bool:
+    """Indica si el cliente prefiere MessagePack a JSON según su cabecera Accept (ya parseada)."""
+    if not MSGPACK_ENABLED:
+        return False
+    return accept_mimetypes.best_match(('application/json',) + _MSGPACK_ALIASES) in _MSGPACK_ALIASES
+
+
+def encode_msgpack(obj: Any) -> bytes:
+    """Codifica 'obj' en MessagePack; los tipos no nativos se convierten como en el proveedor JSON de Flask."""
+    return msgpack.packb(obj, default=DefaultJSONProvider.default)
@@ -0,0 +1,9 @@
+import os
+
+# --- Configuración de Paginación por Cursor (Keyset) ---
+
+# Tamaño de página usado cuando el cliente no envía '?limit='.
+DEFAULT_PAGE_SIZE = int(os.getenv("PAGE_SIZE_DEFAULT", 50))
+
+# Límite superior para '?limit='. Evita que un cliente pida la tabla completa.
+MAX_PAGE_SIZE = int(os.getenv("PAGE_SIZE_MAX", 200))
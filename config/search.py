@@ -0,0 +1,128 @@
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+# --- Índice de Texto Completo sobre users.nombre_biciusuario (SQLite FTS5) ---
+# Tabla virtual de contenido externo: guarda solo el índice, los datos siguen en 'users'.
+# Los triggers la mantienen al día con cualquier INSERT/UPDATE/DELETE, también los de Core
+# (siembra, importación). Si SQLite no trae FTS5, o con MySQL, la búsqueda por nombre
+# recurre a un LIKE por prefijo.
+
+USERS_FTS_TABLE = 'users_fts'
+
+_USERS_FTS_TABLE_DDL = (
+    f"CREATE VIRTUAL TABLE {USERS_FTS_TABLE} USING fts5("
+    "nombre_biciusuario, content='users', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+)
+_USERS_FTS_TRIGGERS = (f"{USERS_FTS_TABLE}_ai", f"{USERS_FTS_TABLE}_ad", f"{USERS_FTS_TABLE}_au")
+_USERS_FTS_TRIGGERS_DDL = (
+    f"CREATE TRIGGER IF NOT EXISTS {USERS_FTS_TABLE}_ai AFTER INSERT ON users BEGIN "
+    f"INSERT INTO {USERS_FTS_TABLE}(rowid, nombre_biciusuario) VALUES (new.id, new.nombre_biciusuario); END",
+    f"CREATE TRIGGER IF NOT EXISTS {USERS_FTS_TABLE}_ad AFTER DELETE ON users BEGIN "
+    f"INSERT INTO {USERS_FTS_TABLE}({USERS_FTS_TABLE}, rowid, nombre_biciusuario) "
+    "VALUES ('delete', old.id, old.nombre_biciusuario); END",
+    f"CREATE TRIGGER IF NOT EXISTS {USERS_FTS_TABLE}_au AFTER UPDATE OF nombre_biciusuario ON users BEGIN "
+    f"INSERT INTO {USERS_FTS_TABLE}({USERS_FTS_TABLE}, rowid, nombre_biciusuario) "
+    "VALUES ('delete', old.id, old.nombre_biciusuario); "
+    f"INSERT INTO {USERS_FTS_TABLE}(rowid, nombre_biciusuario) VALUES (new.id, new.nombre_biciusuario); END",
+)
+
+# Disponibilidad del índice por URL de base de datos: se consulta una vez por proceso
+_fts_available: Dict[str, bool] = {}
+_fts_lock = threading.Lock()
+
+def _fts_table_exists(conn) -> bool:
+    return conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': USERS_FTS_TABLE}).first() is not None
+
+def _missing_triggers(conn) -> list:
+    # Al borrar y recrear 'users' (drop_all + create_tables) sus triggers desaparecen con ella
+    existing = {row[0] for row in conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'users'"))}
+    return [name for name in _USERS_FTS_TRIGGERS if name not in existing]
+
+def _create_triggers_and_rebuild(conn):
+    for statement in _USERS_FTS_TRIGGERS_DDL:
+        conn.execute(text(statement))
+    conn.execute(text(f"INSERT INTO {USERS_FTS_TABLE}({USERS_FTS_TABLE}) VALUES ('rebuild')"))
+
+def create_users_fts(engine) -> bool:
+    """
+    Crea (si falta) el índice FTS5 de nombres y sus triggers, y lo llena con los usuarios existentes.
+    Si el índice ya existe pero falta alguno de sus triggers (p. ej., se recreó 'users'),
+    los vuelve a crear y reconstruye el índice. Retorna True si el índice está disponible.
+    Se invoca desde create_tables().
+    """
+    if engine.dialect.name != 'sqlite':
+        return False
+    with engine.connect() as conn:
+        available = _fts_table_exists(conn)
+        if available:
+            missing = _missing_triggers(conn)
+            if missing:
+                _create_triggers_and_rebuild(conn)
+                conn.commit()
+                logger.warning("Triggers del índice FTS5 restaurados (%s) y el índice reconstruido",
+                               ', '.join(missing))
+        else:
+            try:
+                conn.execute(text(_USERS_FTS_TABLE_DDL))
+                _create_triggers_and_rebuild(conn)
+                conn.commit()
+                available = True
+                logger.info("Índice FTS5 de nombres de biciusuario creado")
+            except OperationalError as e:
+                conn.rollback()
+                logger.warning("SQLite sin FTS5 (%s): la búsqueda por nombre usará LIKE por prefijo", e)
+    with _fts_lock:
+        _fts_available[str(engine.url)] = available
+    return available
+
+@contextmanager
+def users_fts_suspended(engine):
+    """
+    Para cargas masivas: quita los triggers del índice FTS5 mientras dura el bloque y al final
+    los vuelve a crear y reconstruye el índice de una vez, mucho más rápido que fila a fila.
+    """
+    with engine.connect() as conn:
+        active = engine.dialect.name == 'sqlite' and _fts_table_exists(conn)
+        if active:
+            for trigger in _USERS_FTS_TRIGGERS:
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+            conn.commit()
+    try:
+        yield
+    finally:
+        if active:
+            with engine.connect() as conn:
+                _create_triggers_and_rebuild(conn)
+                conn.commit()
+            logger.info("Índice FTS5 de nombres reconstruido tras la carga masiva")
+
+def users_fts_available(conn) -> bool:
+    """Indica si la base de 'conn' (Connection o Session) tiene el índice FTS5 de nombres."""
+    bind = conn.get_bind() if hasattr(conn, 'get_bind') else conn.engine
+    if bind.dialect.name != 'sqlite':
+        return False
+    key = str(bind.url)
+    with _fts_lock:
+        available = _fts_available.get(key)
+    if available is None:
+        available = _fts_table_exists(conn)
+        with _fts_lock:
+            _fts_available[key] = available
+    return available
+
+def fts_prefix_query(terms: str) -> str:
+    """
+    Convierte el texto del cliente en una consulta FTS5 segura: cada palabra entre comillas
+    (sin operadores) y con '*' para buscar por prefijo; todas deben aparecer.
+    """
+    return ' '.join('"' + word.replace('"', '""') + '"*' for word in terms.split())
@@ -0,0 +1,18 @@
+import os
+
+# --- Coste de bcrypt (work factor) ---
+
+# Cada unidad duplica el tiempo de hash/verificación. Ajustar con:
+#   flask --app src.app calibrate-bcrypt --target-ms 250
+# Los hashes con otro coste se regeneran automáticamente en el siguiente login correcto.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+# --- Configuración del Pool de Hashing de Contraseñas (bcrypt) ---
+
+# Hilos dedicados a bcrypt. bcrypt libera el GIL, así que un pool de hilos
+# aprovecha todos los núcleos sin el coste de serializar hacia procesos.
+BCRYPT_POOL_SIZE = int(os.getenv("BCRYPT_POOL_SIZE", os.cpu_count() or 2))
+
+# Operaciones que pueden esperar turno además de las que ya se ejecutan.
+# Superado este límite, la petición se rechaza al instante con 503.
+BCRYPT_QUEUE_MAX = int(os.getenv("BCRYPT_QUEUE_MAX", BCRYPT_POOL_SIZE * 4))
@@ -0,0 +1,23 @@
+import os
+
+# --- Servidor de Producción (gunicorn.conf.py) ---
+
+# Dirección y puerto de escucha.
+SERVER_BIND = os.getenv("SERVER_BIND", "0.0.0.0:5000")
+
+# Procesos worker creados por fork a partir del maestro (que ya cargó la aplicación).
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", (os.cpu_count() or 1) * 2 + 1))
+
+# Hilos por worker: cada uno atiende una petición; la E/S de base de datos y bcrypt liberan el GIL.
+SERVER_THREADS = int(os.getenv("SERVER_THREADS", 4))
+
+# Un worker se recicla tras atender este número de peticiones (acota el crecimiento de memoria).
+# El 'jitter' aleatorio evita que todos los workers se reinicien a la vez. 0 desactiva el reciclado.
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", 5000))
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", 500))
+
+# Segundos que un worker tiene para terminar sus peticiones en curso tras SIGTERM o al reciclarse.
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", 30))
+
+# Segundos sin responder tras los cuales el maestro da por colgado a un worker y lo reemplaza.
+SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", 60))
@@ -0,0 +1,111 @@
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# --- Perfilador de SQL por Petición (opcional) ---
+# Se activa con SQL_PROFILER=true. Escucha los eventos de ejecución de todos los motores
+# (también el síncrono que hay debajo del motor asíncrono) y, por petición:
+#   - cuenta sentencias y tiempo total en base de datos -> cabecera Server-Timing,
+#   - registra las sentencias lentas junto con la ruta,
+#   - avisa cuando la misma sentencia se repite muchas veces (probable N+1).
+
+SQL_PROFILER_ENABLED = os.getenv('SQL_PROFILER', 'false').lower() in ('1', 'true', 'yes')
+
+# Sentencias que tarden más de estos milisegundos van al log de consultas lentas.
+SQL_SLOW_QUERY_MS = float(os.getenv('SQL_SLOW_QUERY_MS', 100))
+
+# Repeticiones de una misma sentencia en una petición a partir de las cuales se avisa de un N+1.
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv('SQL_N_PLUS_ONE_THRESHOLD', 5))
+
+
+class RequestProfile:
+    """Estadísticas de SQL de una petición: número de sentencias, tiempo y repeticiones."""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements = {}
+
+    def record(self, statement: str, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def repeated(self, threshold: int = SQL_N_PLUS_ONE_THRESHOLD):
+        """Sentencias ejecutadas al menos 'threshold' veces, de la más a la menos repetida."""
+        return sorted(((n, s) for s, n in self.statements.items() if n >= threshold), reverse=True)
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_ms:.2f};desc="{self.count} consultas"'
+
+
+# ContextVar: cada hilo (WSGI) o tarea (ASGI) ve solo el perfil de su propia petición
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar('sql_profile', default=None)
+
+# El inicio se guarda en el contexto de ejecución de la sentencia, no en la conexión: si la
+# sentencia falla no hay after_cursor_execute, y el contexto se descarta con ella.
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._sql_profiler_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - context._sql_profiler_start) * 1000
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record(statement, elapsed_ms)
+    if elapsed_ms >= SQL_SLOW_QUERY_MS:
+        logger.warning("Consulta lenta (%.1f ms) en %s: %s", elapsed_ms,
+                       profile.route if profile is not None else 'sin petición', ' '.join(statement.split()))
+
+_listeners_installed = False
+_listeners_lock = threading.Lock()
+
+def install_sql_listeners():
+    """Registra los eventos de ejecución sobre la clase Engine (vale para motores aún no creados)."""
+    global _listeners_installed
+    with _listeners_lock:
+        if not _listeners_installed:
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            _listeners_installed = True
+
+def init_sql_profiler(app):
+    """
+    Perfila el SQL de cada petición de la aplicación Flask si SQL_PROFILER está activo.
+    En las respuestas en streaming (export) solo cuenta el SQL previo al envío de cabeceras.
+    """
+    if not SQL_PROFILER_ENABLED:
+        return
+    install_sql_listeners()
+    logger.info("Perfilador de SQL activo (lentas >= %s ms, N+1 >= %s repeticiones)",
+                SQL_SLOW_QUERY_MS, SQL_N_PLUS_ONE_THRESHOLD)
+
+    @app.before_request
+    def _start_sql_profile():
+        route = request.url_rule.rule if request.url_rule is not None else request.path
+        g.sql_profile_token = _current_profile.set(RequestProfile(f"{request.method} {route}"))
+
+    @app.after_request
+    def _report_sql_profile(response):
+        profile = _current_profile.get()
+        if profile is not None:
+            response.headers.add('Server-Timing', profile.server_timing())
+            for count, statement in profile.repeated():
+                logger.warning("Posible N+1 en %s: %s ejecuciones de: %s",
+                               profile.route, count, ' '.join(statement.split())[:300])
+        return response
+
+    @app.teardown_request
+    def _end_sql_profile(exception):
+        token = g.pop('sql_profile_token', None)
+        if token is not None:
+            _current_profile.reset(token)
@@ -0,0 +1,57 @@
+import functools
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+import jwt
+from starlette.requests import Request
+
+from config.jwt import JWT_SECRET_KEY, JWT_ACCESS_TOKEN_EXPIRES, JWT_HEADER_NAME, JWT_HEADER_TYPE
+from controllers.asgi_responses import JSONResponse
+
+# --- JWT para el servidor ASGI ---
+# Flask-JWT-Extended depende de Flask, así que el servidor ASGI emite y valida los tokens
+# directamente con PyJWT usando la misma clave, algoritmo y claims: un token obtenido
+# en cualquiera de los dos servidores es válido en el otro.
+
+JWT_ALGORITHM = 'HS256'
+
+def create_access_token(identity: str) -> str:
+    """Genera un token de acceso con el mismo formato que flask_jwt_extended.create_access_token."""
+    now = datetime.now(timezone.utc)
+    payload = {
+        'fresh': False,
+        'iat': now,
+        'jti': str(uuid.uuid4()),
+        'type': 'access',
+        'sub': identity,
+        'nbf': now,
+        'exp': now + JWT_ACCESS_TOKEN_EXPIRES,
+    }
+    return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+
+def decode_identity(header_value: Optional[str]) -> Optional[str]:
+    """Retorna la identidad ('sub') de un encabezado 'Bearer <token>' válido, o None."""
+    if not header_value:
+        return None
+    parts = header_value.split()
+    if len(parts) != 2 or parts[0] != JWT_HEADER_TYPE:
+        return None
+    try:
+        payload = jwt.decode(parts[1], JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+    except jwt.PyJWTError:
+        return None
+    if payload.get('type') != 'access':
+        return None
+    return payload.get('sub')
+
+def jwt_required(endpoint):
+    """Equivalente ASGI de @jwt_required(): deja la identidad en request.state.jwt_identity."""
+    @functools.wraps(endpoint)
+    async def wrapper(request: Request):
+        identity = decode_identity(request.headers.get(JWT_HEADER_NAME))
+        if identity is None:
+            return JSONResponse({'msg': 'Token faltante o inválido'}, status_code=401)
+        request.state.jwt_identity = identity
+        return await endpoint(request)
+    return wrapper
@@ -0,0 +1,328 @@
+import io
+import logging
+from anyio import from_thread
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from sqlalchemy.exc import IntegrityError
+
+from config.database import get_db_session
+from config.database_async import AsyncSessionLocal
+from config.logging_config import SAMPLED
+from controllers.asgi_auth import create_access_token, jwt_required
+from controllers.asgi_responses import JSONResponse
+from controllers.etags import etag_matches, page_etag, parse_if_match_version, profile_etag
+from controllers.pagination import parse_page_params
+from controllers.projection import parse_projection_params
+from services.bicicletas_services import SEARCH_FILTERS, BicicletasService
+from services.biciusuarios_services import VersionConflict
+from services.biciusuarios_services_async import AsyncBiciusuariosService
+from services.import_services import ImportService, parse_csv, parse_ndjson
+from services.password_hasher import HashingQueueFull, get_password_hasher
+from services.profile_cache import get_profile_cache
+from services.user_services_async import AsyncUsersService
+
+logger = logging.getLogger(__name__)
+
+# --- Rutas del servidor ASGI (mismas URLs y respuestas que los blueprints Flask) ---
+
+def get_request_session(request: Request):
+    """Sesión asíncrona de la petición; la confirma y cierra AsyncUnitOfWorkMiddleware (src/asgi.py)."""
+    session = getattr(request.state, 'db_session', None)
+    if session is None:
+        session = AsyncSessionLocal()
+        request.state.db_session = session
+    return session
+
+def _json_with_etag(payload, etag: str, status_code: int = 200) -> JSONResponse:
+    return JSONResponse(payload, status_code=status_code, headers={'ETag': f'"{etag}"'})
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={'ETag': f'"{etag}"'})
+
+def _hashing_saturated() -> JSONResponse:
+    return JSONResponse(
+        {'error': 'Servicio de autenticación saturado, intente de nuevo en unos segundos.'},
+        status_code=503, headers={'Retry-After': '1'}
+    )
+
+class _RequestStreamReader(io.RawIOBase):
+    """
+    Archivo de solo lectura sobre request.stream() para los parsers síncronos de ImportService.
+    Se lee desde un hilo del pool: cada bloque se pide al bucle de eventos con anyio.from_thread,
+    así el cuerpo nunca se carga completo en memoria y la subida avanza al ritmo de la ingesta.
+    """
+
+    def __init__(self, request: Request):
+        self._chunks = request.stream()
+        self._pending = memoryview(b'')
+
+    def readable(self) -> bool:
+        return True
+
+    async def _next_chunk(self) -> bytes:
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return b''
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            chunk = from_thread.run(self._next_chunk)
+            if not chunk:
+                return 0
+            self._pending = memoryview(chunk)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+async def _json_body(request: Request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+# --- /auth ---
+
+async def register(request: Request):
+    """POST /auth/register"""
+    data = await _json_body(request) or {}
+    username = data.get('username')
+    password = data.get('password')
+    nombre_biciusuario = data.get('nombre_biciusuario')
+    if not username or not password or not nombre_biciusuario:
+        return JSONResponse({'error': 'Todos los campos (username, password, nombre_biciusuario) son obligatorios'}, 400)
+
+    service = AsyncUsersService(get_request_session(request))
+    try:
+        user = await service.create_user(username, password, nombre_biciusuario)
+    except HashingQueueFull:
+        return _hashing_saturated()
+    except Exception as e:
+        logger.error("Error al crear usuario: %s", e)
+        return JSONResponse({'error': 'No se pudo crear el usuario. El nombre de usuario podría ya existir.'}, 409)
+    return JSONResponse({'id': user.id, 'username': user.username, 'nombre_biciusuario': user.nombre_biciusuario}, 201)
+
+async def login(request: Request):
+    """POST /auth/login"""
+    data = await _json_body(request) or {}
+    username = data.get('username')
+    password = data.get('password')
+    if not username or not password:
+        return JSONResponse({'error': 'El nombre de usuario y la contraseña son obligatorios'}, 400)
+
+    service = AsyncUsersService(get_request_session(request))
+    try:
+        user = await service.authenticate_user(username, password)
+    except HashingQueueFull:
+        return _hashing_saturated()
+    if user:
+        return JSONResponse({'access_token': create_access_token(str(user.id))}, 200)
+    return JSONResponse({'error': 'Credenciales inválidas'}, 401)
+
+@jwt_required
+async def hashing_stats(request: Request):
+    """GET /auth/hashing/stats"""
+    return JSONResponse(get_password_hasher().stats())
+
+@jwt_required
+async def get_users(request: Request):
+    """GET /auth/users?limit=&after="""
+    try:
+        limit, after = parse_page_params(request.query_params)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, 400)
+
+    service = AsyncUsersService(get_request_session(request))
+    etag = page_etag(await service.get_users_page_versions(limit, after), variant='users')
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return _not_modified(etag)
+
+    users, next_cursor = await service.get_users_page(limit, after)
+    return _json_with_etag({
+        'items': users,
+        'next_cursor': next_cursor
+    }, etag)
+
+@jwt_required
+async def user_detail(request: Request):
+    """GET / PUT / DELETE /auth/users/<id>"""
+    user_id = request.path_params['user_id']
+    service = AsyncUsersService(get_request_session(request))
+
+    # PUT y DELETE: solo sobre el propio usuario
+    if request.method != 'GET' and str(user_id) != request.state.jwt_identity:
+        accion = 'modificar' if request.method == 'PUT' else 'eliminar'
+        return JSONResponse({'error': f'No tienes permiso para {accion} este usuario.'}, 403)
+
+    if request.method == 'GET':
+        user = await service.get_user_by_id(user_id)
+    elif request.method == 'PUT':
+        data = await _json_body(request) or {}
+        try:
+            user = await service.update_user(user_id, data.get('username'), data.get('password'),
+                                             data.get('nombre_biciusuario'))
+        except HashingQueueFull:
+            return _hashing_saturated()
+        except IntegrityError as e:
+            logger.error("Error al actualizar usuario %s: %s", user_id, e)
+            return JSONResponse({'error': 'No se pudo actualizar el usuario. El nombre de usuario podría ya existir.'}, 409)
+    else:
+        if await service.delete_user(user_id):
+            return JSONResponse({'message': 'Usuario eliminado correctamente'}, 200)
+        user = None
+
+    if user is None:
+        return JSONResponse({'error': 'Usuario no encontrado'}, 404)
+    return JSONResponse({'id': user.id, 'username': user.username, 'nombre_biciusuario': user.nombre_biciusuario}, 200)
+
+auth_routes = [
+    Route('/register', register, methods=['POST']),
+    Route('/login', login, methods=['POST']),
+    Route('/hashing/stats', hashing_stats, methods=['GET']),
+    Route('/users', get_users, methods=['GET']),
+    Route('/users/{user_id:int}', user_detail, methods=['GET', 'PUT', 'DELETE']),
+]
+
+# --- /biciusuarios ---
+
+@jwt_required
+async def list_biciusuarios(request: Request):
+    """GET /biciusuarios?limit=&after=&fields=&expand="""
+    try:
+        limit, after = parse_page_params(request.query_params)
+        projection = parse_projection_params(request.query_params)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, 400)
+
+    service = AsyncBiciusuariosService(get_request_session(request))
+    etag = page_etag(await service.get_biciusuarios_page_versions(limit, after),
+                     variant='biciusuarios' + projection.variant)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return _not_modified(etag)
+    return _json_with_etag(await service.get_biciusuarios_page_json(limit, after, projection), etag)
+
+@jwt_required
+async def export_biciusuarios(request: Request):
+    """GET /biciusuarios/export?fields=&expand= - NDJSON en streaming."""
+    try:
+        projection = parse_projection_params(request.query_params)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, 400)
+
+    async def stream():
+        # Sesión propia: la respuesta se sigue enviando después de que termina el endpoint
+        async with AsyncSessionLocal() as session:
+            async for line in AsyncBiciusuariosService(session).export_biciusuarios_ndjson(projection=projection):
+                yield line
+    return StreamingResponse(stream(), media_type='application/x-ndjson')
+
+@jwt_required
+async def import_biciusuarios(request: Request):
+    """POST /biciusuarios/import - NDJSON o CSV, solo en el propio perfil."""
+    content_type = request.headers.get('Content-Type', '').split(';')[0].strip()
+    if content_type in ('application/x-ndjson', 'application/jsonl'):
+        parser = parse_ndjson
+    elif content_type == 'text/csv':
+        parser = parse_csv
+    else:
+        return JSONResponse({'error': 'Content-Type debe ser application/x-ndjson o text/csv'}, 415)
+
+    # La ingesta masiva es trabajo por lotes, no de latencia: reutiliza ImportService
+    # (síncrono, con su propia sesión y transacciones por lote) en el pool de hilos,
+    # leyendo el cuerpo en streaming a medida que el parser lo consume.
+    owner_id = int(request.state.jwt_identity)
+    def run_import():
+        session = get_db_session()
+        try:
+            return ImportService(session).import_rows(parser(_RequestStreamReader(request)), owner_id)
+        finally:
+            session.close()
+
+    return JSONResponse(await run_in_threadpool(run_import), 200)
+
+@jwt_required
+async def search_bicicletas(request: Request):
+    """GET /biciusuarios/bicicletas/search?serial=&marca=&modelo=&color=&nombre=&limit=&after="""
+    try:
+        limit, after = parse_page_params(request.query_params)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, 400)
+
+    filters = {name: request.query_params[name].strip() for name in SEARCH_FILTERS
+               if request.query_params.get(name, '').strip()}
+    if not filters:
+        return JSONResponse({'error': f"Indique al menos un filtro: {', '.join(SEARCH_FILTERS)}."}, 400)
+
+    logger.info("Búsqueda de bicicletas por %s", ', '.join(sorted(filters)), extra=SAMPLED)
+    # BicicletasService es síncrono (usa users_fts con la conexión de SQLAlchemy): se ejecuta
+    # en el pool de hilos con su propia sesión, como la importación.
+    def run_search():
+        session = get_db_session()
+        try:
+            return BicicletasService(session).search_bicicletas(limit, after, **filters)
+        finally:
+            session.close()
+
+    return JSONResponse(await run_in_threadpool(run_search), 200)
+
+@jwt_required
+async def cache_stats(request: Request):
+    """GET /biciusuarios/cache/stats"""
+    return JSONResponse(get_profile_cache().stats())
+
+@jwt_required
+async def biciusuario_detail(request: Request):
+    """GET / PUT / DELETE /biciusuarios/<id>"""
+    biciusuario_id = request.path_params['biciusuario_id']
+    service = AsyncBiciusuariosService(get_request_session(request))
+
+    if request.method == 'GET':
+        try:
+            projection = parse_projection_params(request.query_params)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, 400)
+        version = await service.get_biciusuario_version(biciusuario_id)
+        if version is None:
+            return JSONResponse({'error': 'Usuario no encontrado'}, 404)
+        etag = profile_etag(biciusuario_id, version, projection.variant)
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return _not_modified(etag)
+        biciusuario = await service.get_biciusuario_by_id(biciusuario_id, projection)
+        if biciusuario is None:
+            return JSONResponse({'error': 'Usuario no encontrado'}, 404)
+        return _json_with_etag(biciusuario, etag)
+
+    # PUT y DELETE: solo sobre el propio perfil
+    if str(biciusuario_id) != request.state.jwt_identity:
+        accion = 'modificar' if request.method == 'PUT' else 'eliminar'
+        return JSONResponse({'error': f'No tienes permiso para {accion} este perfil.'}, 403)
+
+    if request.method == 'DELETE':
+        if not await service.delete_biciusuario(biciusuario_id):
+            return JSONResponse({'error': 'Usuario no encontrado'}, 404)
+        return JSONResponse({'result': 'Usuario y datos asociados eliminados correctamente'}, 200)
+
+    data = await _json_body(request)
+    if not data:
+        return JSONResponse({'error': 'Bad request'}, 400)
+    _, expected_version = parse_if_match_version(request.headers.get('If-Match'), biciusuario_id)
+    try:
+        updated = await service.update_biciusuario(biciusuario_id, data, expected_version)
+    except VersionConflict:
+        return JSONResponse({'error': 'El perfil fue modificado por otra petición. Vuelva a consultarlo.'}, 412)
+    if updated is None:
+        return JSONResponse({'error': 'Usuario no encontrado'}, 404)
+    biciusuario, version = updated
+    return _json_with_etag(biciusuario, profile_etag(biciusuario_id, version))
+
+biciusuarios_routes = [
+    Route('/', list_biciusuarios, methods=['GET']),
+    Route('/export', export_biciusuarios, methods=['GET']),
+    Route('/import', import_biciusuarios, methods=['POST']),
+    Route('/bicicletas/search', search_bicicletas, methods=['GET']),
+    Route('/cache/stats', cache_stats, methods=['GET']),
+    Route('/{biciusuario_id:int}', biciusuario_detail, methods=['GET', 'PUT', 'DELETE']),
+]
@@ -0,0 +1,14 @@
+from typing import Any
+from starlette.responses import JSONResponse as StarletteJSONResponse
+
+from config.json_encoding import encode_json
+
+
+class JSONResponse(StarletteJSONResponse):
+    """
+    Respuesta JSON del servidor ASGI codificada con encode_json (orjson si está instalado),
+    igual que jsonify en Flask. Los EncodedJSON de los servicios se envían sin recodificar.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
@@ -1,18 +1,24 @@
 import logging
-# Configuración básica de logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 # Importación clave para la autenticación:
 from flask_jwt_extended import jwt_required, get_jwt_identity 
 
 # Las importaciones de tu base de datos y servicios
 from sqlalchemy.orm import Session
-from config.database import get_db_session # Aquí tu función para obtener sesión de DB
+from config.database import get_request_session # Sesión compartida por toda la petición
 
 # CAMBIO CRÍTICO 1: Importar solo la CLASE del servicio, no las funciones que no existen.
-from services.biciusuarios_services import BiciusuariosService 
+from services.biciusuarios_services import BiciusuariosService, VersionConflict
+from services.bicicletas_services import BicicletasService, SEARCH_FILTERS
+from services.import_services import ImportService, parse_csv, parse_ndjson
+from services.profile_cache import get_profile_cache
+from controllers.pagination import parse_page_params
+from controllers.projection import parse_projection_params
+from controllers.etags import if_match_version, not_modified_response, page_etag, profile_etag
+from config.logging_config import SAMPLED
+from config.msgpack_encoding import MSGPACK_MIMETYPE, wants_msgpack
 
 biciusuario_bp = Blueprint('biciusuario_bp', __name__)
 
@@ -20,45 +26,165 @@ biciusuario_bp = Blueprint('biciusuario_bp', __name__)
 
 def get_biciusuarios_service() -> BiciusuariosService:
     """
-    Proporciona una instancia de BiciusuariosService con una sesión de DB fresca.
-    Esto asegura el manejo correcto de la sesión por cada petición.
+    Proporciona una instancia de BiciusuariosService con la sesión de DB de la petición.
+    La sesión se confirma/revierte y se cierra al terminar la petición (init_db_session).
     """
-    # Usamos 'with' o 'try/finally' si get_db_session() usa un generador
-    # Si get_db_session() retorna la sesión directamente, no necesitamos 'with' aquí.
-    db_session = get_db_session()
+    db_session = get_request_session()
     # Asume que BiciusuariosService.__init__ acepta una sesión
     return BiciusuariosService(db_session)
 
+def get_bicicletas_service() -> BicicletasService:
+    """Proporciona una instancia de BicicletasService con la sesión de DB de la petición."""
+    return BicicletasService(get_request_session())
+
+def get_import_service() -> ImportService:
+    """Proporciona una instancia de ImportService con la sesión de DB de la petición."""
+    return ImportService(get_request_session())
+
 # --- Rutas CRUD de Perfiles ---
 
 @biciusuario_bp.route('/', methods=['GET']) 
 @jwt_required() # <-- RUTA PROTEGIDA
 def get_all_biciusuarios_route():
-    """GET /biciusuarios - Recupera la lista de todos los biciusuarios."""
-    logger.info("Consulta de todos los biciusuarios (acceso autenticado)")
+    """
+    GET /biciusuarios?limit=&after=&fields=&expand= - Recupera una página de biciusuarios.
+    La respuesta incluye 'next_cursor', que se envía como 'after' para pedir la página siguiente.
+    'fields' y 'expand' limitan las columnas y relaciones que se consultan y se devuelven.
+    """
+    try:
+        limit, after = parse_page_params()
+        projection = parse_projection_params()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    logger.info("Consulta de biciusuarios paginada (acceso autenticado)", extra=SAMPLED)
     
     # CAMBIO 2: Obtener la instancia del servicio e invocar el método
     service = get_biciusuarios_service()
-    biciusuarios = service.get_all_biciusuarios()   
-    
-    return jsonify(biciusuarios), 200
+
+    # El ETag se calcula solo con (id, version) de la página: si el cliente ya la tiene, 304 sin serializar
+    etag = page_etag(service.get_biciusuarios_page_versions(limit, after),
+                     variant='biciusuarios' + projection.variant)
+    not_modified = not_modified_response(etag)
+    if not_modified is not None:
+        return not_modified
+
+    # Página ya codificada por el servicio: jsonify la envía tal cual
+    page = service.get_biciusuarios_page_json(limit, after, projection)
+    response = jsonify(page)
+    response.set_etag(etag)
+    return response, 200
+
+@biciusuario_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_biciusuarios_route():
+    """
+    GET /biciusuarios/export?fields=&expand= - Exporta todos los perfiles (con bicicletas y registros) en NDJSON.
+    La respuesta se transmite en streaming: una línea JSON por biciusuario.
+    Con 'Accept: application/msgpack' se transmite un mapa MessagePack por biciusuario.
+    """
+    try:
+        projection = parse_projection_params()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    service = get_biciusuarios_service()
+    if wants_msgpack(request.accept_mimetypes):
+        logger.info("Exportación MessagePack de biciusuarios (acceso autenticado)")
+        lines, mimetype = service.export_biciusuarios_msgpack(projection=projection), MSGPACK_MIMETYPE
+    else:
+        logger.info("Exportación NDJSON de biciusuarios (acceso autenticado)")
+        lines, mimetype = service.export_biciusuarios_ndjson(projection=projection), 'application/x-ndjson'
+    # stream_with_context mantiene vivo el contexto de la petición mientras se consume el generador
+    response = Response(stream_with_context(lines), mimetype=mimetype)
+    response.vary.add('Accept')
+    return response
+
+@biciusuario_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_biciusuarios_route():
+    """
+    POST /biciusuarios/import - Ingesta masiva de bicicletas y registros del propio perfil.
+    Acepta 'application/x-ndjson' o 'text/csv'; cada fila lleva tipo, biciusuario_id, serial
+    y, para bicicletas, marca/modelo/color. Retorna los totales y los errores por fila.
+    CRÍTICO: las filas de otro biciusuario_id se rechazan como error de fila.
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        rows = parse_ndjson(request.stream)
+    elif request.mimetype == 'text/csv':
+        rows = parse_csv(request.stream)
+    else:
+        logger.warning("Importación con Content-Type no soportado: %s", request.mimetype)
+        return jsonify({'error': 'Content-Type debe ser application/x-ndjson o text/csv'}), 415
+
+    service = get_import_service()
+    summary = service.import_rows(rows, owner_id=int(get_jwt_identity()))
+    logger.info("Importación masiva: %s bicicletas, %s registros, %s errores",
+                summary['bicicletas_insertadas'], summary['registros_insertados'], len(summary['errores']))
+    return jsonify(summary), 200
+
+@biciusuario_bp.route('/cache/stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats_route():
+    """GET /biciusuarios/cache/stats - Aciertos, fallos e invalidaciones de la caché de perfiles."""
+    return jsonify(get_profile_cache().stats()), 200
+
+@biciusuario_bp.route('/bicicletas/search', methods=['GET'])
+@jwt_required()
+def search_bicicletas_route():
+    """
+    GET /biciusuarios/bicicletas/search?serial=&marca=&modelo=&color=&nombre=&limit=&after=
+    Busca bicicletas (con su propietario) combinando los filtros con AND; al menos uno es obligatorio.
+    'serial', 'marca', 'modelo' y 'color' son coincidencias exactas; 'nombre' busca por prefijo
+    en el nombre del biciusuario. Paginada por cursor como el listado de biciusuarios.
+    """
+    try:
+        limit, after = parse_page_params()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    filters = {name: request.args[name].strip() for name in SEARCH_FILTERS
+               if request.args.get(name, '').strip()}
+    if not filters:
+        return jsonify({'error': f"Indique al menos un filtro: {', '.join(SEARCH_FILTERS)}."}), 400
+
+    logger.info("Búsqueda de bicicletas por %s", ', '.join(sorted(filters)), extra=SAMPLED)
+    service = get_bicicletas_service()
+    return jsonify(service.search_bicicletas(limit, after, **filters)), 200
 
 @biciusuario_bp.route('/<int:biciusuario_id>', methods=['GET'])
 @jwt_required() # Protegemos esta ruta para asegurar que solo usuarios autenticados consulten perfiles
 def get_biciusuario_route(biciusuario_id):
-    """GET /biciusuarios/<id> - Recupera un biciusuario por ID."""
-    
-    logger.info(f"Consulta de biciusuario por ID: {biciusuario_id}")
+    """GET /biciusuarios/<id>?fields=&expand= - Recupera un biciusuario por ID."""
+    try:
+        projection = parse_projection_params()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    logger.info("Consulta de biciusuario por ID: %s", biciusuario_id, extra=SAMPLED)
     
     # CAMBIO 2: Obtener la instancia del servicio e invocar el método
     service = get_biciusuarios_service()
-    biciusuario = service.get_biciusuario_by_id(biciusuario_id) 
+
+    # Primero la versión (caché o consulta por PK): si coincide con If-None-Match, 304 sin cargar el perfil
+    version = service.get_biciusuario_version(biciusuario_id)
+    if version is None:
+        logger.warning("Biciusuario no encontrado: %s", biciusuario_id)
+        return jsonify({'error': 'Usuario no encontrado'}), 404
+    etag = profile_etag(biciusuario_id, version, projection.variant)
+    not_modified = not_modified_response(etag)
+    if not_modified is not None:
+        return not_modified
+
+    biciusuario = service.get_biciusuario_by_id(biciusuario_id, projection)
     
     if biciusuario is None:
-        logger.warning(f"Biciusuario no encontrado: {biciusuario_id}")
+        logger.warning("Biciusuario no encontrado: %s", biciusuario_id)
         return jsonify({'error': 'Usuario no encontrado'}), 404
         
-    return jsonify(biciusuario), 200
+    response = jsonify(biciusuario)
+    response.set_etag(etag)
+    return response, 200
 
 # La ruta POST /biciusuarios es REDUNDANTE, ya que /auth/register maneja la creación inicial del perfil.
 # Sin embargo, si quieres mantenerla para crear perfiles detallados por separado:
@@ -77,7 +203,7 @@ def create_biciusuario_route():
     # Si el registro inicial ya se hace en /auth/register, esta ruta podría ser innecesaria.
     biciusuario = service.create_biciusuario(data) 
     
-    logger.info(f"Biciusuario creado: {data.get('nombre_biciusuario')}")
+    logger.info("Biciusuario creado: %s", data.get('nombre_biciusuario'))
     return jsonify(biciusuario), 201 
 
 @biciusuario_bp.route('/<int:biciusuario_id>', methods=['PUT'])
@@ -86,27 +212,37 @@ def update_biciusuario_route(biciusuario_id):
     """
     PUT /biciusuarios/<id> - Actualiza un biciusuario y sus sub-recursos.
     CRÍTICO: Solo permite actualizar el propio perfil.
+    Con 'If-Match: "<ETag>"' la actualización solo se aplica si el perfil no cambió (412 si cambió).
     """
     current_user_id = get_jwt_identity()
     if str(biciusuario_id) != current_user_id:
-        logger.warning(f"Intento de actualizar perfil ajeno. Token ID: {current_user_id}, Target ID: {biciusuario_id}")
+        logger.warning("Intento de actualizar perfil ajeno. Token ID: %s, Target ID: %s", current_user_id, biciusuario_id)
         return jsonify({'error': 'No tienes permiso para modificar este perfil.'}), 403
 
     data = request.get_json()
     if not data:
-        logger.warning(f"Intento de actualización sin datos para ID: {biciusuario_id}")
+        logger.warning("Intento de actualización sin datos para ID: %s", biciusuario_id)
         return jsonify({'error': 'Bad request'}), 400
     
+    # If-Match: concurrencia optimista sobre la columna users.version
+    _, expected_version = if_match_version(biciusuario_id)
+
     # CAMBIO 2: Obtener la instancia del servicio e invocar el método
     service = get_biciusuarios_service()
-    biciusuario = service.update_biciusuario(biciusuario_id, data)
+    try:
+        updated = service.update_biciusuario(biciusuario_id, data, expected_version)
+    except VersionConflict:
+        return jsonify({'error': 'El perfil fue modificado por otra petición. Vuelva a consultarlo.'}), 412
     
-    if biciusuario is None:
-        logger.warning(f"Biciusuario no encontrado para actualizar: {biciusuario_id}")
+    if updated is None:
+        logger.warning("Biciusuario no encontrado para actualizar: %s", biciusuario_id)
         return jsonify({'error': 'Usuario no encontrado'}), 404
     
-    logger.info(f"Biciusuario actualizado: {biciusuario_id}")
-    return jsonify(biciusuario), 200
+    logger.info("Biciusuario actualizado: %s", biciusuario_id)
+    biciusuario, version = updated
+    response = jsonify(biciusuario)
+    response.set_etag(profile_etag(biciusuario_id, version))
+    return response, 200
 
 
 @biciusuario_bp.route('/<int:biciusuario_id>', methods=['DELETE'])
@@ -118,7 +254,7 @@ def delete_biciusuario_route(biciusuario_id):
     """
     current_user_id = get_jwt_identity()
     if str(biciusuario_id) != current_user_id:
-        logger.warning(f"Intento de eliminar perfil ajeno. Token ID: {current_user_id}, Target ID: {biciusuario_id}")
+        logger.warning("Intento de eliminar perfil ajeno. Token ID: %s, Target ID: %s", current_user_id, biciusuario_id)
         return jsonify({'error': 'No tienes permiso para eliminar este perfil.'}), 403
         
     # CAMBIO 2: Obtener la instancia del servicio e invocar el método
@@ -126,8 +262,8 @@ def delete_biciusuario_route(biciusuario_id):
     success = service.delete_biciusuario(biciusuario_id)
     
     if not success:
-        logger.warning(f"Biciusuario no encontrado para eliminar: {biciusuario_id}")
+        logger.warning("Biciusuario no encontrado para eliminar: %s", biciusuario_id)
         return jsonify({'error': 'Usuario no encontrado'}), 404
     
-    logger.info(f"Biciusuario eliminado: {biciusuario_id}")
+    logger.info("Biciusuario eliminado: %s", biciusuario_id)
     return jsonify({'result': 'Usuario y datos asociados eliminados correctamente'}), 200
@@ -0,0 +1,102 @@
+import hashlib
+from typing import Iterable, Optional, Tuple
+from flask import Response, request
+from werkzeug.datastructures import ETags
+from werkzeug.http import parse_etags
+
+# --- ETags basados en la columna users.version ---
+
+# Sufijos que distinguen otra codificación del mismo recurso (MessagePack, gzip, deflate).
+# El ETag sigue siendo fuerte: cada representación tiene el suyo, y todos nombran la misma versión.
+REPRESENTATION_SUFFIXES = ('-msgpack', '-gzip', '-deflate')
+
+def representation_etag(response, representation: str):
+    """Añade al ETag fuerte de 'response' el sufijo de su representación ('msgpack', 'gzip'...)."""
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{representation}")
+
+def strip_representation(tag: str) -> str:
+    """ETag de la representación base (JSON sin comprimir) a partir del de cualquier representación."""
+    stripped = True
+    while stripped:
+        stripped = False
+        for suffix in REPRESENTATION_SUFFIXES:
+            if tag.endswith(suffix):
+                tag = tag[:-len(suffix)]
+                stripped = True
+    return tag
+
+def _matching_tag(if_none_match: ETags, etag: str) -> Optional[str]:
+    # Comparación débil de If-None-Match, ignorando el sufijo de representación.
+    # Retorna el ETag que el cliente ya tiene (el que debe llevar el 304)
+    if if_none_match.star_tag:
+        return etag
+    for tag in if_none_match.as_set(include_weak=True):
+        if strip_representation(tag) == etag:
+            return tag
+    return None
+
+def profile_etag(user_id: int, version: int, variant: str = '') -> str:
+    """
+    ETag fuerte de un perfil: cambia cada vez que se incrementa su versión.
+    'variant' distingue representaciones parciales (?fields=/?expand=) con un sufijo '-p<hash>'.
+    """
+    if not variant:
+        return f"u{user_id}-v{version}"
+    return f"u{user_id}-v{version}-p{hashlib.sha1(variant.encode('utf-8')).hexdigest()[:12]}"
+
+def page_etag(pairs: Iterable[Tuple[int, int]], variant: str = '') -> str:
+    """
+    ETag fuerte de una página de listado, a partir de los pares (id, version) que la componen
+    (incluido el que determina 'next_cursor'). 'variant' distingue representaciones de la misma página.
+    """
+    digest = hashlib.sha1(variant.encode('utf-8'))
+    for user_id, version in pairs:
+        digest.update(f"{user_id}:{version};".encode('ascii'))
+    return digest.hexdigest()
+
+def not_modified_response(etag: str) -> Optional[Response]:
+    """
+    Retorna un 304 (sin cuerpo) si el cliente ya tiene esta versión según If-None-Match.
+    La comparación es débil y vale también el ETag de otra representación (p. ej., '-gzip'):
+    el 304 lleva el ETag que envió el cliente.
+    """
+    if not request.if_none_match:
+        return None
+    matched = _matching_tag(request.if_none_match, etag)
+    if matched is None:
+        return None
+    response = Response(status=304)
+    response.set_etag(matched)
+    return response
+
+def if_match_version(user_id: int) -> Tuple[bool, Optional[int]]:
+    """Interpreta el encabezado If-Match de la petición Flask actual (ver parse_if_match_version)."""
+    return parse_if_match_version(request.if_match, user_id)
+
+def parse_if_match_version(if_match, user_id: int) -> Tuple[bool, Optional[int]]:
+    """
+    Interpreta un encabezado If-Match (texto o ETags ya parseados) para el perfil dado.
+    Retorna (hay_precondicion, version_esperada); con 'If-Match: *' o sin encabezado no hay versión.
+    Una precondición que no nombra una versión de este perfil devuelve (True, -1), que nunca coincide.
+    El ETag de una representación parcial (sufijo '-p...') o de otra codificación ('-gzip',
+    '-msgpack'...) vale igual: nombra la misma versión.
+    If-Match exige comparación fuerte: los ETags débiles (W/"...") nunca coinciden.
+    """
+    if not isinstance(if_match, ETags):
+        if_match = parse_etags(if_match)
+    if not if_match:
+        return False, None
+    if if_match.star_tag:
+        return False, None
+    prefix = f"u{user_id}-v"
+    for tag in if_match.as_set():
+        version = strip_representation(tag)[len(prefix):].split('-p', 1)[0]
+        if tag.startswith(prefix) and version.isdigit():
+            return True, int(version)
+    return True, -1
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Indica si el texto de un encabezado If-None-Match incluye el ETag dado (servidor ASGI)."""
+    return bool(if_none_match) and _matching_tag(parse_etags(if_none_match), etag) is not None
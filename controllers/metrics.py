@@ -0,0 +1,57 @@
+import hmac
+import logging
+import time
+from flask import Blueprint, Response, abort, g, request
+
+from config.metrics import METRICS_TOKEN
+from services.metrics import REGISTRY, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+metrics_bp = Blueprint('metrics_bp', __name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    GET /metrics - Métricas en formato de texto de Prometheus (de todos los workers con METRICS_MULTIPROC_DIR).
+    Requiere 'Authorization: Bearer <METRICS_TOKEN>'; sin METRICS_TOKEN configurado responde 404.
+    """
+    if not METRICS_TOKEN:
+        abort(404)
+    expected = f'Bearer {METRICS_TOKEN}'.encode('utf-8')
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode('utf-8'), expected):
+        logger.warning("Lectura de /metrics sin un token válido")
+        return Response('Token de métricas inválido\n', status=401, content_type=PROMETHEUS_CONTENT_TYPE,
+                        headers={'WWW-Authenticate': 'Bearer'})
+    return Response(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+def init_request_metrics(app):
+    """
+    Mide cada petición: peticiones en curso por blueprint y latencia por blueprint,
+    ruta, método y estado. En las respuestas en streaming (export) se mide hasta que
+    la vista entrega la respuesta, no hasta el último byte.
+    """
+    @app.before_request
+    def _start_request_timer():
+        REGISTRY.start_flusher()
+        g.metrics_start = time.perf_counter()
+        g.metrics_blueprint = request.blueprint or 'app'
+        HTTP_REQUESTS_IN_FLIGHT.inc(g.metrics_blueprint)
+
+    @app.after_request
+    def _record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _observe_request(exception):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        blueprint = g.pop('metrics_blueprint')
+        status = g.pop('metrics_status', 500)
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        HTTP_REQUESTS_IN_FLIGHT.dec(blueprint)
+        HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, blueprint, route, request.method, status)
@@ -0,0 +1,32 @@
+from typing import Mapping, Optional, Tuple
+from flask import request
+
+from config.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+
+def parse_page_params(args: Optional[Mapping[str, str]] = None) -> Tuple[int, Optional[int]]:
+    """
+    Lee '?limit=' y '?after=' de la petición actual (o de 'args') para la paginación por cursor.
+    Lanza ValueError con un mensaje apto para el cliente si los valores no son válidos.
+    """
+    if args is None:
+        args = request.args
+    raw_limit = args.get('limit')
+    raw_after = args.get('after')
+
+    try:
+        limit = int(raw_limit) if raw_limit is not None else DEFAULT_PAGE_SIZE
+    except ValueError:
+        raise ValueError("El parámetro 'limit' debe ser un entero.")
+    if limit < 1:
+        raise ValueError("El parámetro 'limit' debe ser mayor que 0.")
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    after = None
+    if raw_after:
+        try:
+            after = int(raw_after)
+        except ValueError:
+            raise ValueError("El parámetro 'after' debe ser un cursor válido (ID entero).")
+
+    return limit, after
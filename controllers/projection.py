@@ -0,0 +1,14 @@
+from typing import Mapping, Optional
+from flask import request
+
+from services.projection import Projection, parse_projection
+
+
+def parse_projection_params(args: Optional[Mapping[str, str]] = None) -> Projection:
+    """
+    Lee '?fields=' y '?expand=' de la petición actual (o de 'args') para proyectar los perfiles.
+    Lanza ValueError con un mensaje apto para el cliente si nombran columnas o relaciones desconocidas.
+    """
+    if args is None:
+        args = request.args
+    return parse_projection(args.get('fields'), args.get('expand'))
@@ -1,13 +1,17 @@
 import logging
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import create_access_token, jwt_required
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from flask_jwt_extended.exceptions import NoAuthorizationError
+from sqlalchemy.exc import IntegrityError
 
 # Importaciones de tu arquitectura
 from services.user_services import UsersService
-from config.database import get_db_session # Necesitas importar esta función
+from services.password_hasher import HashingQueueFull, get_password_hasher
+from config.database import get_request_session # Sesión compartida por toda la petición
+from controllers.pagination import parse_page_params
+from controllers.etags import not_modified_response, page_etag
+from config.logging_config import SAMPLED
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # 1. Definición del Blueprint
@@ -16,10 +20,10 @@ users_bp = Blueprint('users', __name__)
 # --- Funciones de Utilidad de Servicio por Petición ---
 def get_user_service():
     """
-    Proporciona una instancia de UsersService con una sesión de DB fresca.
-    Esto asegura que cada petición HTTP use su propia sesión.
+    Proporciona una instancia de UsersService con la sesión de DB de la petición.
+    Cada petición HTTP usa su propia sesión, que se cierra al terminar (init_db_session).
     """
-    db_session = get_db_session()
+    db_session = get_request_session()
     return UsersService(db_session)
 
 # --- Manejador de Errores JWT ---
@@ -33,6 +37,15 @@ def register_jwt_error_handlers(app):
         logger.warning("Intento de acceso a ruta protegida sin autenticación JWT")
         return jsonify({'error': 'No autenticado. Debe enviar un token JWT válido en el encabezado Authorization.'}), 401
 
+# --- Saturación del Pool de bcrypt ---
+@users_bp.errorhandler(HashingQueueFull)
+def handle_hashing_queue_full(e):
+    """Rechaza rápido con 503 cuando el pool de hashing de contraseñas no admite más trabajo."""
+    logger.warning("Petición rechazada: pool de bcrypt saturado")
+    response = jsonify({'error': 'Servicio de autenticación saturado, intente de nuevo en unos segundos.'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 # --- Rutas de Autenticación ---
 
 @users_bp.route('/register', methods=['POST'])
@@ -56,12 +69,14 @@ def register():
     # Llama al servicio que hashea y crea el usuario
     try:
         user = service.create_user(username, password, nombre_biciusuario)
+    except HashingQueueFull:
+        raise
     except Exception as e:
-        logger.error(f"Error al crear usuario: {e}")
+        logger.error("Error al crear usuario: %s", e)
         # Manejo simple para el caso de username duplicado
         return jsonify({'error': 'No se pudo crear el usuario. El nombre de usuario podría ya existir.'}), 409
 
-    logger.info(f"Usuario y perfil de biciusuario creados: {username}")
+    logger.info("Usuario y perfil de biciusuario creados: %s", username)
     return jsonify({'id': user.id, 'username': user.username, 'nombre_biciusuario': user.nombre_biciusuario}), 201
 
 
@@ -87,12 +102,18 @@ def login():
     if user:
         # Genera el token de acceso, usando el ID del usuario como identidad
         access_token = create_access_token(identity=str(user.id))
-        logger.info(f"Usuario autenticado y token generado: {username}")
+        logger.info("Usuario autenticado y token generado: %s", username, extra=SAMPLED)
         return jsonify({'access_token': access_token}), 200
     
-    logger.warning(f"Login fallido para usuario: {username}")
+    logger.warning("Login fallido para usuario: %s", username)
     return jsonify({'error': 'Credenciales inválidas'}), 401
 
+@users_bp.route('/hashing/stats', methods=['GET'])
+@jwt_required()
+def get_hashing_stats():
+    """GET /auth/hashing/stats - Tamaño del pool de bcrypt y métricas de su cola (Ruta Protegida)."""
+    return jsonify(get_password_hasher().stats()), 200
+
 # --- Rutas CRUD Protegidas ---
 
 # Las rutas de GET, PUT y DELETE del perfil de usuario
@@ -101,12 +122,29 @@ def login():
 @users_bp.route('/users', methods=['GET'])
 @jwt_required()
 def get_users():
-    """GET /auth/users - Recupera todos los usuarios (Ruta Protegida)."""
+    """GET /auth/users?limit=&after= - Recupera una página de usuarios (Ruta Protegida)."""
+    try:
+        limit, after = parse_page_params()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     service = get_user_service()
-    users = service.get_all_users()
-    logger.info("Consulta de todos los usuarios")
-    # Aseguramos que solo mostramos datos públicos
-    return jsonify([{'id': u.id, 'username': u.username, 'nombre_biciusuario': u.nombre_biciusuario} for u in users]), 200
+
+    # ETag a partir de (id, version) de la página: si el cliente ya la tiene, 304 sin serializar
+    etag = page_etag(service.get_users_page_versions(limit, after), variant='users')
+    not_modified = not_modified_response(etag)
+    if not_modified is not None:
+        return not_modified
+
+    # El servicio solo lee datos públicos (id, username, nombre_biciusuario)
+    users, next_cursor = service.get_users_page(limit, after)
+    logger.info("Consulta de usuarios paginada", extra=SAMPLED)
+    response = jsonify({
+        'items': users,
+        'next_cursor': next_cursor
+    })
+    response.set_etag(etag)
+    return response, 200
 
 @users_bp.route('/users/<int:user_id>', methods=['GET'])
 @jwt_required()
@@ -115,15 +153,23 @@ def get_user(user_id):
     service = get_user_service()
     user = service.get_user_by_id(user_id)
     if user:
-        logger.info(f"Consulta de usuario por ID: {user_id}")
+        logger.info("Consulta de usuario por ID: %s", user_id, extra=SAMPLED)
         return jsonify({'id': user.id, 'username': user.username, 'nombre_biciusuario': user.nombre_biciusuario}), 200
-    logger.warning(f"Usuario no encontrado: {user_id}")
+    logger.warning("Usuario no encontrado: %s", user_id)
     return jsonify({'error': 'Usuario no encontrado'}), 404
 
 @users_bp.route('/users/<int:user_id>', methods=['PUT'])
 @jwt_required()
 def update_user(user_id):
-    """PUT /auth/users/<user_id> - Actualiza un usuario (Ruta Protegida)."""
+    """
+    PUT /auth/users/<user_id> - Actualiza un usuario (Ruta Protegida).
+    CRÍTICO: Solo permite actualizar el propio usuario.
+    """
+    current_user_id = get_jwt_identity()
+    if str(user_id) != current_user_id:
+        logger.warning("Intento de actualizar usuario ajeno. Token ID: %s, Target ID: %s", current_user_id, user_id)
+        return jsonify({'error': 'No tienes permiso para modificar este usuario.'}), 403
+
     data = request.get_json()
     username = data.get('username')
     password = data.get('password')
@@ -132,23 +178,35 @@ def update_user(user_id):
     service = get_user_service()
     
     # El servicio se encarga de hashear la contraseña si se proporciona
-    user = service.update_user(user_id, username, password, nombre_biciusuario)
+    try:
+        user = service.update_user(user_id, username, password, nombre_biciusuario)
+    except IntegrityError as e:
+        logger.error("Error al actualizar usuario %s: %s", user_id, e)
+        return jsonify({'error': 'No se pudo actualizar el usuario. El nombre de usuario podría ya existir.'}), 409
     
     if user:
-        logger.info(f"Usuario actualizado: {user_id}")
+        logger.info("Usuario actualizado: %s", user_id)
         return jsonify({'id': user.id, 'username': user.username, 'nombre_biciusuario': user.nombre_biciusuario}), 200
-    logger.warning(f"Usuario no encontrado para actualizar: {user_id}")
+    logger.warning("Usuario no encontrado para actualizar: %s", user_id)
     return jsonify({'error': 'Usuario no encontrado'}), 404
 
 @users_bp.route('/users/<int:user_id>', methods=['DELETE'])
 @jwt_required()
 def delete_user(user_id):
-    """DELETE /auth/users/<user_id> - Elimina un usuario (Ruta Protegida)."""
+    """
+    DELETE /auth/users/<user_id> - Elimina un usuario (Ruta Protegida).
+    CRÍTICO: Solo permite eliminar el propio usuario.
+    """
+    current_user_id = get_jwt_identity()
+    if str(user_id) != current_user_id:
+        logger.warning("Intento de eliminar usuario ajeno. Token ID: %s, Target ID: %s", current_user_id, user_id)
+        return jsonify({'error': 'No tienes permiso para eliminar este usuario.'}), 403
+
     service = get_user_service()
     
     user_deleted = service.delete_user(user_id)
     if user_deleted:
-        logger.info(f"Usuario eliminado: {user_id}")
+        logger.info("Usuario eliminado: %s", user_id)
         return jsonify({'message': 'Usuario eliminado correctamente'}), 200
-    logger.warning(f"Usuario no encontrado para eliminar: {user_id}")
+    logger.warning("Usuario no encontrado para eliminar: %s", user_id)
     return jsonify({'error': 'Usuario no encontrado'}), 404
\ No newline at end of file
@@ -0,0 +1,75 @@
+# gunicorn.conf.py
+#
+# Servidor de producción (reemplaza a app.run(debug=True) de src/app.py):
+#   gunicorn -c gunicorn.conf.py src.app:app
+# Variante ASGI (src/asgi.py), un bucle de eventos por worker:
+#   gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker src.asgi:app
+# Los valores se ajustan con las variables SERVER_* (config/server.py).
+
+from config.server import (
+    SERVER_BIND, SERVER_WORKERS, SERVER_THREADS, SERVER_MAX_REQUESTS,
+    SERVER_MAX_REQUESTS_JITTER, SERVER_GRACEFUL_TIMEOUT, SERVER_TIMEOUT
+)
+
+import os
+import tempfile
+
+# La caché de perfiles 'memory' es propia de cada proceso: con varios workers, una escritura
+# solo invalida la copia del worker que la atendió. Salvo que se elija otro backend,
+# se usa el de SQLite, compartido por todos los workers (se lee al cargar la aplicación).
+if SERVER_WORKERS > 1:
+    os.environ.setdefault('PROFILE_CACHE_BACKEND', 'sqlite')
+    # Igual con las métricas: cada worker vuelca las suyas en este directorio y GET /metrics
+    # suma las de todos, atienda la lectura el worker que la atienda.
+    os.environ.setdefault('METRICS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'biciusuarios-metrics'))
+
+bind = SERVER_BIND
+workers = SERVER_WORKERS
+threads = SERVER_THREADS
+worker_class = 'gthread'
+
+# La aplicación (y el motor de base de datos) se carga una sola vez en el maestro
+# antes del fork: los workers arrancan rápido y comparten la memoria de solo lectura.
+preload_app = True
+
+# Reciclado de workers para acotar el crecimiento de memoria
+max_requests = SERVER_MAX_REQUESTS
+max_requests_jitter = SERVER_MAX_REQUESTS_JITTER
+
+# SIGTERM al maestro: deja de aceptar conexiones y espera a que los workers
+# terminen sus peticiones en curso durante graceful_timeout segundos.
+graceful_timeout = SERVER_GRACEFUL_TIMEOUT
+timeout = SERVER_TIMEOUT
+
+def on_starting(server):
+    """Descarta las métricas que dejó en METRICS_MULTIPROC_DIR una ejecución anterior."""
+    from services.metrics import REGISTRY
+    REGISTRY.clear_snapshots()
+
+def post_fork(server, worker):
+    """
+    Si el maestro llegó a crear el motor, el worker hereda su pool de conexiones. Se descarta
+    sin cerrar las conexiones (siguen siendo del maestro) para que el worker abra las suyas.
+    """
+    from config.database import dispose_engine_after_fork
+    dispose_engine_after_fork()
+    server.log.info(f"Worker {worker.pid} listo con un pool de conexiones propio")
+
+def worker_int(worker):
+    worker.log.info(f"Worker {worker.pid} interrumpido")
+
+def worker_exit(server, worker):
+    """
+    Cierra las conexiones del worker al salir (apagado ordenado o reciclado) y vuelca
+    por última vez sus métricas.
+    """
+    from config.database import dispose_engine
+    from services.metrics import REGISTRY
+    dispose_engine()
+    REGISTRY.close()
+    server.log.info(f"Worker {worker.pid} finalizado")
+
+def child_exit(server, worker):
+    """En el maestro: acumula las métricas del worker terminado (también si murió) en archive.json."""
+    from services.metrics import REGISTRY
+    REGISTRY.archive_snapshot(worker.pid)
@@ -1,10 +1,35 @@
 import bcrypt
-from sqlalchemy import Column, Integer, String, ForeignKey
+from config.security import BCRYPT_ROUNDS
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship, declarative_base
 
 # CRUCIAL: Definición de la Base Declarativa
 Base = declarative_base()
 
+# --- Funciones de hashing (bcrypt) ---
+# Son costosas en CPU: los servicios las ejecutan a través de PasswordHasher
+# (services/password_hasher.py) para no bloquear el hilo de la petición.
+
+def hash_password(password, rounds=None):
+    """Genera el hash bcrypt de una contraseña con el coste configurado (o 'rounds')."""
+    return bcrypt.hashpw(
+        password.encode('utf-8'), bcrypt.gensalt(rounds or BCRYPT_ROUNDS)
+    ).decode('utf-8')
+
+def verify_password(password, password_hash):
+    """Verifica una contraseña contra su hash bcrypt."""
+    return bcrypt.checkpw(
+        password.encode('utf-8'), password_hash.encode('utf-8')
+    )
+
+def get_hash_rounds(password_hash):
+    """Lee el coste registrado en el propio hash ('$2b$<coste>$<sal+hash>')."""
+    return int(password_hash.split('$')[2])
+
+def needs_rehash(password_hash, rounds=None):
+    """Indica si el hash se generó con un coste distinto del configurado."""
+    return get_hash_rounds(password_hash) != (rounds or BCRYPT_ROUNDS)
+
 # ----------------------------------------------------
 # 1. MODELO PRINCIPAL: User
 # ----------------------------------------------------
@@ -20,6 +45,9 @@ class User(Base):
     username = Column(String(50), unique=True, index=True, nullable=False)
     password_hash = Column(String(255), nullable=False) 
     nombre_biciusuario = Column(String(255), nullable=False)
+    # Versión del perfil: se incrementa con cada cambio del usuario o de sus bicicletas/registros.
+    # Sirve de ETag para GET condicionales y de control de concurrencia optimista en PUT (If-Match).
+    version = Column(Integer, nullable=False, default=1, server_default='1')
 
     # Relaciones. Usamos 'back_populates' para una relación bidireccional más clara.
     # Las referencias son a las CLASES definidas en este mismo archivo.
@@ -35,22 +63,28 @@ class User(Base):
         cascade='all, delete-orphan'
     )
 
-    def __init__(self, username, password, nombre_biciusuario):
+    def __init__(self, username, password=None, nombre_biciusuario=None, password_hash=None):
+        """
+        Acepta la contraseña en claro (se hashea aquí mismo) o un 'password_hash'
+        ya calculado, por ejemplo por el pool de hashing de los servicios.
+        """
         self.username = username
-        self.set_password(password)
+        if password_hash is not None:
+            self.password_hash = password_hash
+        else:
+            self.set_password(password)
         self.nombre_biciusuario = nombre_biciusuario
 
     def set_password(self, password):
         """Hashea y almacena la contraseña."""
-        self.password_hash = bcrypt.hashpw(
-            password.encode('utf-8'), bcrypt.gensalt()
-        ).decode('utf-8')
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        """Verifica la contraseña hasheada."""
-        return bcrypt.checkpw(
-            password.encode('utf-8'), self.password_hash.encode('utf-8')
-        )
+        """
+        Verifica la contraseña hasheada, sin modificar el usuario. Es bcrypt en el hilo que llama:
+        el login usa PasswordHasher, que además regenera los hashes con un coste desactualizado.
+        """
+        return verify_password(password, self.password_hash)
     
     # ... (métodos __repr__)
 
@@ -66,7 +100,8 @@ class RegistroBiciusuario(Base):
     id = Column(Integer, primary_key=True, index=True)
     nombre_biciusuario = Column(String(255), nullable=False)
     serial = Column(String(50), unique=True)
-    biciusuario_id = Column(Integer, ForeignKey('users.id')) 
+    # Indexada: la carga de User.registros filtra por esta columna
+    biciusuario_id = Column(Integer, ForeignKey('users.id'), index=True) 
 
     # Definición de la relación inversa
     biciusuario = relationship('User', back_populates='registros')
@@ -81,9 +116,17 @@ class RegistroBiciusuario(Base):
 class Bicicleta(Base):
     """Modelo para las bicicletas registradas."""
     __tablename__ = 'bicicletas'
+    # Índices compuestos para la búsqueda por marca/modelo/color (GET /biciusuarios/bicicletas/search)
+    __table_args__ = (
+        Index('ix_bicicletas_marca_modelo_color', 'marca', 'modelo', 'color'),
+        Index('ix_bicicletas_marca_color', 'marca', 'color'),
+        Index('ix_bicicletas_modelo_color', 'modelo', 'color'),
+        Index('ix_bicicletas_color', 'color'),
+    )
 
     id = Column(Integer, primary_key=True)
-    biciusuario_id = Column(Integer, ForeignKey('users.id')) 
+    # Indexada: la carga de User.bicicletas filtra por esta columna
+    biciusuario_id = Column(Integer, ForeignKey('users.id'), index=True) 
     marca = Column(String(100))
     modelo = Column(String(100))
     color = Column(String(50))
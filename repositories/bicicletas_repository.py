@@ -0,0 +1,140 @@
+import logging
+logger = logging.getLogger(__name__)
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import case, column, func, insert, literal_column, select, table
+from sqlalchemy.orm import Session
+# Importamos los modelos de tu API
+from models.users_model import Bicicleta, User
+from config.logging_config import SAMPLED
+from config.search import USERS_FTS_TABLE, fts_prefix_query, users_fts_available
+from repositories.upserts import chunked, dialect_insert
+
+# Tabla virtual FTS5 (config/search.py): su 'rowid' es el users.id del nombre indexado
+users_fts = table(USERS_FTS_TABLE, column('rowid'))
+
+class BicicletasRepository:
+    """
+    Repositorio para la gestión de bicicletas en la base de datos.
+    Ofrece operaciones por lotes (set-based) pensadas para la ingesta masiva.
+    """
+
+    def __init__(self, db_session: Session):
+        """Inicializa el repositorio con la sesión de base de datos."""
+        self.db = db_session
+
+    def get_existing_serials(self, serials: Iterable[str]) -> Set[str]:
+        """Retorna, de entre los seriales dados, los que ya están registrados (una sola consulta)."""
+        serials = list(serials)
+        if not serials:
+            return set()
+        stmt = select(Bicicleta.serial).where(Bicicleta.serial.in_(serials))
+        return set(self.db.scalars(stmt))
+
+    def bulk_insert(self, rows: List[dict]) -> int:
+        """
+        Inserta varias bicicletas con una única sentencia INSERT (executemany de Core),
+        sin construir objetos ORM. Retorna el número de filas insertadas.
+        """
+        if not rows:
+            return 0
+        logger.info("Insertando %s bicicletas en bloque", len(rows))
+        self.db.execute(insert(Bicicleta.__table__), rows)
+        return len(rows)
+
+    def get_owners_by_serials(self, serials: List[str]) -> Dict[str, int]:
+        """Retorna {serial: biciusuario_id} de los seriales dados que ya existen (una sola consulta)."""
+        stmt = select(Bicicleta.serial, Bicicleta.biciusuario_id).where(Bicicleta.serial.in_(serials))
+        return {row.serial: row.biciusuario_id for row in self.db.execute(stmt)}
+
+    def upsert_for_owner(self, user_id: int, bicicletas: List[dict]) -> Dict[str, str]:
+        """
+        Crea o actualiza las bicicletas de un usuario por serial, con un INSERT por lote.
+        Los campos omitidos o nulos conservan su valor. Un serial de otro usuario no se toca.
+        Retorna {serial: 'creada' | 'actualizada' | 'conflicto'}.
+        """
+        rows = {}
+        for bici_data in bicicletas:
+            serial = bici_data.get('serial')
+            if serial:
+                rows[serial] = {'serial': serial, 'biciusuario_id': user_id, 'marca': bici_data.get('marca'),
+                                'modelo': bici_data.get('modelo'), 'color': bici_data.get('color')}
+
+        results = {}
+        for chunk in chunked(list(rows.values())):
+            owners = self.get_owners_by_serials([row['serial'] for row in chunk])
+            accepted = []
+            for row in chunk:
+                owner = owners.get(row['serial'])
+                if owner is not None and owner != user_id:
+                    results[row['serial']] = 'conflicto'
+                    continue
+                results[row['serial']] = 'creada' if owner is None else 'actualizada'
+                accepted.append(row)
+            if accepted:
+                self.db.execute(self._upsert_statement(accepted))
+        logger.info("Upsert de %s bicicletas del usuario %s", len(rows), user_id)
+        return results
+
+    def _upsert_statement(self, rows: List[dict]):
+        """
+        INSERT de varias filas que, ante un serial existente, actualiza marca/modelo/color
+        solo si la bicicleta ya es del mismo usuario (protege frente a carreras con otro dueño).
+        """
+        bicicletas = Bicicleta.__table__
+        stmt, dialect = dialect_insert(self.db, bicicletas)
+        stmt = stmt.values(rows)
+        columns = ('marca', 'modelo', 'color')
+        if dialect == 'mysql':
+            same_owner = bicicletas.c.biciusuario_id == stmt.inserted.biciusuario_id
+            return stmt.on_duplicate_key_update({
+                name: case((same_owner, func.coalesce(stmt.inserted[name], bicicletas.c[name])),
+                           else_=bicicletas.c[name])
+                for name in columns
+            })
+        return stmt.on_conflict_do_update(
+            index_elements=[bicicletas.c.serial],
+            set_={name: func.coalesce(stmt.excluded[name], bicicletas.c[name]) for name in columns},
+            where=bicicletas.c.biciusuario_id == stmt.excluded.biciusuario_id
+        )
+
+    def search(self, limit: int, after: Optional[int] = None, serial: Optional[str] = None,
+               marca: Optional[str] = None, modelo: Optional[str] = None, color: Optional[str] = None,
+               nombre: Optional[str] = None) -> Tuple[List[dict], Optional[int]]:
+        """
+        Busca bicicletas con su propietario, paginando por cursor sobre Bicicleta.id.
+        'serial' usa el índice único; marca/modelo/color, los índices compuestos (coincidencia exacta);
+        'nombre' busca por prefijo de palabra en FTS5 o, si no está disponible, por prefijo con LIKE.
+        """
+        logger.info("Búsqueda de bicicletas: limit=%s, after=%s", limit, after, extra=SAMPLED)
+        stmt = (
+            select(Bicicleta.id, Bicicleta.serial, Bicicleta.marca, Bicicleta.modelo, Bicicleta.color,
+                   Bicicleta.biciusuario_id, User.nombre_biciusuario)
+            .join(User, User.id == Bicicleta.biciusuario_id)
+        )
+        if serial is not None:
+            stmt = stmt.where(Bicicleta.serial == serial)
+        if marca is not None:
+            stmt = stmt.where(Bicicleta.marca == marca)
+        if modelo is not None:
+            stmt = stmt.where(Bicicleta.modelo == modelo)
+        if color is not None:
+            stmt = stmt.where(Bicicleta.color == color)
+        if nombre is not None:
+            if users_fts_available(self.db):
+                owners = select(users_fts.c.rowid).where(
+                    literal_column(USERS_FTS_TABLE).op('MATCH')(fts_prefix_query(nombre)))
+                stmt = stmt.where(Bicicleta.biciusuario_id.in_(owners))
+            else:
+                escaped = nombre.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                stmt = stmt.where(User.nombre_biciusuario.like(f'{escaped}%', escape='\\'))
+        if after is not None:
+            stmt = stmt.where(Bicicleta.id > after)
+
+        # Un registro extra indica si existe una página siguiente
+        rows = [dict(row) for row in self.db.execute(stmt.order_by(Bicicleta.id).limit(limit + 1)).mappings()]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = rows[-1]['id']
+        return rows, next_cursor
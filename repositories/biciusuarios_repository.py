@@ -1,10 +1,13 @@
 import logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 # Importamos los modelos de tu API
 from models.users_model import RegistroBiciusuario 
+from config.logging_config import SAMPLED
+from repositories.upserts import chunked, dialect_insert
 
 class RegistroBiciusuarioRepository:
     """
@@ -16,14 +19,27 @@ class RegistroBiciusuarioRepository:
         """Inicializa el repositorio con la sesión de base de datos."""
         self.db = db_session
 
-    def get_all_registros(self):
-        """Recupera todos los registros de biciusuarios."""
-        logger.info("Obteniendo todos los registros de biciusuarios desde el repositorio")
-        return self.db.query(RegistroBiciusuario).all()
+    def get_registros_page(self, limit: int, after: Optional[int] = None) -> Tuple[List[RegistroBiciusuario], Optional[int]]:
+        """
+        Obtiene una página de registros ordenada por ID (paginación por cursor, como get_users_page).
+        Retorna la lista de registros y el cursor de la siguiente página (None si no hay más).
+        """
+        logger.info("Obteniendo página de registros: limit=%s, after=%s", limit, after, extra=SAMPLED)
+        query = self.db.query(RegistroBiciusuario)
+        if after is not None:
+            query = query.filter(RegistroBiciusuario.id > after)
+        # Pedimos un registro extra para saber si existe una página siguiente
+        registros = query.order_by(RegistroBiciusuario.id).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(registros) > limit:
+            registros = registros[:limit]
+            next_cursor = registros[-1].id
+        return registros, next_cursor
 
     def get_registro_by_id(self, registro_id: int):
         """Busca y retorna un registro específico por su ID."""
-        logger.info(f"Buscando registro por ID: {registro_id}")
+        logger.info("Buscando registro por ID: %s", registro_id, extra=SAMPLED)
         return self.db.query(RegistroBiciusuario).filter(RegistroBiciusuario.id == registro_id).first()
     
     def create_registro(self, data: dict):
@@ -31,7 +47,7 @@ class RegistroBiciusuarioRepository:
         Crea y almacena un nuevo registro de biciusuario.
         Se espera que 'data' contenga los campos necesarios.
         """
-        logger.info(f"Creando nuevo registro para: {data.get('nombre_biciusuario')}")
+        logger.info("Creando nuevo registro para: %s", data.get('nombre_biciusuario'))
         
         # Asumimos que los datos del diccionario 'data' coinciden con los campos del modelo
         new_registro = RegistroBiciusuario(
@@ -41,8 +57,8 @@ class RegistroBiciusuarioRepository:
         )
         
         self.db.add(new_registro)
-        self.db.commit()
-        self.db.refresh(new_registro)
+        # flush asigna el ID; la confirmación la hace la unidad de trabajo de la petición
+        self.db.flush()
         return new_registro
 
     def update_registro(self, registro_id: int, data: dict):
@@ -51,7 +67,7 @@ class RegistroBiciusuarioRepository:
         """
         registro = self.get_registro_by_id(registro_id)
         if registro:
-            logger.info(f"Actualizando registro ID: {registro_id}")
+            logger.info("Actualizando registro ID: %s", registro_id)
             
             # Actualiza solo los campos presentes en el diccionario 'data'
             if 'nombre_biciusuario' in data:
@@ -61,19 +77,73 @@ class RegistroBiciusuarioRepository:
             if 'biciusuario_id' in data:
                 registro.biciusuario_id = data['biciusuario_id']
 
-            self.db.commit()
-            self.db.refresh(registro)
+            self.db.flush()
         else:
-            logger.warning(f"Registro no encontrado para actualizar: {registro_id}")
+            logger.warning("Registro no encontrado para actualizar: %s", registro_id)
         return registro
 
     def delete_registro(self, registro_id: int):
         """Elimina un registro de la base de datos según su ID."""
         registro = self.get_registro_by_id(registro_id)
         if registro:
-            logger.info(f"Eliminando registro: {registro_id}")
+            logger.info("Eliminando registro: %s", registro_id)
             self.db.delete(registro)
-            self.db.commit()
+            self.db.flush()
         else:
-            logger.warning(f"Registro no encontrado para eliminar: {registro_id}")
+            logger.warning("Registro no encontrado para eliminar: %s", registro_id)
         return registro
+
+    def get_existing_serials(self, serials: Iterable[str]) -> Set[str]:
+        """Retorna, de entre los seriales dados, los que ya tienen registro (una sola consulta)."""
+        serials = list(serials)
+        if not serials:
+            return set()
+        stmt = select(RegistroBiciusuario.serial).where(RegistroBiciusuario.serial.in_(serials))
+        return set(self.db.scalars(stmt))
+
+    def bulk_insert(self, rows: List[dict]) -> int:
+        """
+        Inserta varios registros con una única sentencia INSERT (executemany de Core),
+        sin construir objetos ORM. Retorna el número de filas insertadas.
+        """
+        if not rows:
+            return 0
+        logger.info("Insertando %s registros en bloque", len(rows))
+        self.db.execute(insert(RegistroBiciusuario.__table__), rows)
+        return len(rows)
+
+    def insert_missing_for_owner(self, user_id: int, nombre_biciusuario: str, registros: List[dict]) -> Dict[str, str]:
+        """
+        Agrega a un usuario los registros cuyo serial aún no existe, con un INSERT por lote.
+        Retorna {serial: 'creado' | 'existente' | 'conflicto'} ('conflicto': el serial es de otro usuario).
+        """
+        serials = list(dict.fromkeys(r.get('serial') for r in registros if r.get('serial')))
+        results = {}
+        for chunk in chunked(serials):
+            stmt = select(RegistroBiciusuario.serial, RegistroBiciusuario.biciusuario_id).where(
+                RegistroBiciusuario.serial.in_(chunk))
+            owners = {row.serial: row.biciusuario_id for row in self.db.execute(stmt)}
+            new_rows = []
+            for serial in chunk:
+                owner = owners.get(serial)
+                if owner is None:
+                    results[serial] = 'creado'
+                    new_rows.append({'serial': serial, 'biciusuario_id': user_id,
+                                     'nombre_biciusuario': nombre_biciusuario})
+                else:
+                    results[serial] = 'existente' if owner == user_id else 'conflicto'
+            if new_rows:
+                self.db.execute(self._insert_missing_statement(new_rows))
+        logger.info("Alta de %s registros nuevos del usuario %s",
+                    sum(1 for r in results.values() if r == 'creado'), user_id)
+        return results
+
+    def _insert_missing_statement(self, rows: List[dict]):
+        """INSERT de varias filas que ignora los seriales insertados entretanto por otra petición."""
+        registros = RegistroBiciusuario.__table__
+        stmt, dialect = dialect_insert(self.db, registros)
+        stmt = stmt.values(rows)
+        if dialect == 'mysql':
+            # Actualización vacía (id = id): no toca la fila existente
+            return stmt.on_duplicate_key_update(id=registros.c.id)
+        return stmt.on_conflict_do_nothing(index_elements=[registros.c.serial])
@@ -0,0 +1,109 @@
+import logging
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.users_model import User, Bicicleta, RegistroBiciusuario
+from config.logging_config import SAMPLED
+
+logger = logging.getLogger(__name__)
+
+# --- Modelo de Lectura de Perfiles (SQLAlchemy Core) ---
+# Los listados de solo lectura no necesitan objetos User: leen tuplas con select() sobre las
+# tablas y arman los diccionarios directamente, sin identity map ni colecciones del ORM.
+# La forma de cada perfil es la misma que produce BiciusuariosService._to_dict.
+
+users_table = User.__table__
+bicicletas_table = Bicicleta.__table__
+registros_table = RegistroBiciusuario.__table__
+
+# Columnas públicas de users, en el orden en que se serializan (password_hash nunca se lee)
+PUBLIC_USER_COLUMNS = ('id', 'username', 'nombre_biciusuario')
+
+# Columnas de cada relación en el orden de _to_dict, y su tabla
+RELATION_COLUMNS = {
+    'bicicletas': (bicicletas_table, ('id', 'marca', 'modelo', 'color', 'serial')),
+    'registros': (registros_table, ('id', 'serial')),
+}
+
+
+def users_page_statement(limit: int, after: Optional[int], columns: Sequence[str]):
+    """Página de users por cursor (una fila extra para saber si hay siguiente), solo con 'columns'."""
+    stmt = select(*(users_table.c[name] for name in columns)).order_by(users_table.c.id).limit(limit + 1)
+    if after is not None:
+        stmt = stmt.where(users_table.c.id > after)
+    return stmt
+
+def relation_statement(relation: str, user_ids: List[int]):
+    """
+    Filas de una relación para todos los usuarios de la página en una sola consulta agrupada,
+    ordenadas por dueño e ID (el índice de biciusuario_id ya las entrega en ese orden).
+    """
+    table, columns = RELATION_COLUMNS[relation]
+    owner = table.c.biciusuario_id
+    return (select(owner, *(table.c[name] for name in columns))
+            .where(owner.in_(user_ids))
+            .order_by(owner, table.c.id))
+
+def split_page(rows: list, limit: int) -> Tuple[list, Optional[int]]:
+    """Recorta la fila extra y calcula 'next_cursor' (ID de la última fila de la página)."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1][0]
+    return rows, None
+
+def assemble_profiles(rows: list, columns: Sequence[str],
+                      relation_rows: Dict[str, list]) -> List[dict]:
+    """
+    Arma los perfiles a partir de las tuplas de users (la primera columna es 'id') y de las de
+    cada relación (la primera columna es el dueño). Las relaciones pedidas sin filas quedan en [].
+    """
+    profiles = []
+    by_id = {}
+    for row in rows:
+        profile = dict(zip(columns, row))
+        for relation in relation_rows:
+            profile[relation] = []
+        profiles.append(profile)
+        by_id[row[0]] = profile
+    for relation, child_rows in relation_rows.items():
+        names = RELATION_COLUMNS[relation][1]
+        for child in child_rows:
+            by_id[child[0]][relation].append(dict(zip(names, child[1:])))
+    return profiles
+
+
+class ProfilesReadModel:
+    """
+    Consultas de solo lectura de perfiles con SQLAlchemy Core para los listados paginados.
+    Una consulta por página de usuarios y una consulta agrupada por cada relación pedida.
+    """
+
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    def _rows(self, stmt) -> list:
+        return self.db.execute(stmt).all()
+
+    def get_profiles_page(self, limit: int, after: Optional[int] = None,
+                          columns: Sequence[str] = PUBLIC_USER_COLUMNS,
+                          relations: Sequence[str] = tuple(RELATION_COLUMNS)) -> Tuple[List[dict], Optional[int]]:
+        """
+        Página de perfiles ya serializados ('columns' de users más las 'relations' pedidas)
+        y su 'next_cursor'. 'columns' debe empezar por 'id'.
+        """
+        logger.info("Leyendo página de perfiles: limit=%s, after=%s", limit, after, extra=SAMPLED)
+        rows, next_cursor = split_page(self._rows(users_page_statement(limit, after, columns)), limit)
+        user_ids = [row[0] for row in rows]
+        relation_rows = {relation: self._rows(relation_statement(relation, user_ids)) if user_ids else []
+                         for relation in relations}
+        return assemble_profiles(rows, columns, relation_rows), next_cursor
+
+    def iter_profiles(self, batch_size: int = 500, columns: Sequence[str] = PUBLIC_USER_COLUMNS,
+                      relations: Sequence[str] = tuple(RELATION_COLUMNS)) -> Iterator[dict]:
+        """Recorre todos los perfiles por páginas de 'batch_size' (cursor por ID), sin materializar la tabla."""
+        after = None
+        while True:
+            profiles, after = self.get_profiles_page(batch_size, after, columns, relations)
+            yield from profiles
+            if after is None:
+                return
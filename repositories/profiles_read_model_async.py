@@ -0,0 +1,35 @@
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from repositories.profiles_read_model import (PUBLIC_USER_COLUMNS, RELATION_COLUMNS, assemble_profiles,
+                                              relation_statement, split_page, users_page_statement)
+
+
+class AsyncProfilesReadModel:
+    """Versión asíncrona de ProfilesReadModel: mismas sentencias Core sobre una AsyncSession."""
+
+    def __init__(self, db_session: AsyncSession):
+        self.db = db_session
+
+    async def _rows(self, stmt) -> list:
+        return (await self.db.execute(stmt)).all()
+
+    async def get_profiles_page(self, limit: int, after: Optional[int] = None,
+                                columns: Sequence[str] = PUBLIC_USER_COLUMNS,
+                                relations: Sequence[str] = tuple(RELATION_COLUMNS)) -> Tuple[List[dict], Optional[int]]:
+        """Página de perfiles ya serializados y su 'next_cursor' (ver ProfilesReadModel)."""
+        rows, next_cursor = split_page(await self._rows(users_page_statement(limit, after, columns)), limit)
+        user_ids = [row[0] for row in rows]
+        relation_rows = {relation: await self._rows(relation_statement(relation, user_ids)) if user_ids else []
+                         for relation in relations}
+        return assemble_profiles(rows, columns, relation_rows), next_cursor
+
+    async def iter_profiles(self, batch_size: int = 500, columns: Sequence[str] = PUBLIC_USER_COLUMNS,
+                            relations: Sequence[str] = tuple(RELATION_COLUMNS)) -> AsyncIterator[dict]:
+        """Recorre todos los perfiles por páginas de 'batch_size' (cursor por ID)."""
+        after = None
+        while True:
+            profiles, after = await self.get_profiles_page(batch_size, after, columns, relations)
+            for profile in profiles:
+                yield profile
+            if after is None:
+                return
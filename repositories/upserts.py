@@ -0,0 +1,24 @@
+from typing import Iterator, List, Tuple
+from sqlalchemy import Table
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# --- Upserts por Lotes Según el Dialecto ---
+# SQLite y PostgreSQL: INSERT ... ON CONFLICT; MySQL: INSERT ... ON DUPLICATE KEY UPDATE.
+# Cada lote es una sola sentencia INSERT con varias filas (VALUES (...), (...), ...).
+
+# Filas por sentencia: con 6 columnas por fila se queda lejos del límite de parámetros de SQLite
+UPSERT_CHUNK_SIZE = 500
+
+_INSERTS = {'mysql': mysql.insert, 'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+def dialect_insert(db: Session, table: Table) -> Tuple[object, str]:
+    """Retorna el INSERT específico del dialecto de la sesión (con soporte de upsert) y su nombre."""
+    dialect = db.get_bind().dialect.name
+    if dialect not in _INSERTS:
+        raise NotImplementedError(f"Upsert no soportado para el dialecto '{dialect}'")
+    return _INSERTS[dialect](table), dialect
+
+def chunked(rows: List[dict], size: int = UPSERT_CHUNK_SIZE) -> Iterator[List[dict]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
@@ -1,52 +1,140 @@
 import logging
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, load_only, selectinload
 from sqlalchemy.exc import IntegrityError, NoResultFound
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Sequence, Tuple
 from models.users_model import User 
+from config.logging_config import SAMPLED
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Relaciones de User que se pueden cargar junto con el usuario
+USER_RELATIONS = ('bicicletas', 'registros')
+
 class UsersRepository:
     """
     Capas de repositorio para la gestión de datos de la tabla 'users'.
     Interactúa directamente con la sesión de SQLAlchemy.
+    Las escrituras solo hacen flush: la transacción la confirma (o revierte)
+    la unidad de trabajo de la petición (config.database.init_db_session).
     """
     def __init__(self, db_session: Session):
         self.db = db_session
-        logger.info("Repositorio de Usuarios inicializado.")
+        logger.debug("Repositorio de Usuarios inicializado.")
         
-    def get_user_by_id(self, user_id: int) -> Optional[User]:
-        """Busca un usuario por su ID, incluyendo relaciones."""
-        logger.info(f"Buscando usuario por ID: {user_id}")
-        return self.db.query(User).filter(User.id == user_id).first()
+    def _with_relations(self, query, relations: Sequence[str] = USER_RELATIONS):
+        """
+        Estrategia de carga para bicicletas y registros: 'selectinload' trae las relaciones
+        de todos los usuarios de la consulta en una sola sentencia por relación
+        (WHERE biciusuario_id IN (...)), evitando el patrón N+1 de la carga perezosa.
+        """
+        return query.options(*(selectinload(getattr(User, name)) for name in relations))
+
+    def _projected(self, query, load_relations: bool, columns: Optional[Sequence[str]],
+                   relations: Sequence[str]):
+        """
+        Aplica la proyección: 'columns' limita las columnas leídas de users (load_only; None = todas)
+        y 'relations' las relaciones cargadas. Las relaciones no pedidas no se consultan.
+        """
+        if columns is not None:
+            query = query.options(load_only(*(getattr(User, name) for name in columns)))
+        if load_relations:
+            relations = USER_RELATIONS
+        if relations:
+            query = self._with_relations(query, relations)
+        return query
+
+    def get_user_by_id(self, user_id: int, load_relations: bool = False,
+                       columns: Optional[Sequence[str]] = None, relations: Sequence[str] = ()) -> Optional[User]:
+        """
+        Busca un usuario por su ID; con load_relations=True incluye bicicletas y registros.
+        'columns' y 'relations' cargan solo parte del usuario (ver _projected).
+        """
+        logger.info("Buscando usuario por ID: %s", user_id, extra=SAMPLED)
+        query = self.db.query(User).filter(User.id == user_id)
+        query = self._projected(query, load_relations, columns, relations)
+        return query.first()
         
-    def get_all_users(self) -> List[User]:
-        """Obtiene todos los usuarios."""
-        logger.info("Obteniendo todos los usuarios.")
-        return self.db.query(User).all()
+    def get_users_page(self, limit: int, after: Optional[int] = None,
+                       load_relations: bool = False, columns: Optional[Sequence[str]] = None,
+                       relations: Sequence[str] = ()) -> Tuple[List[User], Optional[int]]:
+        """
+        Obtiene una página de usuarios ordenada por ID (paginación por cursor / keyset).
+        Retorna la lista de usuarios y el cursor de la siguiente página (None si no hay más).
+        Con load_relations=True la página completa cuesta 3 consultas, sin importar su tamaño;
+        con 'columns' y 'relations', una consulta más por cada relación pedida.
+        """
+        logger.info("Obteniendo página de usuarios: limit=%s, after=%s", limit, after, extra=SAMPLED)
+        query = self.db.query(User)
+        if after is not None:
+            query = query.filter(User.id > after)
+        query = self._projected(query, load_relations, columns, relations)
+        # Pedimos un registro extra para saber si existe una página siguiente
+        users = query.order_by(User.id).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = users[-1].id
+        return users, next_cursor
+
+    def get_version(self, user_id: int) -> Optional[int]:
+        """Retorna solo la versión del usuario (consulta por clave primaria, sin relaciones)."""
+        return self.db.scalar(select(User.version).where(User.id == user_id))
+
+    def get_page_versions(self, limit: int, after: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Retorna los pares (id, version) de la página indicada, más el primero de la siguiente
+        (igual que get_users_page), sin cargar el resto de columnas ni las relaciones.
+        """
+        stmt = select(User.id, User.version).order_by(User.id).limit(limit + 1)
+        if after is not None:
+            stmt = stmt.where(User.id > after)
+        return [tuple(row) for row in self.db.execute(stmt)]
+
+    def bump_version(self, user_id: int, expected_version: Optional[int] = None) -> bool:
+        """
+        Incrementa la versión del usuario. Con 'expected_version' solo lo hace si la versión
+        actual coincide (concurrencia optimista). Retorna False si no se actualizó ninguna fila.
+        """
+        stmt = update(User).where(User.id == user_id).values(version=User.version + 1)
+        if expected_version is not None:
+            stmt = stmt.where(User.version == expected_version)
+        return self.db.execute(stmt).rowcount == 1
+
+    def bump_versions(self, user_ids: List[int]):
+        """Incrementa en una sola sentencia la versión de varios usuarios."""
+        if user_ids:
+            self.db.execute(
+                update(User).where(User.id.in_(user_ids)).values(version=User.version + 1)
+            )
+
+    def get_nombres_by_ids(self, user_ids: List[int]) -> Dict[int, str]:
+        """Retorna {id: nombre_biciusuario} para los IDs existentes (una sola consulta)."""
+        if not user_ids:
+            return {}
+        stmt = select(User.id, User.nombre_biciusuario).where(User.id.in_(user_ids))
+        return {row.id: row.nombre_biciusuario for row in self.db.execute(stmt)}
 
     def get_user_by_username(self, username: str) -> Optional[User]:
         """Busca un usuario por su nombre de usuario (para login)."""
-        logger.info(f"Buscando usuario por username: {username}")
+        logger.info("Buscando usuario por username: %s", username, extra=SAMPLED)
         return self.db.query(User).filter(User.username == username).first()
 
     def add(self, user: User) -> User:
-        """Guarda un nuevo objeto User en la base de datos."""
+        """
+        Guarda un nuevo objeto User en la base de datos.
+        Los errores no se revierten aquí: la sesión es de toda la petición y la unidad de trabajo
+        la revierte entera cuando la respuesta es un error.
+        """
         try:
             self.db.add(user)
-            self.db.commit()
-            self.db.refresh(user)
-            logger.info(f"Usuario {user.username} añadido exitosamente con ID {user.id}.")
+            self.db.flush()
+            logger.info("Usuario %s añadido exitosamente con ID %s.", user.username, user.id)
             return user
         except IntegrityError as e:
-            self.db.rollback()
-            logger.error(f"Error de integridad al añadir usuario: {e}")
+            logger.error("Error de integridad al añadir usuario: %s", e)
             raise ValueError(f"El usuario o email ya existe.")
-        except Exception as e:
-            self.db.rollback()
-            logger.error(f"Error desconocido al añadir usuario: {e}")
-            raise e
             
     # --- NUEVOS MÉTODOS PARA SOPORTAR EL SERVICE ---
     
@@ -54,25 +142,31 @@ class UsersRepository:
         """
         Actualiza los campos principales (escalares) del modelo User. 
         Este método es una alternativa al Service para la actualización simple.
+        Un username duplicado lanza IntegrityError (el controlador responde 409).
         """
         user = self.get_user_by_id(user_id)
         if not user:
             return None
             
-        try:
-            if 'nombre_biciusuario' in data:
-                user.nombre_biciusuario = data['nombre_biciusuario']
-            
-            # La actualización de Bicicletas y Registros se maneja en el Service
-            
-            self.db.commit()
-            self.db.refresh(user)
-            logger.info(f"Campos escalares del Usuario ID {user_id} actualizados.")
-            return user
-        except Exception as e:
-            self.db.rollback()
-            logger.error(f"Error al actualizar campos escalares del usuario {user_id}: {e}")
-            return None
+        if 'username' in data:
+            user.username = data['username']
+        if 'nombre_biciusuario' in data:
+            user.nombre_biciusuario = data['nombre_biciusuario']
+        if 'password_hash' in data:
+            user.password_hash = data['password_hash']
+        
+        # La actualización de Bicicletas y Registros se maneja en el Service
+        
+        self.db.flush()
+        logger.info("Campos escalares del Usuario ID %s actualizados.", user_id)
+        return user
+
+    def update_password_hash(self, user: User, password_hash: str) -> User:
+        """Reemplaza el hash de contraseña de un usuario (p. ej., al cambiar el coste de bcrypt)."""
+        user.password_hash = password_hash
+        self.db.flush()
+        logger.info("Hash de contraseña del Usuario ID %s actualizado.", user.id)
+        return user
 
     def delete_user(self, user_id: int) -> Optional[User]:
         """
@@ -82,12 +176,7 @@ class UsersRepository:
         user = self.get_user_by_id(user_id)
         if user:
             self.db.delete(user)
-            try:
-                self.db.commit()
-                logger.info(f"Usuario ID {user_id} eliminado exitosamente.")
-                return user
-            except Exception as e:
-                self.db.rollback()
-                logger.error(f"Error al confirmar la eliminación del usuario {user_id}: {e}")
-                return None
+            self.db.flush()
+            logger.info("Usuario ID %s eliminado exitosamente.", user_id)
+            return user
         return None
@@ -0,0 +1,124 @@
+import logging
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
+from typing import Optional, List, Dict, Any, Sequence, Tuple
+from models.users_model import User
+from repositories.users_repository import USER_RELATIONS
+
+logger = logging.getLogger(__name__)
+
+class AsyncUsersRepository:
+    """
+    Versión asíncrona de UsersRepository para el servidor ASGI (src/asgi.py).
+    Mismas consultas sobre una AsyncSession; las escrituras solo hacen flush y la
+    transacción la confirma la unidad de trabajo de la petición.
+    Las relaciones nunca se cargan de forma perezosa (no es posible en asyncio):
+    quien las necesite debe pedir load_relations=True.
+    """
+    def __init__(self, db_session: AsyncSession):
+        self.db = db_session
+
+    @staticmethod
+    def _with_relations(stmt, relations: Sequence[str] = USER_RELATIONS):
+        """Carga bicicletas y registros con una consulta por relación (selectinload)."""
+        return stmt.options(*(selectinload(getattr(User, name)) for name in relations))
+
+    @classmethod
+    def _projected(cls, stmt, load_relations: bool, columns: Optional[Sequence[str]], relations: Sequence[str]):
+        """Aplica la proyección de columnas y relaciones (ver UsersRepository._projected)."""
+        if columns is not None:
+            stmt = stmt.options(load_only(*(getattr(User, name) for name in columns)))
+        if load_relations:
+            relations = USER_RELATIONS
+        if relations:
+            stmt = cls._with_relations(stmt, relations)
+        return stmt
+
+    async def get_user_by_id(self, user_id: int, load_relations: bool = False,
+                             columns: Optional[Sequence[str]] = None, relations: Sequence[str] = ()) -> Optional[User]:
+        """Busca un usuario por su ID; con load_relations=True incluye bicicletas y registros."""
+        stmt = select(User).where(User.id == user_id)
+        stmt = self._projected(stmt, load_relations, columns, relations)
+        return (await self.db.scalars(stmt)).first()
+
+    async def get_users_page(self, limit: int, after: Optional[int] = None,
+                             load_relations: bool = False, columns: Optional[Sequence[str]] = None,
+                             relations: Sequence[str] = ()) -> Tuple[List[User], Optional[int]]:
+        """Página de usuarios ordenada por ID y cursor de la siguiente (ver UsersRepository)."""
+        stmt = select(User).order_by(User.id).limit(limit + 1)
+        if after is not None:
+            stmt = stmt.where(User.id > after)
+        stmt = self._projected(stmt, load_relations, columns, relations)
+        users = list(await self.db.scalars(stmt))
+
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = users[-1].id
+        return users, next_cursor
+
+    async def get_user_by_username(self, username: str) -> Optional[User]:
+        """Busca un usuario por su nombre de usuario (para login)."""
+        return (await self.db.scalars(select(User).where(User.username == username))).first()
+
+    async def get_version(self, user_id: int) -> Optional[int]:
+        """Retorna solo la versión del usuario (consulta por clave primaria)."""
+        return await self.db.scalar(select(User.version).where(User.id == user_id))
+
+    async def get_page_versions(self, limit: int, after: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Pares (id, version) de la página indicada, más el primero de la siguiente."""
+        stmt = select(User.id, User.version).order_by(User.id).limit(limit + 1)
+        if after is not None:
+            stmt = stmt.where(User.id > after)
+        return [tuple(row) for row in await self.db.execute(stmt)]
+
+    async def bump_version(self, user_id: int, expected_version: Optional[int] = None) -> bool:
+        """Incrementa la versión (condicionada a 'expected_version' si se indica)."""
+        stmt = update(User).where(User.id == user_id).values(version=User.version + 1)
+        if expected_version is not None:
+            stmt = stmt.where(User.version == expected_version)
+        return (await self.db.execute(stmt)).rowcount == 1
+
+    async def add(self, user: User) -> User:
+        """Guarda un nuevo objeto User en la base de datos."""
+        try:
+            self.db.add(user)
+            await self.db.flush()
+            logger.info("Usuario %s añadido exitosamente con ID %s.", user.username, user.id)
+            return user
+        except IntegrityError as e:
+            logger.error("Error de integridad al añadir usuario: %s", e)
+            raise ValueError(f"El usuario o email ya existe.")
+
+    async def update_user_scalars(self, user_id: int, data: Dict[str, Any]) -> Optional[User]:
+        """
+        Actualiza los campos escalares del usuario (username, nombre, hash de contraseña).
+        Un username duplicado lanza IntegrityError (el controlador responde 409).
+        """
+        user = await self.get_user_by_id(user_id)
+        if not user:
+            return None
+        for field in ('username', 'nombre_biciusuario', 'password_hash'):
+            if field in data:
+                setattr(user, field, data[field])
+        await self.db.flush()
+        return user
+
+    async def update_password_hash(self, user: User, password_hash: str) -> User:
+        """Reemplaza el hash de contraseña de un usuario."""
+        user.password_hash = password_hash
+        await self.db.flush()
+        return user
+
+    async def delete_user(self, user_id: int) -> Optional[User]:
+        """Elimina un usuario (y en cascada sus bicicletas y registros). Retorna el usuario o None."""
+        # Las relaciones se cargan antes para que la cascada del ORM no dependa de carga perezosa
+        user = await self.get_user_by_id(user_id, load_relations=True)
+        if user:
+            await self.db.delete(user)
+            await self.db.flush()
+            logger.info("Usuario ID %s eliminado exitosamente.", user_id)
+            return user
+        return None
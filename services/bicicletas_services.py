@@ -0,0 +1,38 @@
+import logging
+from typing import Optional
+from sqlalchemy.orm import Session
+from repositories.bicicletas_repository import BicicletasRepository
+
+logger = logging.getLogger(__name__)
+
+# Filtros de GET /biciusuarios/bicicletas/search (parámetros de consulta)
+SEARCH_FILTERS = ('serial', 'marca', 'modelo', 'color', 'nombre')
+
+class BicicletasService:
+    """
+    Capa de servicios para consultar bicicletas sin pasar por el perfil completo de su dueño
+    (p. ej., "¿de quién es el serial X?" o "todas las Trek rojas").
+    """
+
+    def __init__(self, db_session: Session):
+        """Inicializa el servicio con una sesión de base de datos e instancia el repositorio."""
+        self.repository = BicicletasRepository(db_session)
+        logger.debug("Servicio de Bicicletas inicializado")
+
+    def search_bicicletas(self, limit: int, after: Optional[int] = None, **filters) -> dict:
+        """
+        Busca bicicletas por los filtros de SEARCH_FILTERS (se combinan con AND).
+        Retorna la página con el propietario de cada bicicleta y el cursor 'next_cursor'.
+        """
+        rows, next_cursor = self.repository.search(limit, after, **filters)
+        return {
+            'items': [{
+                'id': row['id'],
+                'serial': row['serial'],
+                'marca': row['marca'],
+                'modelo': row['modelo'],
+                'color': row['color'],
+                'propietario': {'id': row['biciusuario_id'], 'nombre_biciusuario': row['nombre_biciusuario']}
+            } for row in rows],
+            'next_cursor': next_cursor
+        }
@@ -1,13 +1,27 @@
 import logging
+from typing import Iterator
 from sqlalchemy.orm import Session
 # Importaciones de Modelos (Asegúrate de que estas rutas sean correctas)
 from models.users_model import User 
-from models.users_model import RegistroBiciusuario, Bicicleta 
 from repositories.users_repository import UsersRepository 
+from repositories.profiles_read_model import ProfilesReadModel
+from repositories.bicicletas_repository import BicicletasRepository
+from repositories.biciusuarios_repository import RegistroBiciusuarioRepository
+from services.profile_cache import ProfileCache, get_profile_cache
+from services.projection import FULL_PROJECTION, Projection
+from config.logging_config import SAMPLED
+from config.json_encoding import EncodedJSON, encode_json
+from config.msgpack_encoding import encode_msgpack
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Filas por lote al recorrer la tabla completa en la exportación NDJSON
+EXPORT_BATCH_SIZE = 500
+
+class VersionConflict(Exception):
+    """El perfil cambió desde la versión indicada por el cliente (If-Match); el controlador responde 412."""
+
+
 class BiciusuariosService:
     """
     Capa de servicios para la gestión de perfiles de Biciusuario (User).
@@ -16,127 +30,201 @@ class BiciusuariosService:
     Delega las operaciones de base de datos a UserRepository.
     """
 
-    def __init__(self, db_session: Session):
-        """Inicializa el servicio con una sesión de base de datos."""
+    def __init__(self, db_session: Session, cache: ProfileCache | None = None):
+        """Inicializa el servicio con una sesión de base de datos y la caché de perfiles."""
         self.repository = UsersRepository(db_session)
-        logger.info("Servicio de Biciusuarios inicializado")
+        # Listados de solo lectura: SQL Core sin hidratar objetos User
+        self.read_model = ProfilesReadModel(db_session)
+        self.cache = cache or get_profile_cache()
+        logger.debug("Servicio de Biciusuarios inicializado")
 
-    def _to_dict(self, user: User) -> dict:
+    @staticmethod
+    def _to_dict(user: User, projection: Projection = FULL_PROJECTION) -> dict:
         """
         Serializa un objeto User, incluyendo sus relaciones, a un diccionario.
+        Es estático para que la versión ASGI (AsyncBiciusuariosService) produzca la misma forma.
+        Solo lee las columnas y relaciones de 'projection': las demás pueden no estar cargadas.
         """
         if not user:
             return None
             
         # Nota: La password_hash NO se expone.
+        profile = {field: getattr(user, field) for field in projection.fields}
+
         # Serialización de las relaciones (lista de dicts)
-        bicicletas_serializadas = [{
-            'id': b.id,
-            'marca': b.marca,
-            'modelo': b.modelo,
-            'color': b.color,
-            'serial': b.serial
-        } for b in user.bicicletas]
+        if 'bicicletas' in projection.expand:
+            profile['bicicletas'] = [{
+                'id': b.id,
+                'marca': b.marca,
+                'modelo': b.modelo,
+                'color': b.color,
+                'serial': b.serial
+            } for b in user.bicicletas]
         
         # FIX / RECOMENDACIÓN: Se elimina 'nombre_biciusuario' del registro anidado
         # ya que es redundante, pues ya está en el objeto padre (user).
-        registros_serializadas = [{
-            'id': r.id, 
-            'serial': r.serial
-        } for r in user.registros]
+        if 'registros' in projection.expand:
+            profile['registros'] = [{
+                'id': r.id, 
+                'serial': r.serial
+            } for r in user.registros]
         
-        return {
-            'id': user.id,
-            'username': user.username,
-            'nombre_biciusuario': user.nombre_biciusuario,
-            'bicicletas': bicicletas_serializadas,
-            'registros': registros_serializadas
-        }
+        return profile
+
+    @staticmethod
+    def _load_args(projection: Projection) -> dict:
+        """
+        Columnas y relaciones a cargar para una proyección. El perfil completo carga todas las
+        columnas (incluida 'version', que se guarda con él en la caché de perfiles).
+        """
+        return {'columns': None if projection.is_full else projection.fields, 'relations': projection.expand}
 
     # --- Métodos Públicos (Usados por el Controlador) ---
     
-    def get_all_biciusuarios(self) -> list[dict]:
-        """Recupera todos los perfiles de Biciusuario (User) serializados."""
-        logger.info("Listando todos los Biciusuarios")
-        users = self.repository.get_all_users()
-        return [self._to_dict(user) for user in users]
-
-    def get_biciusuario_by_id(self, user_id: int) -> dict | None:
-        """Busca y retorna un Biciusuario específico por ID, serializado."""
-        logger.info(f"Obteniendo Biciusuario por ID: {user_id}")
-        user = self.repository.get_user_by_id(user_id)
-        return self._to_dict(user)
+    def get_biciusuarios_page(self, limit: int, after: int | None = None,
+                              projection: Projection = FULL_PROJECTION) -> dict:
+        """
+        Recupera una página de perfiles de Biciusuario (User) serializados.
+        Retorna los elementos y el cursor 'next_cursor' para pedir la página siguiente.
+        Solo se consultan las columnas y relaciones de 'projection', con el modelo de lectura
+        (mismo resultado que _to_dict, sin pasar por objetos del ORM).
+        """
+        logger.info("Listando Biciusuarios: limit=%s, after=%s", limit, after, extra=SAMPLED)
+        items, next_cursor = self.read_model.get_profiles_page(limit, after, projection.fields, projection.expand)
+        return {
+            'items': items,
+            'next_cursor': next_cursor
+        }
+
+    def get_biciusuarios_page_json(self, limit: int, after: int | None = None,
+                                   projection: Projection = FULL_PROJECTION) -> EncodedJSON:
+        """
+        Igual que get_biciusuarios_page, pero ya codificada: el controlador la envía sin volver
+        a pasar por jsonify (las páginas grandes son la mayor parte del coste de codificación).
+        """
+        return encode_json(self.get_biciusuarios_page(limit, after, projection))
+
+    def export_biciusuarios_ndjson(self, batch_size: int = EXPORT_BATCH_SIZE,
+                                   projection: Projection = FULL_PROJECTION) -> Iterator[bytes]:
+        """
+        Genera todos los perfiles como JSON delimitado por saltos de línea (una línea por perfil).
+        Es un generador: cada línea se emite en cuanto se lee su lote, sin acumular la tabla en memoria.
+        """
+        logger.info("Exportando todos los Biciusuarios (NDJSON)")
+        for profile in self.read_model.iter_profiles(batch_size, projection.fields, projection.expand):
+            yield encode_json(profile) + b'\n'
+
+    def export_biciusuarios_msgpack(self, batch_size: int = EXPORT_BATCH_SIZE,
+                                    projection: Projection = FULL_PROJECTION) -> Iterator[bytes]:
+        """
+        Igual que export_biciusuarios_ndjson, en MessagePack: un mapa por perfil, concatenados
+        (se leen en streaming con msgpack.Unpacker).
+        """
+        logger.info("Exportando todos los Biciusuarios (MessagePack)")
+        for profile in self.read_model.iter_profiles(batch_size, projection.fields, projection.expand):
+            yield encode_msgpack(profile)
+
+    def get_biciusuario_by_id(self, user_id: int, projection: Projection = FULL_PROJECTION) -> dict | None:
+        """
+        Busca y retorna un Biciusuario específico por ID, serializado.
+        Se sirve desde la caché de perfiles si está disponible; si no, se carga y se guarda en ella.
+        Una proyección parcial se recorta del perfil en caché o, si no está, se carga solo lo pedido
+        (sin guardarla: la caché solo contiene perfiles completos).
+        """
+        logger.info("Obteniendo Biciusuario por ID: %s", user_id, extra=SAMPLED)
+        entry = self.cache.get(user_id)
+        if entry is not None:
+            return projection.project(entry['profile'])
+
+        user = self.repository.get_user_by_id(user_id, **self._load_args(projection))
+        if user is None:
+            return None
+        profile = self._to_dict(user, projection)
+        if projection.is_full:
+            self.cache.set(user_id, {'version': user.version, 'profile': profile})
+        return profile
+
+    def get_biciusuario_version(self, user_id: int) -> int | None:
+        """
+        Retorna la versión actual del perfil (None si no existe) sin serializarlo:
+        de la caché si está, o con una consulta por clave primaria.
+        """
+        entry = self.cache.peek(user_id)
+        if entry is not None:
+            return entry['version']
+        return self.repository.get_version(user_id)
+
+    def get_biciusuarios_page_versions(self, limit: int, after: int | None = None) -> list[tuple[int, int]]:
+        """Pares (id, version) de la página pedida, para calcular su ETag antes de serializarla."""
+        return self.repository.get_page_versions(limit, after)
         
-    def update_biciusuario(self, user_id: int, data: dict) -> dict | None:
+    def update_biciusuario(self, user_id: int, data: dict,
+                           expected_version: int | None = None) -> tuple[dict, int] | None:
         """
-        Actualiza el nombre, registros y bicicletas de un Biciusuario.
+        Actualiza el nombre, registros y bicicletas de un Biciusuario e incrementa su versión.
+        Con 'expected_version' (If-Match) lanza VersionConflict si el perfil cambió entretanto.
+        Bicicletas y registros se escriben por lotes (upsert), con un número fijo de sentencias
+        por lote; el perfil retornado incluye en 'resultados' el desenlace de cada serial.
+        Retorna (perfil, versión nueva): el ETag de la respuesta sale de esta versión, no de la caché.
         """
-        logger.info(f"Actualizando Biciusuario: {user_id}")
+        logger.info("Actualizando Biciusuario: %s", user_id)
         
         user = self.repository.get_user_by_id(user_id)
         if not user:
-            logger.warning(f"Biciusuario no encontrado para actualizar: {user_id}")
+            logger.warning("Biciusuario no encontrado para actualizar: %s", user_id)
             return None
 
+        # 0. Incremento condicional de la versión: el UPDATE ... WHERE version = :esperada
+        #    es atómico, así que de dos escritores con la misma versión solo uno continúa.
+        if not self.repository.bump_version(user_id, expected_version):
+            logger.warning("Conflicto de versión al actualizar Biciusuario %s", user_id)
+            raise VersionConflict(f"El perfil {user_id} fue modificado por otra petición")
+
         # 1. Actualizar el nombre principal
         new_name = data.get('nombre_biciusuario', user.nombre_biciusuario)
         if user.nombre_biciusuario != new_name:
             user.nombre_biciusuario = new_name
 
-        # 2. Actualizar Bicicletas (Upsert: Crea si no existe, actualiza si sí)
+        # 2. Bicicletas: upsert por serial (crea o actualiza; los seriales de otro usuario no se tocan)
+        # 3. Registros: solo se agregan los seriales nuevos
+        resultados = self._upsert_sub_resources(self.repository.db, user_id, user.nombre_biciusuario, data)
+
+        # 4. Enviar los cambios a la transacción de la petición (se confirma al final de la misma)
+        self.repository.db.flush()
+        self.cache.invalidate_on_commit(self.repository.db, user_id)
+        # La versión cambió con un UPDATE de Core: se recarga; las relaciones se cargan al serializar
+        self.repository.db.refresh(user)
+
+        profile = self._to_dict(user)
+        profile['resultados'] = resultados
+        return profile, user.version
+
+    @staticmethod
+    def _upsert_sub_resources(db: Session, user_id: int, nombre_biciusuario: str, data: dict) -> dict:
+        """
+        Escribe las bicicletas y registros de 'data' con las sentencias por lote de los repositorios.
+        Es estático y síncrono para que la versión ASGI lo ejecute con AsyncSession.run_sync.
+        """
+        resultados = {}
         if 'bicicletas' in data:
-            current_serials = {b.serial for b in user.bicicletas}
-            
-            for bici_data in data['bicicletas']:
-                serial = bici_data.get('serial')
-                if not serial: continue
-                
-                if serial in current_serials:
-                    # Actualizar bicicleta existente
-                    bicicleta = next(b for b in user.bicicletas if b.serial == serial)
-                    bicicleta.marca = bici_data.get('marca', bicicleta.marca)
-                    bicicleta.modelo = bici_data.get('modelo', bicicleta.modelo)
-                    bicicleta.color = bici_data.get('color', bicicleta.color)
-                else:
-                    # Crear nueva bicicleta
-                    new_bici = Bicicleta(
-                        marca=bici_data.get('marca'),
-                        modelo=bici_data.get('modelo'),
-                        color=bici_data.get('color'),
-                        serial=serial,
-                        biciusuario_id=user.id
-                    )
-                    self.repository.db.add(new_bici)
-                    
-        # 3. Actualizar Registros (Solo agregamos nuevos si el serial no existe)
+            resultados['bicicletas'] = BicicletasRepository(db).upsert_for_owner(user_id, data['bicicletas'])
         if 'registros' in data:
-            current_reg_serials = {r.serial for r in user.registros}
-            
-            for reg_data in data['registros']:
-                serial = reg_data.get('serial')
-                if not serial: continue
-
-                if serial not in current_reg_serials:
-                    # Crear nuevo registro
-                    new_registro = RegistroBiciusuario(
-                        nombre_biciusuario=user.nombre_biciusuario,
-                        serial=serial,
-                        biciusuario_id=user.id
-                    )
-                    self.repository.db.add(new_registro)
-
-        # 4. Persistir los cambios
-        self.repository.db.commit()
-        self.repository.db.refresh(user)
-        
-        return self._to_dict(user)
+            resultados['registros'] = RegistroBiciusuarioRepository(db).insert_missing_for_owner(
+                user_id, nombre_biciusuario, data['registros'])
+        conflictos = [serial for results in resultados.values()
+                      for serial, result in results.items() if result == 'conflicto']
+        if conflictos:
+            logger.warning("Seriales de otro usuario ignorados al actualizar %s: %s", user_id, conflictos[:20])
+        return resultados
 
     def delete_biciusuario(self, user_id: int) -> bool:
         """Elimina un Biciusuario por ID (UserRepository debe manejar las eliminaciones en cascada)."""
-        logger.info(f"Eliminando Biciusuario: {user_id}")
+        logger.info("Eliminando Biciusuario: %s", user_id)
         
         # El UserRepository es el responsable de la eliminación en la tabla principal
         deleted_user = self.repository.delete_user(user_id) 
+        if deleted_user is not None:
+            self.cache.invalidate_on_commit(self.repository.db, user_id)
         
         # El método delete_user en el repository debe devolver el usuario eliminado
         # o None si no se encuentra. Asumo que devuelve True/False o el objeto.
@@ -0,0 +1,106 @@
+import logging
+from typing import AsyncIterator
+from sqlalchemy.ext.asyncio import AsyncSession
+from repositories.users_repository_async import AsyncUsersRepository
+from repositories.profiles_read_model_async import AsyncProfilesReadModel
+from services.biciusuarios_services import BiciusuariosService, VersionConflict, EXPORT_BATCH_SIZE
+from services.profile_cache import ProfileCache
+from services.profile_cache_async import AsyncProfileCache
+from services.projection import FULL_PROJECTION, Projection
+from config.json_encoding import EncodedJSON, encode_json
+
+logger = logging.getLogger(__name__)
+
+class AsyncBiciusuariosService:
+    """
+    Versión asíncrona de BiciusuariosService para el servidor ASGI.
+    Comparte con la versión síncrona la serialización (_to_dict), la caché de perfiles
+    y las reglas de negocio (versión, If-Match, upsert de bicicletas y registros).
+    """
+
+    def __init__(self, db_session: AsyncSession, cache: ProfileCache | None = None):
+        self.repository = AsyncUsersRepository(db_session)
+        self.read_model = AsyncProfilesReadModel(db_session)
+        self.cache = AsyncProfileCache(cache)
+
+    _to_dict = staticmethod(BiciusuariosService._to_dict)
+    _load_args = staticmethod(BiciusuariosService._load_args)
+
+    async def get_biciusuarios_page(self, limit: int, after: int | None = None,
+                                    projection: Projection = FULL_PROJECTION) -> dict:
+        """Página de perfiles serializados (solo lo pedido en 'projection') y su 'next_cursor'."""
+        items, next_cursor = await self.read_model.get_profiles_page(limit, after, projection.fields, projection.expand)
+        return {
+            'items': items,
+            'next_cursor': next_cursor
+        }
+
+    async def get_biciusuarios_page_json(self, limit: int, after: int | None = None,
+                                         projection: Projection = FULL_PROJECTION) -> EncodedJSON:
+        """Página ya codificada (ver BiciusuariosService.get_biciusuarios_page_json)."""
+        return encode_json(await self.get_biciusuarios_page(limit, after, projection))
+
+    async def get_biciusuarios_page_versions(self, limit: int, after: int | None = None) -> list[tuple[int, int]]:
+        """Pares (id, version) de la página pedida, para calcular su ETag antes de serializarla."""
+        return await self.repository.get_page_versions(limit, after)
+
+    async def get_biciusuario_by_id(self, user_id: int, projection: Projection = FULL_PROJECTION) -> dict | None:
+        """Perfil serializado por ID, servido desde la caché de perfiles cuando está disponible."""
+        entry = await self.cache.get(user_id)
+        if entry is not None:
+            return projection.project(entry['profile'])
+        user = await self.repository.get_user_by_id(user_id, **self._load_args(projection))
+        if user is None:
+            return None
+        profile = self._to_dict(user, projection)
+        if projection.is_full:
+            await self.cache.set(user_id, {'version': user.version, 'profile': profile})
+        return profile
+
+    async def get_biciusuario_version(self, user_id: int) -> int | None:
+        """Versión actual del perfil (caché o consulta por clave primaria)."""
+        entry = await self.cache.peek(user_id)
+        if entry is not None:
+            return entry['version']
+        return await self.repository.get_version(user_id)
+
+    async def export_biciusuarios_ndjson(self, batch_size: int = EXPORT_BATCH_SIZE,
+                                         projection: Projection = FULL_PROJECTION) -> AsyncIterator[bytes]:
+        """Todos los perfiles como NDJSON, leídos por páginas con el modelo de lectura."""
+        async for profile in self.read_model.iter_profiles(batch_size, projection.fields, projection.expand):
+            yield encode_json(profile) + b'\n'
+
+    async def update_biciusuario(self, user_id: int, data: dict,
+                                 expected_version: int | None = None) -> tuple[dict, int] | None:
+        """Actualiza nombre, bicicletas y registros (ver BiciusuariosService.update_biciusuario)."""
+        db = self.repository.db
+        user = await self.repository.get_user_by_id(user_id)
+        if not user:
+            return None
+
+        if not await self.repository.bump_version(user_id, expected_version):
+            raise VersionConflict(f"El perfil {user_id} fue modificado por otra petición")
+
+        if 'nombre_biciusuario' in data:
+            user.nombre_biciusuario = data['nombre_biciusuario']
+
+        # Mismas sentencias por lote que la versión síncrona, sobre la sesión síncrona subyacente
+        nombre = user.nombre_biciusuario
+        resultados = await db.run_sync(
+            lambda sync_session: BiciusuariosService._upsert_sub_resources(sync_session, user_id, nombre, data))
+
+        await db.flush()
+        await self.cache.invalidate_on_commit(db.sync_session, user_id)
+        # Recarga explícita de las relaciones: en asyncio no hay carga perezosa
+        await db.refresh(user, ['version', 'bicicletas', 'registros'])
+        profile = self._to_dict(user)
+        profile['resultados'] = resultados
+        return profile, user.version
+
+    async def delete_biciusuario(self, user_id: int) -> bool:
+        """Elimina un Biciusuario por ID, con sus bicicletas y registros."""
+        deleted_user = await self.repository.delete_user(user_id)
+        if deleted_user is None:
+            return False
+        await self.cache.invalidate_on_commit(self.repository.db.sync_session, user_id)
+        return True
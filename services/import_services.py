@@ -0,0 +1,223 @@
+import csv
+import io
+import logging
+from itertools import islice
+from typing import IO, Iterable, Iterator, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from repositories.users_repository import UsersRepository
+from repositories.bicicletas_repository import BicicletasRepository
+from repositories.biciusuarios_repository import RegistroBiciusuarioRepository
+from services.profile_cache import get_profile_cache
+from models.users_model import Bicicleta, RegistroBiciusuario
+from config.json_encoding import decode_json
+
+logger = logging.getLogger(__name__)
+
+# El flujo de la petición lee de a pocos bytes; se envuelve en un búfer de 64 KiB
+STREAM_BUFFER_SIZE = 64 * 1024
+
+# Filas por lote: cada lote se valida con un número fijo de consultas,
+# se inserta con una sentencia por tabla y se confirma en su propia transacción.
+IMPORT_CHUNK_SIZE = 1000
+
+TIPOS_VALIDOS = ('bicicleta', 'registro')
+
+# Longitud máxima de cada campo de texto por tipo, tomada de las columnas del modelo
+# (en MySQL un valor más largo fallaría en el INSERT de todo el lote)
+LONGITUDES = {
+    'bicicleta': {name: Bicicleta.__table__.c[name].type.length for name in ('serial', 'marca', 'modelo', 'color')},
+    'registro': {'serial': RegistroBiciusuario.__table__.c.serial.type.length},
+}
+
+# --- Lectores de formato (generadores: no cargan el cuerpo completo en memoria) ---
+
+def parse_ndjson(stream: IO[bytes]) -> Iterator[Optional[dict]]:
+    """Lee un cuerpo NDJSON línea por línea. Las líneas inválidas se emiten como None."""
+    for line in io.BufferedReader(stream, STREAM_BUFFER_SIZE):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = decode_json(line)
+        except ValueError:
+            yield None
+            continue
+        yield row if isinstance(row, dict) else None
+
+def _is_utf8(value: str) -> bool:
+    # Con errors='surrogateescape' los bytes que no son UTF-8 quedan como sustitutos sueltos
+    try:
+        value.encode('utf-8')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+def parse_csv(stream: IO[bytes]) -> Iterator[Optional[dict]]:
+    """
+    Lee un cuerpo CSV con cabecera (tipo,biciusuario_id,serial,marca,modelo,color).
+    Las filas con bytes que no son UTF-8 se emiten como None (fila mal formada) en lugar de
+    interrumpir la importación con los lotes anteriores ya confirmados.
+    """
+    text = io.TextIOWrapper(io.BufferedReader(stream, STREAM_BUFFER_SIZE), encoding='utf-8',
+                            errors='surrogateescape', newline='')
+    for row in csv.DictReader(text):
+        # Las celdas vacías se tratan como ausentes
+        row = {k: v for k, v in row.items() if k and v not in (None, '')}
+        if not all(_is_utf8(k) and (not isinstance(v, str) or _is_utf8(v)) for k, v in row.items()):
+            yield None
+            continue
+        yield row
+
+
+class ImportService:
+    """
+    Capa de servicios para la ingesta masiva de bicicletas y registros de muchos biciusuarios.
+    Inserta por lotes con sentencias set-based y reporta los errores fila por fila
+    (seriales duplicados, biciusuarios ajenos o filas mal formadas).
+    Solo se importa en el perfil del usuario autenticado ('owner_id'), como en PUT /biciusuarios/<id>.
+    A diferencia del resto de servicios, confirma cada lote por su cuenta para que
+    una importación grande no quede en una única transacción sin límite.
+    """
+
+    def __init__(self, db_session: Session, chunk_size: int = IMPORT_CHUNK_SIZE):
+        """Inicializa el servicio con una sesión de base de datos y los repositorios necesarios."""
+        self.db = db_session
+        self.chunk_size = chunk_size
+        self.users_repository = UsersRepository(db_session)
+        self.bicicletas_repository = BicicletasRepository(db_session)
+        self.registros_repository = RegistroBiciusuarioRepository(db_session)
+        self.cache = get_profile_cache()
+        logger.debug("Servicio de Importación inicializado")
+
+    def import_rows(self, rows: Iterable[Optional[dict]], owner_id: int) -> dict:
+        """
+        Importa las filas dadas ('tipo' = 'bicicleta' o 'registro') en el perfil 'owner_id';
+        las filas de otro biciusuario_id se reportan como error.
+        Retorna el número de filas insertadas por tipo y la lista de errores por fila.
+        """
+        summary = {'bicicletas_insertadas': 0, 'registros_insertados': 0, 'errores': []}
+        # Seriales ya aceptados en esta importación, para detectar duplicados dentro del cuerpo
+        seen = {'bicicleta': set(), 'registro': set()}
+
+        numbered = enumerate(rows, start=1)
+        while True:
+            chunk = list(islice(numbered, self.chunk_size))
+            if not chunk:
+                break
+            self._import_chunk(chunk, owner_id, seen, summary)
+
+        summary['errores'].sort(key=lambda e: e['fila'])
+        logger.info(
+            "Importación finalizada: %s bicicletas, %s registros, %s errores",
+            summary['bicicletas_insertadas'], summary['registros_insertados'], len(summary['errores'])
+        )
+        return summary
+
+    def _import_chunk(self, chunk: list, owner_id: int, seen: dict, summary: dict):
+        """Valida e inserta un lote dentro de una única transacción."""
+        errores = summary['errores']
+        valid = []
+        for fila, row in chunk:
+            error = self._validate(row)
+            if error is None and row['biciusuario_id'] != owner_id:
+                error = 'No tienes permiso para importar en este perfil'
+            if error:
+                errores.append({'fila': fila, 'serial': (row or {}).get('serial'), 'error': error})
+            else:
+                valid.append((fila, row))
+
+        # Consultas del lote: biciusuarios existentes y seriales ya registrados (3 en total)
+        nombres = self.users_repository.get_nombres_by_ids(
+            list({row['biciusuario_id'] for _, row in valid})
+        )
+        existing = {
+            'bicicleta': self.bicicletas_repository.get_existing_serials(
+                row['serial'] for _, row in valid if row['tipo'] == 'bicicleta'),
+            'registro': self.registros_repository.get_existing_serials(
+                row['serial'] for _, row in valid if row['tipo'] == 'registro'),
+        }
+
+        bicicletas, registros = [], []
+        accepted = {'bicicleta': set(), 'registro': set()}
+        for fila, row in valid:
+            tipo, serial = row['tipo'], row['serial']
+            user_id = row['biciusuario_id']
+            if user_id not in nombres:
+                errores.append({'fila': fila, 'serial': serial, 'error': 'Biciusuario no encontrado'})
+                continue
+            if serial in existing[tipo] or serial in seen[tipo] or serial in accepted[tipo]:
+                errores.append({'fila': fila, 'serial': serial, 'error': 'Serial duplicado'})
+                continue
+            accepted[tipo].add(serial)
+            if tipo == 'bicicleta':
+                bicicletas.append({
+                    'biciusuario_id': user_id,
+                    'serial': serial,
+                    'marca': row.get('marca'),
+                    'modelo': row.get('modelo'),
+                    'color': row.get('color')
+                })
+            else:
+                registros.append({
+                    'biciusuario_id': user_id,
+                    'serial': serial,
+                    'nombre_biciusuario': nombres[user_id]
+                })
+
+        try:
+            self.bicicletas_repository.bulk_insert(bicicletas)
+            self.registros_repository.bulk_insert(registros)
+            # Los perfiles que reciben bicicletas o registros nuevos cambian de versión
+            # y dejan de ser válidos en caché
+            changed_ids = {row['biciusuario_id'] for row in bicicletas + registros}
+            self.users_repository.bump_versions(list(changed_ids))
+            for user_id in changed_ids:
+                self.cache.invalidate_on_commit(self.db, user_id)
+            self.db.commit()
+        except IntegrityError as e:
+            # Otro proceso insertó alguno de estos seriales entre la validación y el INSERT
+            self.db.rollback()
+            logger.error("Conflicto de integridad al importar un lote: %s", e)
+            for fila, row in valid:
+                if row['serial'] in accepted[row['tipo']]:
+                    errores.append({'fila': fila, 'serial': row['serial'],
+                                    'error': 'Conflicto al insertar el lote; reintente la fila'})
+            return
+
+        seen['bicicleta'] |= accepted['bicicleta']
+        seen['registro'] |= accepted['registro']
+        summary['bicicletas_insertadas'] += len(bicicletas)
+        summary['registros_insertados'] += len(registros)
+
+    @staticmethod
+    def _validate(row: Optional[dict]) -> Optional[str]:
+        """
+        Retorna el mensaje de error de una fila mal formada, o None si es válida.
+        Los campos de texto deben ser cadenas dentro de la longitud de su columna y
+        'biciusuario_id' un entero (o su texto, en CSV); la fila queda con el ID ya convertido.
+        """
+        if not isinstance(row, dict):
+            return 'Fila mal formada'
+        tipo = row.get('tipo')
+        if tipo not in TIPOS_VALIDOS:
+            return "El campo 'tipo' debe ser 'bicicleta' o 'registro'"
+        if not row.get('serial'):
+            return "El campo 'serial' es obligatorio"
+        for campo, longitud in LONGITUDES[tipo].items():
+            valor = row.get(campo)
+            if valor is None:
+                continue
+            if not isinstance(valor, str):
+                return f"El campo '{campo}' debe ser texto"
+            if len(valor) > longitud:
+                return f"El campo '{campo}' admite como máximo {longitud} caracteres"
+
+        biciusuario_id = row.get('biciusuario_id')
+        if isinstance(biciusuario_id, str) and biciusuario_id.strip().isdigit():
+            biciusuario_id = int(biciusuario_id)
+        # bool es subclase de int: true no es el usuario 1
+        if not isinstance(biciusuario_id, int) or isinstance(biciusuario_id, bool):
+            return "El campo 'biciusuario_id' debe ser un entero"
+        row['biciusuario_id'] = biciusuario_id
+        return None
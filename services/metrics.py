@@ -0,0 +1,397 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config.metrics import (
+    HTTP_LATENCY_BUCKETS, BCRYPT_LATENCY_BUCKETS, METRICS_MULTIPROC_DIR, METRICS_FLUSH_INTERVAL
+)
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# --- Registro de Métricas (formato de texto de Prometheus) ---
+# Cada hilo escribe en su propio fragmento (threading.local), así registrar una observación
+# no toma ningún lock compartido. Solo el alta del fragmento de un hilo nuevo y la
+# recolección en GET /metrics recorren la lista de fragmentos bajo un lock.
+# Los fragmentos de hilos terminados (un hilo por petición en el servidor de desarrollo)
+# se acumulan en un fragmento base y se descartan: la lista no crece más que los hilos vivos.
+# Con varios workers (METRICS_MULTIPROC_DIR), cada proceso vuelca además sus totales en un
+# fichero propio y GET /metrics suma los de todos los procesos.
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Iterable[str], values: Iterable) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _ShardedMetric:
+    """Base de las métricas: un diccionario {etiquetas: valor} por hilo."""
+    type_name = ''
+    # Solo cuentan los procesos vivos (p. ej., peticiones en curso): al agregar entre workers
+    # se descarta el valor de los que ya terminaron
+    live_only = False
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._local = threading.local()
+        self._base: dict = {}
+        self._shards: List[Tuple[threading.Thread, dict]] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = {}
+            self._local.shard = shard
+            with self._shards_lock:
+                self._merge_dead_shards()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _merge_dead_shards(self):
+        # Llamar con _shards_lock tomado. Un hilo terminado ya no escribe en su fragmento
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._merge(self._base, shard)
+        self._shards = live
+
+    def _collect(self) -> dict:
+        """Suma del fragmento base y de los fragmentos de los hilos vivos."""
+        with self._shards_lock:
+            self._merge_dead_shards()
+            total = self._merge({}, self._base)
+            for _, shard in self._shards:
+                self._merge(total, dict(shard))
+        return total
+
+    def _merge(self, total: dict, shard: dict) -> dict:
+        raise NotImplementedError
+
+    def snapshot(self) -> dict:
+        """Totales del proceso {etiquetas: valor}, para volcarlos al fichero del worker."""
+        return self._collect()
+
+    def render(self, samples: Optional[dict] = None) -> List[str]:
+        """Texto de la métrica con los totales del proceso o, si se indican, con 'samples' (varios workers)."""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.type_name}']
+        lines.extend(self._render_samples(self._collect() if samples is None else samples))
+        return lines
+
+    def _render_samples(self, samples: dict) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_ShardedMetric):
+    """Contador monótono."""
+    type_name = 'counter'
+
+    def inc(self, *labels, amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def _merge(self, total, shard):
+        for labels, value in shard.items():
+            total[labels] = total.get(labels, 0) + value
+        return total
+
+    def _render_samples(self, samples):
+        return [f'{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}'
+                for labels, value in sorted(samples.items())]
+
+
+class Gauge(Counter):
+    """Valor que sube y baja (p. ej., peticiones en curso); se suma entre hilos y procesos vivos."""
+    type_name = 'gauge'
+    live_only = True
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_ShardedMetric):
+    """Histograma con buckets fijos; cada serie guarda [cuentas por bucket..., +Inf, suma]."""
+    type_name = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = HTTP_LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            series = shard[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def _merge(self, total, shard):
+        for labels, series in shard.items():
+            merged = total.setdefault(labels, [0] * (len(self.buckets) + 2))
+            for i, value in enumerate(series):
+                merged[i] += value
+        return total
+
+    def _render_samples(self, samples):
+        lines = []
+        bounds = self.buckets + (float('inf'),)
+        for labels, series in sorted(samples.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames + ('le',), labels + (_format_number(bound),))
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_number(float(series[-1]))}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+class CallbackGauge:
+    """
+    Gauge cuyo valor se calcula al recolectar (p. ej., estado del pool de conexiones).
+    Con varios workers se suma el último valor volcado por cada proceso vivo.
+    """
+    type_name = 'gauge'
+    live_only = True
+
+    def __init__(self, name: str, help_text: str, callback: Callable[[], float]):
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+
+    def snapshot(self) -> dict:
+        value = self.callback()
+        return {} if value is None else {(): value}
+
+    def _merge(self, total, shard):
+        for labels, value in shard.items():
+            total[labels] = total.get(labels, 0) + value
+        return total
+
+    def render(self, samples: Optional[dict] = None) -> List[str]:
+        value = (self.snapshot() if samples is None else samples).get(())
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.type_name}']
+        if value is not None:
+            lines.append(f'{self.name} {_format_number(value)}')
+        return lines
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _load_snapshot(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return {name: {tuple(labels): value for labels, value in samples} for name, samples in data.items()}
+
+def _dump_snapshot(path: str, data: Dict[str, dict]):
+    # Escritura atómica: quien lee ve el fichero anterior o el nuevo, nunca uno a medias
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({name: [[list(labels), value] for labels, value in samples.items()]
+                   for name, samples in data.items()}, f)
+    os.replace(tmp_path, path)
+
+
+class MetricsRegistry:
+    """
+    Conjunto de métricas del proceso y su exposición en formato de texto.
+    Con 'multiproc_dir', cada worker vuelca sus totales en '<pid>.json' (al leer /metrics y cada
+    'flush_interval' segundos) y render() suma los ficheros de todos los procesos. Los contadores
+    e histogramas de los workers que terminan se acumulan en 'archive.json'.
+    """
+    ARCHIVE_NAME = 'archive'
+
+    def __init__(self, multiproc_dir: str = '', flush_interval: float = METRICS_FLUSH_INTERVAL):
+        self._metrics = []
+        self.multiproc_dir = multiproc_dir
+        self.flush_interval = flush_interval
+        self._flusher_pid = None
+        self._closed = False
+        self._write_lock = threading.Lock()
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        # Sin directorio compartido, cada métrica se lee de la memoria del proceso
+        totals = {}
+        if self.multiproc_dir:
+            self.write_snapshot()
+            totals = self._read_snapshots()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render(totals.get(metric.name)))
+        return '\n'.join(lines) + '\n'
+
+    # --- Agregación entre workers ---
+
+    def _snapshot_path(self, name) -> str:
+        return os.path.join(self.multiproc_dir, f'{name}.json')
+
+    @contextmanager
+    def _directory_lock(self, mode):
+        # Las lecturas comparten el lock; archivar un worker terminado lo toma en exclusiva para
+        # que ninguna lectura vea sus valores dos veces (o ninguna) mientras pasan a archive.json
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.multiproc_dir, 'lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def write_snapshot(self):
+        """Vuelca los totales de este proceso en '<pid>.json'."""
+        if not self.multiproc_dir:
+            return
+        with self._write_lock:
+            if self._closed:
+                return
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+            _dump_snapshot(self._snapshot_path(os.getpid()),
+                           {metric.name: metric.snapshot() for metric in self._metrics})
+
+    def _read_snapshots(self) -> Dict[str, dict]:
+        totals = {metric.name: {} for metric in self._metrics}
+        metrics = {metric.name: metric for metric in self._metrics}
+        with self._directory_lock(fcntl.LOCK_SH if fcntl else None):
+            for filename in os.listdir(self.multiproc_dir):
+                stem, ext = os.path.splitext(filename)
+                if ext != '.json' or not (stem == self.ARCHIVE_NAME or stem.isdigit()):
+                    continue
+                live = stem != self.ARCHIVE_NAME and _pid_alive(int(stem))
+                for name, samples in (_load_snapshot(os.path.join(self.multiproc_dir, filename)) or {}).items():
+                    metric = metrics.get(name)
+                    if metric is None or (metric.live_only and not live):
+                        continue
+                    metric._merge(totals[name], samples)
+        return totals
+
+    def archive_snapshot(self, pid: int):
+        """
+        Pasa a 'archive.json' los contadores e histogramas del worker 'pid', ya terminado, y borra
+        su fichero: los totales no retroceden y el directorio no crece con cada reciclado.
+        """
+        if not self.multiproc_dir:
+            return
+        path = self._snapshot_path(pid)
+        with self._directory_lock(fcntl.LOCK_EX if fcntl else None):
+            data = _load_snapshot(path)
+            if data is None:
+                return
+            archive_path = self._snapshot_path(self.ARCHIVE_NAME)
+            archive = _load_snapshot(archive_path) or {}
+            for metric in self._metrics:
+                if not metric.live_only and metric.name in data:
+                    archive[metric.name] = metric._merge(archive.get(metric.name, {}), data[metric.name])
+            _dump_snapshot(archive_path, archive)
+            os.remove(path)
+
+    def clear_snapshots(self):
+        """Borra los ficheros de una ejecución anterior (al arrancar el maestro)."""
+        if not self.multiproc_dir or not os.path.isdir(self.multiproc_dir):
+            return
+        for filename in os.listdir(self.multiproc_dir):
+            if filename.endswith(('.json', '.tmp')):
+                os.remove(os.path.join(self.multiproc_dir, filename))
+
+    def start_flusher(self):
+        """
+        Arranca, una vez por proceso, el hilo que vuelca el fichero del worker cada 'flush_interval'
+        segundos. Se llama con la primera petición, ya en el worker (no en el maestro antes del fork).
+        """
+        pid = os.getpid()
+        if not self.multiproc_dir or self._flusher_pid == pid:
+            return
+        with self._write_lock:
+            if self._flusher_pid == pid:
+                return
+            self._flusher_pid = pid
+        threading.Thread(target=self._flush_loop, name='metrics-flusher', daemon=True).start()
+
+    def _flush_loop(self):
+        while not self._closed:
+            time.sleep(self.flush_interval)
+            self.write_snapshot()
+
+    def close(self):
+        """Último volcado del worker antes de salir; después ya no se escribe su fichero."""
+        self.write_snapshot()
+        with self._write_lock:
+            self._closed = True
+
+
+REGISTRY = MetricsRegistry(METRICS_MULTIPROC_DIR)
+
+# --- Métricas de la API ---
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'Latencia de las rutas HTTP por blueprint, ruta, método y estado.',
+    ('blueprint', 'route', 'method', 'status')
+))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    'http_requests_in_flight', 'Peticiones HTTP en curso por blueprint.', ('blueprint',)
+))
+BCRYPT_VERIFY_DURATION = REGISTRY.register(Histogram(
+    'bcrypt_verify_duration_seconds', 'Duración de la verificación de contraseñas en el login, por resultado.',
+    ('outcome',), buckets=BCRYPT_LATENCY_BUCKETS
+))
+LOGIN_ATTEMPTS = REGISTRY.register(Counter(
+    'auth_login_attempts_total',
+    'Intentos de login por resultado (success, bad_password, unknown_user, rejected).', ('outcome',)
+))
+
+
+def _pool_stat(method: str):
+    def read():
+        # No se crea el motor solo para medirlo: si aún no existe, no hay muestra
+        from config.database import peek_engine
+        engine = peek_engine()
+        pool = getattr(engine, 'pool', None)
+        stat = getattr(pool, method, None)
+        return stat() if stat is not None else None
+    return read
+
+REGISTRY.register(CallbackGauge(
+    'db_pool_checked_out_connections', 'Conexiones del pool prestadas en este momento.', _pool_stat('checkedout')
+))
+REGISTRY.register(CallbackGauge(
+    'db_pool_overflow_connections', 'Conexiones abiertas por encima de pool_size (negativo: huecos libres).',
+    _pool_stat('overflow')
+))
+REGISTRY.register(CallbackGauge(
+    'db_pool_size', 'Tamaño configurado del pool de conexiones.', _pool_stat('size')
+))
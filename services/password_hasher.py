@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from config.security import BCRYPT_POOL_SIZE, BCRYPT_QUEUE_MAX
+from models.users_model import hash_password, verify_password
+
+logger = logging.getLogger(__name__)
+
+
+class HashingQueueFull(Exception):
+    """Se lanza cuando el pool de bcrypt tiene su cola llena; el controlador responde 503."""
+
+
+class PasswordHasher:
+    """
+    Ejecuta bcrypt (hash y verificación) en un pool de hilos acotado, fuera del hilo de la petición.
+    Admite como máximo 'pool_size' operaciones en curso más 'max_queue' en espera;
+    cuando no queda hueco rechaza de inmediato en lugar de acumular peticiones.
+    """
+
+    def __init__(self, pool_size: int = BCRYPT_POOL_SIZE, max_queue: int = BCRYPT_QUEUE_MAX):
+        self.pool_size = pool_size
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(pool_size + max_queue)
+        self._lock = threading.Lock()
+        self._pending = 0     # operaciones admitidas (en curso + en cola)
+        self._active = 0      # operaciones ejecutándose en un hilo del pool
+        self._completed = 0
+        self._rejected = 0
+
+    def hash(self, password: str) -> str:
+        """Genera el hash bcrypt de la contraseña en el pool."""
+        return self._run(hash_password, password)
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        """Verifica la contraseña contra su hash en el pool."""
+        return self._run(verify_password, password, password_hash)
+
+    async def hash_async(self, password: str) -> str:
+        """Versión para el servidor ASGI: espera el hash sin bloquear el bucle de eventos."""
+        return await asyncio.wrap_future(self._submit(hash_password, password))
+
+    async def verify_async(self, password: str, password_hash: str) -> bool:
+        """Versión para el servidor ASGI: espera la verificación sin bloquear el bucle de eventos."""
+        return await asyncio.wrap_future(self._submit(verify_password, password, password_hash))
+
+    def _run(self, fn, *args):
+        return self._submit(fn, *args).result()
+
+    def _submit(self, fn, *args) -> Future:
+        """Admite la operación (o lanza HashingQueueFull) y la envía al pool."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            logger.warning("Pool de bcrypt saturado: operación rechazada")
+            raise HashingQueueFull("Demasiadas operaciones de contraseña en curso")
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self._executor.submit(self._tracked, fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+        self._slots.release()
+
+    def _tracked(self, fn, *args):
+        with self._lock:
+            self._active += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def stats(self) -> dict:
+        """Tamaño del pool y métricas de la cola."""
+        with self._lock:
+            return {
+                'pool_size': self.pool_size,
+                'max_queue': self.max_queue,
+                'active': self._active,
+                'queued': self._pending - self._active,
+                'completed': self._completed,
+                'rejected': self._rejected
+            }
+
+
+_password_hasher: Optional[PasswordHasher] = None
+_hasher_lock = threading.Lock()
+
+def get_password_hasher() -> PasswordHasher:
+    """Retorna el PasswordHasher compartido por el proceso (se crea en el primer uso)."""
+    global _password_hasher
+    if _password_hasher is None:
+        with _hasher_lock:
+            if _password_hasher is None:
+                _password_hasher = PasswordHasher()
+                logger.info("Pool de bcrypt creado: %s hilos, cola máxima %s", BCRYPT_POOL_SIZE, BCRYPT_QUEUE_MAX)
+    return _password_hasher
+
+def _reset_after_fork():
+    # Los hilos del pool no sobreviven al fork: el proceso hijo crea su propio pool
+    global _password_hasher, _hasher_lock
+    _password_hasher = None
+    _hasher_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def calibrate_bcrypt_rounds(target_ms: float, min_rounds: int = 10, max_rounds: int = 16) -> dict:
+    """
+    Mide en esta máquina el tiempo de verificación de bcrypt para cada coste y retorna
+    el mayor coste cuya verificación no supera 'target_ms' (nunca menor que 'min_rounds').
+    """
+    timings = {}
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        password_hash = hash_password('calibracion', rounds)
+        start = time.perf_counter()
+        verify_password('calibracion', password_hash)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        timings[rounds] = round(elapsed_ms, 1)
+        if elapsed_ms > target_ms:
+            break
+        chosen = rounds
+    return {'rounds': chosen, 'target_ms': target_ms, 'timings_ms': timings}
@@ -0,0 +1,281 @@
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config.json_encoding import decode_json, encode_json
+from config.cache import (
+    PROFILE_CACHE_BACKEND, PROFILE_CACHE_MAX_ENTRIES, PROFILE_CACHE_TTL, PROFILE_CACHE_PATH,
+    PROFILE_CACHE_EVICT_EVERY
+)
+
+logger = logging.getLogger(__name__)
+
+# --- Backends de Almacenamiento ---
+
+class CacheBackend(ABC):
+    """Interfaz de almacenamiento de la caché: cualquier backend implementa get/set/delete/clear."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[dict]:
+        """Valor vigente de 'key', o None si no está o caducó."""
+
+    @abstractmethod
+    def set(self, key: str, value: dict):
+        """Guarda 'value' en 'key' con la caducidad del backend."""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Elimina 'key' si existe."""
+
+    @abstractmethod
+    def clear(self):
+        """Elimina todas las entradas."""
+
+
+class NullCacheBackend(CacheBackend):
+    """Backend vacío para desactivar la caché sin cambiar el código de los servicios."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """LRU con caducidad (TTL) en memoria del proceso, segura entre hilos."""
+
+    def __init__(self, max_entries: int = PROFILE_CACHE_MAX_ENTRIES, ttl: float = PROFILE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Almacén local compartido entre procesos (sustituto de un Redis/Memcached en una sola máquina).
+    Todos los workers leen y escriben el mismo archivo SQLite, así una invalidación
+    hecha por un worker es visible para los demás.
+    Las lecturas no escriben (una escritura toma el bloqueo de todo el archivo y serializaría
+    a los workers): en lugar de LRU, al superar 'max_entries' se descartan las entradas que
+    caducan antes, es decir, las guardadas hace más tiempo. El desalojo se revisa cada
+    'evict_every' escrituras del proceso, no en cada una.
+    """
+
+    def __init__(self, path: str = PROFILE_CACHE_PATH, max_entries: int = PROFILE_CACHE_MAX_ENTRIES,
+                 ttl: float = PROFILE_CACHE_TTL, evict_every: int = PROFILE_CACHE_EVICT_EVERY):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evict_every = max(1, evict_every)
+        self._writes = itertools.count(1)
+        self._local = threading.local()
+        with self._connection() as conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(profile_cache)")}
+            if 'used_at' in columns:
+                # Esquema anterior (LRU con escritura en cada lectura): la caché se puede descartar
+                conn.execute("DROP TABLE profile_cache")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS profile_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_profile_cache_expires_at ON profile_cache (expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # Una conexión por hilo: sqlite3 no permite compartirlas entre hilos
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        # Solo lectura: las entradas caducadas se ignoran aquí y se borran al desalojar
+        row = self._connection().execute(
+            "SELECT value FROM profile_cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        return decode_json(row[0]) if row is not None else None
+
+    def set(self, key, value):
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO profile_cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, encode_json(value).decode('utf-8'), time.time() + self.ttl)
+        )
+        if next(self._writes) % self.evict_every == 0:
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Borra las entradas caducadas y, si aún sobran, las que caducan antes (índice por expires_at)."""
+        conn.execute("DELETE FROM profile_cache WHERE expires_at < ?", (time.time(),))
+        excess = conn.execute("SELECT COUNT(*) FROM profile_cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM profile_cache WHERE key IN ("
+                "SELECT key FROM profile_cache ORDER BY expires_at LIMIT ?)", (excess,)
+            )
+
+    def delete(self, key):
+        self._connection().execute("DELETE FROM profile_cache WHERE key = ?", (key,))
+
+    def clear(self):
+        self._connection().execute("DELETE FROM profile_cache")
+
+
+# --- Caché de Perfiles ---
+
+class ProfileCache:
+    """
+    Caché de perfiles serializados por ID de usuario. Cada entrada es
+    {'version': <users.version>, 'profile': <salida de BiciusuariosService._to_dict>}.
+    Las escrituras invalidan por ID y cuenta aciertos, fallos e invalidaciones.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"profile:{user_id}"
+
+    def get(self, user_id: int) -> Optional[dict]:
+        value = self.backend.get(self._key(user_id))
+        with self._lock:
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return value
+
+    def peek(self, user_id: int) -> Optional[dict]:
+        """Como get(), pero sin contar acierto/fallo (consultas auxiliares, p. ej. de versión)."""
+        return self.backend.get(self._key(user_id))
+
+    def set(self, user_id: int, profile: dict):
+        self.backend.set(self._key(user_id), profile)
+
+    def invalidate(self, user_id: int):
+        self.backend.delete(self._key(user_id))
+        with self._lock:
+            self._invalidations += 1
+
+    def invalidate_on_commit(self, session: Session, user_id: int):
+        """
+        Invalida ahora y de nuevo cuando la sesión confirme: así un lector concurrente
+        que haya vuelto a cachear el perfil antiguo antes del COMMIT no lo deja obsoleto.
+        """
+        self.invalidate(user_id)
+        self.defer_invalidation(session, user_id)
+
+    def defer_invalidation(self, session: Session, user_id: int):
+        """Registra el perfil para invalidarlo cuando la sesión confirme (ver invalidate_pending_profiles)."""
+        session.info.setdefault('profile_cache_pending', set()).add(user_id)
+        session.info['profile_cache'] = self
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'backend': type(self.backend).__name__,
+                'hits': self._hits,
+                'misses': self._misses,
+                'invalidations': self._invalidations,
+                'hit_ratio': round(self._hits / lookups, 4) if lookups else 0.0
+            }
+
+
+def invalidate_pending_profiles(session: Session):
+    """Invalida los perfiles registrados en la sesión con invalidate_on_commit / defer_invalidation."""
+    cache = session.info.pop('profile_cache', None)
+    pending = session.info.pop('profile_cache_pending', set())
+    if cache is not None:
+        for user_id in pending:
+            cache.invalidate(user_id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_pending_profiles(session):
+    # Las sesiones asíncronas las invalidan fuera del bucle de eventos (AsyncUnitOfWorkMiddleware)
+    if session.info.get('profile_cache_deferred'):
+        return
+    invalidate_pending_profiles(session)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_profiles(session):
+    session.info.pop('profile_cache', None)
+    session.info.pop('profile_cache_pending', None)
+
+
+_profile_cache: Optional[ProfileCache] = None
+_cache_lock = threading.Lock()
+
+def get_profile_cache() -> ProfileCache:
+    """Retorna la caché de perfiles del proceso, con el backend elegido en PROFILE_CACHE_BACKEND."""
+    global _profile_cache
+    if _profile_cache is None:
+        with _cache_lock:
+            if _profile_cache is None:
+                if PROFILE_CACHE_BACKEND == 'sqlite':
+                    backend = SQLiteCacheBackend()
+                elif PROFILE_CACHE_BACKEND == 'none':
+                    backend = NullCacheBackend()
+                else:
+                    backend = MemoryCacheBackend()
+                _profile_cache = ProfileCache(backend)
+                logger.info("Caché de perfiles inicializada con backend %s", type(backend).__name__)
+    return _profile_cache
+
+def _reset_after_fork():
+    # El proceso hijo no debe reutilizar las conexiones SQLite del padre ni su LRU en memoria
+    global _profile_cache, _cache_lock
+    _profile_cache = None
+    _cache_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,34 @@
+from typing import Optional
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from services.profile_cache import ProfileCache, get_profile_cache
+
+# --- Caché de Perfiles para el Servidor ASGI ---
+# El backend SQLite hace E/S de disco (y puede esperar el bloqueo del archivo hasta 5 s):
+# sus operaciones se ejecutan en el pool de hilos para no detener el bucle de eventos.
+
+class AsyncProfileCache:
+    """Fachada asíncrona de ProfileCache: mismas operaciones, ejecutadas con run_in_threadpool."""
+
+    def __init__(self, cache: ProfileCache | None = None):
+        self.cache = cache or get_profile_cache()
+
+    async def get(self, user_id: int) -> Optional[dict]:
+        return await run_in_threadpool(self.cache.get, user_id)
+
+    async def peek(self, user_id: int) -> Optional[dict]:
+        return await run_in_threadpool(self.cache.peek, user_id)
+
+    async def set(self, user_id: int, profile: dict):
+        await run_in_threadpool(self.cache.set, user_id, profile)
+
+    async def invalidate_on_commit(self, session: Session, user_id: int):
+        """
+        Invalida ahora y registra el perfil para después del COMMIT. La segunda invalidación
+        no la hace el evento after_commit (que corre en el bucle) sino AsyncUnitOfWorkMiddleware,
+        con invalidate_pending_profiles en el pool de hilos.
+        """
+        await run_in_threadpool(self.cache.invalidate, user_id)
+        session.info['profile_cache_deferred'] = True
+        self.cache.defer_invalidation(session, user_id)
@@ -0,0 +1,64 @@
+from typing import NamedTuple, Optional, Tuple
+
+# --- Proyección de Perfiles (?fields= y ?expand= en /biciusuarios) ---
+# 'fields' elige columnas escalares de users; 'expand' elige relaciones. La proyección decide
+# qué columnas y relaciones se cargan en SQL y qué claves salen en la respuesta.
+
+# Columnas escalares del perfil, en el orden en que se serializan ('id' siempre se incluye)
+PROFILE_FIELDS = ('id', 'username', 'nombre_biciusuario')
+
+# Relaciones expandibles, en el orden en que se serializan
+PROFILE_EXPANSIONS = ('bicicletas', 'registros')
+
+
+class Projection(NamedTuple):
+    """Columnas y relaciones de una representación de perfil (ambas en orden canónico)."""
+    fields: Tuple[str, ...] = PROFILE_FIELDS
+    expand: Tuple[str, ...] = PROFILE_EXPANSIONS
+
+    @property
+    def is_full(self) -> bool:
+        """Indica si es la representación completa (la única que se guarda en la caché de perfiles)."""
+        return self.fields == PROFILE_FIELDS and self.expand == PROFILE_EXPANSIONS
+
+    @property
+    def variant(self) -> str:
+        """Identificador estable de la representación para los ETags ('' para la completa)."""
+        if self.is_full:
+            return ''
+        return f"fields={','.join(self.fields)};expand={','.join(self.expand)}"
+
+    def project(self, profile: dict) -> dict:
+        """Recorta un perfil completo ya serializado (p. ej., desde la caché) a esta proyección."""
+        if self.is_full:
+            return profile
+        return {key: profile[key] for key in self.fields + self.expand}
+
+
+FULL_PROJECTION = Projection()
+
+
+def _parse_names(raw: str, allowed: Tuple[str, ...], param: str) -> Tuple[str, ...]:
+    """Lista separada por comas -> tupla en orden canónico; ValueError con los nombres desconocidos."""
+    names = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = sorted(names - set(allowed))
+    if unknown:
+        raise ValueError(f"Valores no válidos en '{param}': {', '.join(unknown)}. "
+                         f"Permitidos: {', '.join(allowed)}.")
+    return tuple(name for name in allowed if name in names)
+
+
+def parse_projection(fields: Optional[str] = None, expand: Optional[str] = None) -> Projection:
+    """
+    Construye la proyección a partir de los valores crudos de '?fields=' y '?expand='.
+    Sin ninguno de los dos se obtiene el perfil completo. Con 'fields', solo esas columnas
+    (más 'id') y ninguna relación salvo las de 'expand'; con solo 'expand', todas las columnas
+    y únicamente las relaciones indicadas. Lanza ValueError con un mensaje apto para el cliente.
+    """
+    if fields is None and expand is None:
+        return FULL_PROJECTION
+    selected = PROFILE_FIELDS
+    if fields is not None:
+        selected = ('id',) + tuple(f for f in _parse_names(fields, PROFILE_FIELDS, 'fields') if f != 'id')
+    expanded = _parse_names(expand, PROFILE_EXPANSIONS, 'expand') if expand is not None else ()
+    return Projection(selected, expanded)
@@ -0,0 +1,96 @@
+import logging
+import time
+from typing import Iterator, Optional
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Connection, Engine
+
+from models.users_model import User, Bicicleta, RegistroBiciusuario, hash_password
+from config.search import users_fts_suspended
+
+logger = logging.getLogger(__name__)
+
+# --- Datos Sintéticos para Pruebas de Carga ---
+# Los usuarios se insertan con INSERT de Core por lotes, sin pasar por User.__init__:
+# un único hash bcrypt se reutiliza para todas las filas. Los datos son deterministas,
+# derivados solo del ID, así que dos siembras de la misma base vacía producen las mismas filas.
+
+# Filas por sentencia INSERT (executemany)
+SEED_CHUNK_SIZE = 10000
+
+# Usuarios por transacción: pocas confirmaciones grandes en lugar de una por lote
+SEED_TRANSACTION_SIZE = 100000
+
+SEED_PASSWORD = 'biciusuario'
+
+MARCAS = ('Trek', 'Specialized', 'Giant', 'Scott', 'Cannondale', 'GW', 'Orbea', 'Merida')
+MODELOS = ('Urbana', 'Ruta', 'MTB', 'Gravel', 'Plegable', 'Eléctrica')
+COLORES = ('Rojo', 'Azul', 'Negro', 'Blanco', 'Verde', 'Gris', 'Amarillo')
+
+def seed_username(user_id: int) -> str:
+    return f'usuario{user_id}'
+
+def seed_nombre(user_id: int) -> str:
+    return f'Biciusuario {user_id}'
+
+def seed_bicicleta_serial(user_id: int, n: int = 0) -> str:
+    return f'BK{user_id}-{n}'
+
+def seed_registro_serial(user_id: int, n: int = 0) -> str:
+    return f'RG{user_id}-{n}'
+
+def _chunks(start: int, stop: int, size: int) -> Iterator[range]:
+    for first in range(start, stop, size):
+        yield range(first, min(first + size, stop))
+
+def _insert_chunk(conn: Connection, ids: range, password_hash: str, bicicletas: int, registros: int):
+    """Inserta los usuarios 'ids' con sus bicicletas y registros: una sentencia por tabla."""
+    conn.execute(insert(User.__table__), [
+        {'id': i, 'username': seed_username(i), 'password_hash': password_hash,
+         'nombre_biciusuario': seed_nombre(i), 'version': 1} for i in ids
+    ])
+    if bicicletas:
+        conn.execute(insert(Bicicleta.__table__), [
+            {'biciusuario_id': i, 'serial': seed_bicicleta_serial(i, n), 'marca': MARCAS[(i + n) % len(MARCAS)],
+             'modelo': MODELOS[(i + n) % len(MODELOS)], 'color': COLORES[(i + n) % len(COLORES)]}
+            for i in ids for n in range(bicicletas)
+        ])
+    if registros:
+        conn.execute(insert(RegistroBiciusuario.__table__), [
+            {'biciusuario_id': i, 'serial': seed_registro_serial(i, n), 'nombre_biciusuario': seed_nombre(i)}
+            for i in ids for n in range(registros)
+        ])
+
+def seed_synthetic_data(engine: Engine, users: int, bicicletas_por_usuario: int = 1,
+                        registros_por_usuario: int = 1, password: str = SEED_PASSWORD,
+                        rounds: Optional[int] = None, chunk_size: int = SEED_CHUNK_SIZE) -> dict:
+    """
+    Siembra 'users' usuarios sintéticos a continuación del mayor ID existente, cada uno con
+    sus bicicletas y registros. Todos comparten la contraseña 'password' (hasheada una sola vez
+    con 'rounds', o BCRYPT_ROUNDS). Retorna el rango de IDs creado, las filas y el tiempo empleado.
+    """
+    start = time.perf_counter()
+    password_hash = hash_password(password, rounds)
+
+    with engine.connect() as conn:
+        first_id = (conn.execute(select(func.max(User.id))).scalar() or 0) + 1
+    stop = first_id + users
+
+    # El índice de nombres (FTS5) se reconstruye una sola vez al final, no fila a fila
+    with users_fts_suspended(engine):
+        for transaction_ids in _chunks(first_id, stop, max(chunk_size, SEED_TRANSACTION_SIZE)):
+            with engine.begin() as conn:
+                for ids in _chunks(transaction_ids.start, transaction_ids.stop, chunk_size):
+                    _insert_chunk(conn, ids, password_hash, bicicletas_por_usuario, registros_por_usuario)
+            logger.info("Siembra: usuarios hasta el ID %s confirmados", transaction_ids.stop - 1)
+
+    elapsed = time.perf_counter() - start
+    logger.info("Siembra completada: %s usuarios en %.1f s", users, elapsed)
+    return {
+        'first_id': first_id,
+        'last_id': stop - 1,
+        'users': users,
+        'bicicletas': users * bicicletas_por_usuario,
+        'registros': users * registros_por_usuario,
+        'seconds': round(elapsed, 2),
+    }
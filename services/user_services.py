@@ -1,11 +1,16 @@
 import logging
+import time
 from sqlalchemy.orm import Session
 from repositories.users_repository import UsersRepository
-from models.users_model import User
-from typing import Optional
+from repositories.profiles_read_model import ProfilesReadModel
+from services.password_hasher import HashingQueueFull, get_password_hasher
+from services.profile_cache import get_profile_cache
+from models.users_model import User, needs_rehash
+from typing import Optional, List, Tuple
 from flask_jwt_extended import create_access_token
+from config.logging_config import SAMPLED
+from services.metrics import BCRYPT_VERIFY_DURATION, LOGIN_ATTEMPTS
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class UsersService:
@@ -17,34 +22,112 @@ class UsersService:
         """Inicializa el servicio con una sesión de base de datos e instancia el repositorio."""
         # Corregido: Usamos el nombre de clase correcto (UsersRepository)
         self.users_repository = UsersRepository(db_session) 
-        logger.info("Servicio de Usuarios (Seguridad) inicializado")
+        # Listado de solo lectura: SQL Core sin hidratar objetos User
+        self.read_model = ProfilesReadModel(db_session)
+        # bcrypt se ejecuta en el pool compartido, no en el hilo de la petición
+        self.password_hasher = get_password_hasher()
+        # Los cambios de usuario invalidan su perfil cacheado en BiciusuariosService
+        self.profile_cache = get_profile_cache()
+        logger.debug("Servicio de Usuarios (Seguridad) inicializado")
 
     def authenticate_user(self, username: str, password: str) -> Optional[User]:
         """
         Verifica las credenciales del usuario.
         Retorna el objeto User si las credenciales son válidas, None en caso contrario.
+        Lanza HashingQueueFull si el pool de bcrypt está saturado.
         """
         user = self.users_repository.get_user_by_username(username)
         
         # 1. Verifica si el usuario existe
         if user is None:
-            logger.warning(f"Intento de login fallido: Usuario '{username}' no encontrado.")
+            LOGIN_ATTEMPTS.inc('unknown_user')
+            logger.warning("Intento de login fallido: Usuario '%s' no encontrado.", username)
             return None
         
-        # 2. Verifica la contraseña hasheada
-        if user.check_password(password):
-            logger.info(f"Login exitoso para usuario: {username}")
+        # 2. Verifica la contraseña hasheada (métricas: duración, incluida la cola del pool, y resultado)
+        start = time.perf_counter()
+        try:
+            valid = self.password_hasher.verify(password, user.password_hash)
+        except HashingQueueFull:
+            LOGIN_ATTEMPTS.inc('rejected')
+            raise
+        outcome = 'success' if valid else 'bad_password'
+        BCRYPT_VERIFY_DURATION.observe(time.perf_counter() - start, outcome)
+        LOGIN_ATTEMPTS.inc(outcome)
+
+        if valid:
+            logger.info("Login exitoso para usuario: %s", username, extra=SAMPLED)
+            self._rehash_if_needed(user, password)
             return user
         else:
-            logger.warning(f"Intento de login fallido: Contraseña incorrecta para {username}.")
+            logger.warning("Intento de login fallido: Contraseña incorrecta para %s.", username)
             return None
 
+    def _rehash_if_needed(self, user: User, password: str):
+        """
+        Si el hash del usuario se generó con un coste distinto de BCRYPT_ROUNDS,
+        lo regenera con la contraseña recién verificada y lo persiste.
+        Es una mejora oportunista: si el pool está saturado se deja para el próximo login.
+        """
+        if not needs_rehash(user.password_hash):
+            return
+        try:
+            new_hash = self.password_hasher.hash(password)
+        except HashingQueueFull:
+            logger.info("Rehash pospuesto para %s: pool de bcrypt saturado.", user.username)
+            return
+        self.users_repository.update_password_hash(user, new_hash)
+        logger.info("Hash de contraseña regenerado con el coste configurado para: %s", user.username)
+
+    def get_user_by_id(self, user_id: int) -> Optional[User]:
+        """Recupera un usuario por su ID."""
+        return self.users_repository.get_user_by_id(user_id)
+
+    def get_users_page(self, limit: int, after: Optional[int] = None) -> Tuple[List[dict], Optional[int]]:
+        """
+        Recupera una página de usuarios (paginación por cursor sobre User.id) con sus datos públicos
+        (id, username, nombre_biciusuario), leída con el modelo de lectura.
+        """
+        return self.read_model.get_profiles_page(limit, after, relations=())
+
+    def get_users_page_versions(self, limit: int, after: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Pares (id, version) de la página pedida, para calcular su ETag antes de serializarla."""
+        return self.users_repository.get_page_versions(limit, after)
+
     def create_user(self, username: str, password: str, nombre_biciusuario: str) -> User:
         """Crea un nuevo usuario, hasheando la contraseña antes de guardarlo."""
-        # El modelo User se encarga de hashear la contraseña en su __init__
-        new_user = User(username=username, password=password, nombre_biciusuario=nombre_biciusuario)
+        # El hash se calcula en el pool de bcrypt y se entrega ya hecho al modelo
+        password_hash = self.password_hasher.hash(password)
+        new_user = User(username=username, password_hash=password_hash, nombre_biciusuario=nombre_biciusuario)
         
         return self.users_repository.add(new_user)
+
+    def update_user(self, user_id: int, username: Optional[str] = None, password: Optional[str] = None,
+                    nombre_biciusuario: Optional[str] = None) -> Optional[User]:
+        """
+        Actualiza username, contraseña y/o nombre de un usuario.
+        La contraseña nueva, si se envía, se hashea en el pool de bcrypt.
+        """
+        data = {}
+        if username:
+            data['username'] = username
+        if nombre_biciusuario:
+            data['nombre_biciusuario'] = nombre_biciusuario
+        if password:
+            data['password_hash'] = self.password_hasher.hash(password)
+        user = self.users_repository.update_user_scalars(user_id, data)
+        if user is not None:
+            self.users_repository.bump_version(user_id)
+            self.profile_cache.invalidate_on_commit(self.users_repository.db, user_id)
+        return user
+
+    def delete_user(self, user_id: int) -> bool:
+        """Elimina un usuario (y, en cascada, sus bicicletas y registros)."""
+        deleted_user = self.users_repository.delete_user(user_id)
+        if deleted_user is None:
+            return False
+        self.profile_cache.invalidate_on_commit(self.users_repository.db, user_id)
+        return True
         
     def generate_access_token(self, user: User) -> str:
         """Genera un token de acceso JWT para un usuario."""
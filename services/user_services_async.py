@@ -0,0 +1,93 @@
+import logging
+import time
+from typing import Optional, List, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.users_model import User, needs_rehash
+from repositories.users_repository_async import AsyncUsersRepository
+from repositories.profiles_read_model_async import AsyncProfilesReadModel
+from services.password_hasher import HashingQueueFull, get_password_hasher
+from services.profile_cache_async import AsyncProfileCache
+from services.metrics import BCRYPT_VERIFY_DURATION, LOGIN_ATTEMPTS
+
+logger = logging.getLogger(__name__)
+
+class AsyncUsersService:
+    """
+    Versión asíncrona de UsersService para el servidor ASGI.
+    bcrypt se ejecuta en el pool compartido (PasswordHasher) y se espera con 'await',
+    así el bucle de eventos sigue atendiendo otras peticiones mientras tanto.
+    """
+    def __init__(self, db_session: AsyncSession):
+        self.users_repository = AsyncUsersRepository(db_session)
+        self.read_model = AsyncProfilesReadModel(db_session)
+        self.password_hasher = get_password_hasher()
+        self.profile_cache = AsyncProfileCache()
+
+    async def authenticate_user(self, username: str, password: str) -> Optional[User]:
+        """Retorna el User si las credenciales son válidas; None en caso contrario."""
+        user = await self.users_repository.get_user_by_username(username)
+        if user is None:
+            LOGIN_ATTEMPTS.inc('unknown_user')
+            logger.warning("Intento de login fallido: Usuario '%s' no encontrado.", username)
+            return None
+        start = time.perf_counter()
+        try:
+            valid = await self.password_hasher.verify_async(password, user.password_hash)
+        except HashingQueueFull:
+            LOGIN_ATTEMPTS.inc('rejected')
+            raise
+        outcome = 'success' if valid else 'bad_password'
+        BCRYPT_VERIFY_DURATION.observe(time.perf_counter() - start, outcome)
+        LOGIN_ATTEMPTS.inc(outcome)
+        if not valid:
+            logger.warning("Intento de login fallido: Contraseña incorrecta para %s.", username)
+            return None
+        if needs_rehash(user.password_hash):
+            try:
+                new_hash = await self.password_hasher.hash_async(password)
+                await self.users_repository.update_password_hash(user, new_hash)
+            except HashingQueueFull:
+                logger.info("Rehash pospuesto para %s: pool de bcrypt saturado.", username)
+        return user
+
+    async def create_user(self, username: str, password: str, nombre_biciusuario: str) -> User:
+        """Crea un nuevo usuario con la contraseña hasheada en el pool de bcrypt."""
+        password_hash = await self.password_hasher.hash_async(password)
+        new_user = User(username=username, password_hash=password_hash, nombre_biciusuario=nombre_biciusuario)
+        return await self.users_repository.add(new_user)
+
+    async def get_user_by_id(self, user_id: int) -> Optional[User]:
+        """Recupera un usuario por su ID."""
+        return await self.users_repository.get_user_by_id(user_id)
+
+    async def get_users_page(self, limit: int, after: Optional[int] = None) -> Tuple[List[dict], Optional[int]]:
+        """Página de usuarios con sus datos públicos (ver UsersService.get_users_page)."""
+        return await self.read_model.get_profiles_page(limit, after, relations=())
+
+    async def get_users_page_versions(self, limit: int, after: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Pares (id, version) de la página pedida, para calcular su ETag."""
+        return await self.users_repository.get_page_versions(limit, after)
+
+    async def update_user(self, user_id: int, username: Optional[str] = None, password: Optional[str] = None,
+                          nombre_biciusuario: Optional[str] = None) -> Optional[User]:
+        """Actualiza username, contraseña y/o nombre; incrementa la versión e invalida el perfil."""
+        data = {}
+        if username:
+            data['username'] = username
+        if nombre_biciusuario:
+            data['nombre_biciusuario'] = nombre_biciusuario
+        if password:
+            data['password_hash'] = await self.password_hasher.hash_async(password)
+        user = await self.users_repository.update_user_scalars(user_id, data)
+        if user is not None:
+            await self.users_repository.bump_version(user_id)
+            await self.profile_cache.invalidate_on_commit(self.users_repository.db.sync_session, user_id)
+        return user
+
+    async def delete_user(self, user_id: int) -> bool:
+        """Elimina un usuario (y, en cascada, sus bicicletas y registros)."""
+        deleted_user = await self.users_repository.delete_user(user_id)
+        if deleted_user is None:
+            return False
+        await self.profile_cache.invalidate_on_commit(self.users_repository.db.sync_session, user_id)
+        return True
@@ -19,9 +19,15 @@ from config.jwt import JWT_SECRET_KEY, JWT_TOKEN_LOCATION, JWT_ACCESS_TOKEN_EXPI
 # 3. Importación de Controladores (Blueprints)
 from controllers.biciusuario_bd import biciusuario_bp 
 from controllers.users_controllers import users_bp 
+from controllers.metrics import metrics_bp, init_request_metrics
+from config.metrics import METRICS_ENABLED
+from config.sql_profiler import init_sql_profiler
+from config.compression import init_compression
+from commands.cli import register_commands
+from config.logging_config import configure_logging, start_log_listener
+from config.json_encoding import configure_json
 # La importación de config.database la haremos en create_app para evitar problemas de dependencia circular.
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # --- Funciones de Configuración ---
@@ -52,13 +58,23 @@ def register_jwt_error_handlers(app):
 def create_app():
     """Crea y configura la instancia de la aplicación Flask."""
     
-    # Importamos la configuración de la base de datos aquí para evitar problemas de orden
-    from config.database import SessionLocal, engine
+    # Importamos la configuración de la base de datos aquí para evitar problemas de orden.
+    # El motor no se crea aquí: se crea (y se registra su perfil) en la primera consulta.
+    from config.database import init_db_session
+    # 0. Logging centralizado, antes de cualquier registro. El hilo que escribe la cola
+    # arranca con la primera petición, ya dentro del worker (no en el maestro de gunicorn)
+    configure_logging()
     app = Flask(__name__)
+    app.before_request(start_log_listener)
+    # Codificación JSON de las respuestas: orjson si está instalado, si no la biblioteca estándar
+    configure_json(app)
     
     # Configuramos la DB_URI si fuera necesario, usando el env
     # Nota: Asumo que config/database.py ya usa os.getenv("SQLALCHEMY_DATABASE_URI")
     
+    # 1. Unidad de trabajo: una sesión por petición, confirmada y cerrada al final
+    init_db_session(app)
+
     # 2. Configuración de JWT
     configure_jwt(app)
     
@@ -69,7 +85,21 @@ def create_app():
     # 4. Registro de Manejadores de Errores JWT
     register_jwt_error_handlers(app)
 
-    # 5. Ruta de Bienvenida/Estado
+    # 5. Comandos de administración (flask --app src.app <comando>)
+    register_commands(app)
+
+    # 6. Métricas: latencia y peticiones en curso por ruta, expuestas en GET /metrics
+    if METRICS_ENABLED:
+        init_request_metrics(app)
+        app.register_blueprint(metrics_bp)
+
+    # 7. Perfilador de SQL por petición (opcional, SQL_PROFILER=true)
+    init_sql_profiler(app)
+
+    # 8. Compresión gzip/deflate de las respuestas según Accept-Encoding
+    init_compression(app)
+
+    # 9. Ruta de Bienvenida/Estado
     @app.route('/')
     def index():
         return jsonify({
@@ -83,18 +113,17 @@ def create_app():
 
     return app
 
-# --- Ejecución y Creación de Tablas ---
-
-# 1. Crear las tablas de la base de datos si no existen
-# Importamos la función de creación aquí para asegurar que el .env esté cargado
-from config.database import create_tables
-create_tables()
+# --- Ejecución ---
 
-# 2. Crear la aplicación
+# Crear la aplicación. Importar este módulo no toca la base de datos: el esquema se crea
+# con 'flask --app src.app init-db' y el motor se abre con la primera petición.
 app = create_app()
 
 if __name__ == '__main__':
-    logger.info("Iniciando servidor Flask...")
-    # Puedes cambiar el host o puerto si es necesario
-    # NOTA: En un entorno real, usaríamos FLASK_DEBUG=os.getenv("FLASK_DEBUG")
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # El servidor de desarrollo prepara el esquema por comodidad
+    from config.database import create_tables
+    create_tables()
+    # Servidor de desarrollo (un proceso). En producción: gunicorn -c gunicorn.conf.py src.app:app
+    logger.info("Iniciando servidor Flask de desarrollo...")
+    debug = os.getenv("FLASK_DEBUG", "1").lower() in ('1', 'true', 'yes')
+    app.run(debug=debug, host='0.0.0.0', port=5000)
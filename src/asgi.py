@@ -0,0 +1,111 @@
+import logging
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+
+# CRÍTICO: Cargar .env al inicio (igual que src/app.py)
+load_dotenv()
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.routing import Mount, Route
+
+from config.database_async import init_async_engine, dispose_async_engine
+from config.logging_config import configure_logging, start_log_listener
+from config.compression import COMPRESSION_ENABLED, COMPRESSION_LEVEL, COMPRESSION_MIN_SIZE
+from controllers.asgi_controllers import auth_routes, biciusuarios_routes
+from controllers.asgi_responses import JSONResponse
+from services.profile_cache import invalidate_pending_profiles
+
+logger = logging.getLogger(__name__)
+
+# --- Servidor ASGI (opcional) ---
+# Misma API que src/app.py, servida con un bucle de eventos: mientras una petición espera
+# a la base de datos o a bcrypt, el worker atiende otras. Se ejecuta con:
+#   uvicorn src.asgi:app --host 0.0.0.0 --port 8000
+# Dependencias adicionales en requirements-async.txt.
+
+class AsyncUnitOfWorkMiddleware:
+    """
+    Equivalente ASGI de init_db_session: la sesión asíncrona de la petición se confirma
+    antes de enviar la respuesta si el estado es < 400, se revierte en otro caso
+    (o si la vista lanza una excepción) y siempre se cierra al terminar.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault('state', {})
+
+        async def send_after_commit(message):
+            if message['type'] == 'http.response.start':
+                session = state.get('db_session')
+                if session is not None:
+                    if message['status'] < 400:
+                        await session.commit()
+                        # Invalidación de perfiles posterior al COMMIT, fuera del bucle de eventos
+                        await run_in_threadpool(invalidate_pending_profiles, session.sync_session)
+                    else:
+                        await session.rollback()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_after_commit)
+        except Exception:
+            session = state.get('db_session')
+            if session is not None:
+                await session.rollback()
+            raise
+        finally:
+            session = state.pop('db_session', None)
+            if session is not None:
+                await session.close()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # El arranque del servidor ocurre en el worker: aquí empieza el hilo del logging
+    start_log_listener()
+    engine = await init_async_engine()
+    logger.info("Motor asíncrono listo: %s", engine.url.render_as_string(hide_password=True))
+    yield
+    await dispose_async_engine()
+
+
+async def index(request):
+    return JSONResponse({
+        'message': 'API de Biciusuarios activa',
+        'endpoints': {
+            'login': '/auth/login',
+            'register': '/auth/register',
+            'profiles': '/biciusuarios'
+        }
+    })
+
+
+def create_asgi_app() -> Starlette:
+    """Crea la aplicación ASGI con las mismas rutas que create_app() (src/app.py)."""
+    configure_logging()
+    middleware = [Middleware(AsyncUnitOfWorkMiddleware)]
+    if COMPRESSION_ENABLED:
+        # Mismo umbral y nivel que init_compression en Flask (Starlette solo ofrece gzip)
+        middleware.insert(0, Middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE,
+                                        compresslevel=COMPRESSION_LEVEL))
+    app = Starlette(
+        routes=[
+            Route('/', index, methods=['GET']),
+            Mount('/auth', routes=auth_routes),
+            Mount('/biciusuarios', routes=biciusuarios_routes),
+        ],
+        middleware=middleware,
+        lifespan=lifespan,
+    )
+    return app
+
+app = create_asgi_app()
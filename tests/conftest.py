@@ -0,0 +1,51 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# La configuración se lee al importar los módulos: el entorno de pruebas se fija antes
+_WORKDIR = tempfile.mkdtemp(prefix='biciusuarios_tests_')
+os.environ.update({
+    'SQLITE_URI': f"sqlite:///{os.path.join(_WORKDIR, 'tests.db')}",
+    'MYSQL_URI': '',
+    'APP_ENV': 'production',
+    'BCRYPT_ROUNDS': '4',
+    'PROFILE_CACHE_BACKEND': 'none',
+    'LOG_LEVEL': 'WARNING',
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.database import create_tables, get_engine  # noqa: E402
+from models.users_model import Base  # noqa: E402
+from services.seed_services import SEED_PASSWORD, seed_synthetic_data, seed_username  # noqa: E402
+from src.app import create_app  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    """Aplicación Flask sobre una base SQLite vacía (se recrea en cada prueba)."""
+    engine = get_engine()
+    Base.metadata.drop_all(engine)
+    create_tables()
+    return create_app()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def seed_users():
+    """Siembra 'n' usuarios (usuario1..usuarioN) con una bicicleta y un registro cada uno."""
+    def _seed(n: int):
+        seed_synthetic_data(get_engine(), n, rounds=4)
+    return _seed
+
+@pytest.fixture
+def auth_headers(client):
+    """Cabecera Authorization con un token del usuario sembrado 'user_id'."""
+    def _headers(user_id: int = 1) -> dict:
+        response = client.post('/auth/login', json={'username': seed_username(user_id), 'password': SEED_PASSWORD})
+        assert response.status_code == 200, response.get_json()
+        return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    return _headers
@@ -0,0 +1,67 @@
+import gzip
+
+import msgpack
+import pytest
+
+import config.compression
+import services.profile_cache
+from controllers.etags import parse_if_match_version, profile_etag
+from services.profile_cache import MemoryCacheBackend, ProfileCache
+
+
+def test_if_match_uses_strong_comparison():
+    """If-Match acepta el ETag fuerte (también el de una proyección o codificación) y nunca uno débil."""
+    assert parse_if_match_version(f'"{profile_etag(7, 3)}"', 7) == (True, 3)
+    assert parse_if_match_version(f'"{profile_etag(7, 3, "fields=username")}"', 7) == (True, 3)
+    assert parse_if_match_version(f'"{profile_etag(7, 3)}-msgpack-gzip"', 7) == (True, 3)
+    assert parse_if_match_version(f'W/"{profile_etag(7, 3)}"', 7) == (True, -1)
+    assert parse_if_match_version('*', 7) == (False, None)
+
+
+@pytest.mark.parametrize('headers, suffix', [
+    ({'Accept-Encoding': 'gzip'}, '-gzip'),
+    ({'Accept': 'application/msgpack'}, '-msgpack'),
+])
+def test_encoded_etag_round_trips(client, seed_users, auth_headers, monkeypatch, headers, suffix):
+    """El ETag de una respuesta comprimida o MessagePack vale para If-None-Match y para If-Match."""
+    monkeypatch.setattr(config.compression, 'COMPRESSION_MIN_SIZE', 0)
+    seed_users(1)
+    auth = auth_headers()
+    response = client.get('/biciusuarios/1', headers={**auth, **headers})
+    assert response.status_code == 200
+    etag, weak = response.get_etag()
+    assert not weak and etag.endswith(suffix)
+    body = gzip.decompress(response.data) if suffix == '-gzip' else response.data
+    if suffix == '-msgpack':
+        assert msgpack.unpackb(body)['id'] == 1
+
+    cached = client.get('/biciusuarios/1', headers={**auth, **headers, 'If-None-Match': f'"{etag}"'})
+    assert cached.status_code == 304
+    assert cached.get_etag() == (etag, False)
+
+    updated = client.put('/biciusuarios/1', json={'nombre_biciusuario': 'Nuevo'},
+                         headers={**auth, 'If-Match': f'"{etag}"'})
+    assert updated.status_code == 200
+
+
+def test_put_etag_uses_committed_version(client, seed_users, auth_headers, monkeypatch):
+    """El ETag del PUT es el de la versión escrita aunque otro lector vuelva a cachear la anterior."""
+    cache = ProfileCache(MemoryCacheBackend())
+    monkeypatch.setattr(services.profile_cache, '_profile_cache', cache)
+    seed_users(1)
+    auth = auth_headers()
+    etag, _ = client.get('/biciusuarios/1', headers=auth).get_etag()
+    stale = cache.peek(1)
+
+    def invalidate_and_recache(session, user_id):
+        # Un lector concurrente cachea el perfil antiguo entre la invalidación y el COMMIT
+        cache.invalidate(user_id)
+        cache.set(user_id, stale)
+        cache.defer_invalidation(session, user_id)
+    monkeypatch.setattr(cache, 'invalidate_on_commit', invalidate_and_recache)
+
+    updated = client.put('/biciusuarios/1', json={'nombre_biciusuario': 'Nuevo'},
+                         headers={**auth, 'If-Match': f'"{etag}"'})
+    assert updated.status_code == 200
+    assert updated.get_etag()[0] != etag
+    assert updated.get_etag() == client.get('/biciusuarios/1', headers=auth).get_etag()
@@ -0,0 +1,55 @@
+import json
+
+
+def test_csv_import_reports_non_utf8_rows(client, seed_users, auth_headers):
+    """Una fila que no es UTF-8 se informa como fila mal formada; el resto se importa."""
+    seed_users(1)
+    body = (b'tipo,biciusuario_id,serial,marca,modelo,color\n'
+            b'bicicleta,1,SER-UTF8-1,Trek,FX,rojo\n'
+            b'bicicleta,1,SER-UTF8-2,Caf\xe9,FX,azul\n'
+            b'registro,1,SER-UTF8-1\n')
+    response = client.post('/biciusuarios/import', data=body, content_type='text/csv',
+                           headers=auth_headers())
+    assert response.status_code == 200, response.get_json()
+    summary = response.get_json()
+    assert summary['bicicletas_insertadas'] == 1
+    assert summary['registros_insertados'] == 1
+    assert [error['fila'] for error in summary['errores']] == [2]
+
+
+def _import_ndjson(client, headers, rows):
+    body = '\n'.join(json.dumps(row) for row in rows).encode('utf-8')
+    response = client.post('/biciusuarios/import', data=body, content_type='application/x-ndjson', headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_import_only_into_own_profile(client, seed_users, auth_headers):
+    """Las filas de otro biciusuario_id se rechazan; las del propio perfil se importan."""
+    seed_users(2)
+    summary = _import_ndjson(client, auth_headers(1), [
+        {'tipo': 'bicicleta', 'biciusuario_id': 2, 'serial': 'AJENA-1'},
+        {'tipo': 'bicicleta', 'biciusuario_id': 1, 'serial': 'PROPIA-1'},
+    ])
+    assert summary['bicicletas_insertadas'] == 1
+    assert summary['errores'] == [{'fila': 1, 'serial': 'AJENA-1',
+                                   'error': 'No tienes permiso para importar en este perfil'}]
+
+
+def test_import_rejects_wrong_types_and_lengths(client, seed_users, auth_headers):
+    """Tipos y longitudes inválidos se reportan por fila, sin 500 ni valores convertidos."""
+    seed_users(1)
+    summary = _import_ndjson(client, auth_headers(1), [
+        {'tipo': 'bicicleta', 'biciusuario_id': 1, 'serial': 'TIPO-1', 'marca': {'a': 1}},
+        {'tipo': 'bicicleta', 'biciusuario_id': 1, 'serial': ['a']},
+        {'tipo': 'registro', 'biciusuario_id': True, 'serial': 'BOOL-1'},
+        {'tipo': 'registro', 'biciusuario_id': 1, 'serial': 'S' * 51},
+        {'tipo': 'registro', 'biciusuario_id': '1', 'serial': 'VALIDO-1'},
+    ])
+    assert summary['registros_insertados'] == 1
+    assert [(error['fila'], error['error']) for error in summary['errores']] == [
+        (1, "El campo 'marca' debe ser texto"),
+        (2, "El campo 'serial' debe ser texto"),
+        (3, "El campo 'biciusuario_id' debe ser un entero"),
+        (4, "El campo 'serial' admite como máximo 50 caracteres"),
+    ]
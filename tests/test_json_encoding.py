@@ -0,0 +1,13 @@
+import json
+
+
+def test_listing_and_detail_share_key_order(client, seed_users, auth_headers):
+    """La página ya codificada por el servicio ordena las claves igual que jsonify."""
+    seed_users(1)
+    auth = auth_headers()
+    page = client.get('/biciusuarios/?limit=1', headers=auth)
+    detail = client.get('/biciusuarios/1', headers=auth)
+    listed = json.loads(page.data)['items'][0]
+    assert list(listed) == list(json.loads(detail.data))
+    assert list(listed) == sorted(listed)
+    assert list(listed['bicicletas'][0]) == sorted(listed['bicicletas'][0])
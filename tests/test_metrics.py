@@ -0,0 +1,62 @@
+import os
+import threading
+
+from controllers import metrics as metrics_controller
+from services.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+def _run_in_threads(target, count: int):
+    for _ in range(count):
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+
+
+def test_dead_thread_shards_are_merged():
+    """Un hilo por observación no deja un fragmento por hilo: se suman en el fragmento base."""
+    counter = Counter('test_total', 'prueba', ('outcome',))
+    histogram = Histogram('test_seconds', 'prueba', buckets=(0.1, 1.0))
+    def observe():
+        counter.inc('ok')
+        histogram.observe(0.5)
+    _run_in_threads(observe, 50)
+    counter.inc('ok')
+
+    assert len(counter._shards) <= 2
+    assert 'test_total{outcome="ok"} 51' in counter.render()
+    assert 'test_seconds_count 50' in histogram.render()
+    assert len(histogram._shards) == 0
+
+
+def test_metrics_route_requires_token(client, monkeypatch):
+    """Sin METRICS_TOKEN la ruta no existe; con él, exige el token en Authorization."""
+    assert client.get('/metrics').status_code == 404
+    monkeypatch.setattr(metrics_controller, 'METRICS_TOKEN', 'secreto')
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer otro'}).status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer secreto'})
+    assert response.status_code == 200
+    assert b'http_request_duration_seconds_bucket' in response.data
+
+
+def test_multiprocess_snapshots_are_merged(tmp_path):
+    """Con un directorio compartido se suman los workers; de los terminados solo quedan contadores."""
+    registry = MetricsRegistry(str(tmp_path))
+    counter = registry.register(Counter('test_total', 'prueba'))
+    in_flight = registry.register(Gauge('test_in_flight', 'prueba'))
+    counter.inc()
+    in_flight.inc()
+    # La instantánea pasa a ser la de otro worker vivo (el proceso padre)
+    registry.write_snapshot()
+    os.replace(tmp_path / f'{os.getpid()}.json', tmp_path / f'{os.getppid()}.json')
+    counter.inc()
+
+    text = registry.render()
+    assert 'test_total 3' in text
+    assert 'test_in_flight 2' in text
+
+    registry.archive_snapshot(os.getppid())
+    assert not (tmp_path / f'{os.getppid()}.json').exists()
+    text = registry.render()
+    assert 'test_total 3' in text
+    assert 'test_in_flight 1' in text
@@ -0,0 +1,29 @@
+from services.seed_services import seed_username
+
+
+def test_update_other_user_is_forbidden(client, seed_users, auth_headers):
+    """PUT /auth/users/<id> solo se permite sobre el propio usuario."""
+    seed_users(2)
+    response = client.put('/auth/users/2', json={'nombre_biciusuario': 'otro'}, headers=auth_headers(1))
+    assert response.status_code == 403
+    response = client.put('/auth/users/1', json={'nombre_biciusuario': 'propio'}, headers=auth_headers(1))
+    assert response.status_code == 200
+    assert response.get_json()['nombre_biciusuario'] == 'propio'
+
+def test_delete_other_user_is_forbidden(client, seed_users, auth_headers):
+    """DELETE /auth/users/<id> solo se permite sobre el propio usuario."""
+    seed_users(2)
+    assert client.delete('/auth/users/2', headers=auth_headers(1)).status_code == 403
+    assert client.get('/auth/users/2', headers=auth_headers(1)).status_code == 200
+    assert client.delete('/auth/users/1', headers=auth_headers(1)).status_code == 200
+
+def test_duplicate_username_on_update_is_a_conflict(client, seed_users, auth_headers):
+    """Un username repetido en PUT /auth/users/<id> responde 409 y no descarta nada más."""
+    seed_users(2)
+    headers = auth_headers(1)
+    response = client.put('/auth/users/1', json={'username': seed_username(2), 'nombre_biciusuario': 'Otro'},
+                          headers=headers)
+    assert response.status_code == 409
+    user = client.get('/auth/users/1', headers=headers).get_json()
+    assert user['username'] == seed_username(1)
+    assert user['nombre_biciusuario'] != 'Otro'
@@ -0,0 +1,29 @@
+import os
+import sqlite3
+
+import pytest
+
+from services.profile_cache import CacheBackend, SQLiteCacheBackend
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+def test_sqlite_backend_reads_without_writing(tmp_path):
+    """Un acierto no modifica el archivo y el desalojo deja como mucho 'max_entries' entradas."""
+    path = os.path.join(tmp_path, 'cache.db')
+    backend = SQLiteCacheBackend(path, max_entries=5, ttl=60, evict_every=1)
+    for i in range(8):
+        backend.set(f'k{i}', {'i': i})
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM profile_cache").fetchone()[0] == 5
+    # data_version cambia cuando otra conexión confirma una escritura en el archivo
+    version = conn.execute("PRAGMA data_version").fetchone()[0]
+    assert backend.get('k7') == {'i': 7}
+    assert backend.get('k0') is None
+    assert conn.execute("PRAGMA data_version").fetchone()[0] == version
+    backend.delete('k7')
+    assert conn.execute("PRAGMA data_version").fetchone()[0] != version
@@ -0,0 +1,29 @@
+import pytest
+from sqlalchemy import event
+
+from config.database import get_engine
+
+
+def _count_queries(client, path: str, headers: dict) -> int:
+    """Sentencias SQL ejecutadas por una petición (eventos before_cursor_execute del motor)."""
+    statements = []
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    engine = get_engine()
+    event.listen(engine, 'before_cursor_execute', _record)
+    try:
+        response = client.get(path, headers=headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', _record)
+    assert response.status_code == 200, response.get_json()
+    return len(statements)
+
+
+@pytest.mark.parametrize('path', ['/biciusuarios/', '/auth/users'])
+def test_list_query_count_does_not_depend_on_page_size(client, seed_users, auth_headers, path):
+    """Las páginas de 5 y de 50 usuarios cuestan el mismo número de consultas (sin N+1)."""
+    seed_users(60)
+    headers = auth_headers()
+    small = _count_queries(client, f'{path}?limit=5', headers)
+    large = _count_queries(client, f'{path}?limit=50', headers)
+    assert small == large
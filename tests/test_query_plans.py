@@ -0,0 +1,9 @@
+from commands.query_plans import check_query_plans
+
+
+def test_no_query_scans_a_large_table():
+    """Ninguna consulta de repositorios y servicios recorre entera users, bicicletas ni registro_biciusuarios."""
+    results = check_query_plans()
+    assert results
+    violations = [(result.scenario, result.statement, result.violations) for result in results if result.violations]
+    assert violations == []
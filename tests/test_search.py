@@ -0,0 +1,23 @@
+from config.database import create_tables, get_engine
+from models.users_model import Base
+
+
+def test_name_search_survives_recreating_users(client):
+    """Tras borrar y recrear las tablas, los usuarios nuevos siguen entrando en el índice FTS5."""
+    create_tables()
+    Base.metadata.drop_all(get_engine())
+    create_tables()
+
+    response = client.post('/auth/register', json={'username': 'zoraida', 'password': 'clave',
+                                                   'nombre_biciusuario': 'Zoraida Quintero'})
+    assert response.status_code == 201
+    user_id = response.get_json()['id']
+    token = client.post('/auth/login', json={'username': 'zoraida', 'password': 'clave'}).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    response = client.put(f'/biciusuarios/{user_id}', json={'bicicletas': [{'serial': 'FTS-1', 'marca': 'Trek'}]},
+                          headers=headers)
+    assert response.status_code == 200
+
+    response = client.get('/biciusuarios/bicicletas/search?nombre=zora', headers=headers)
+    assert response.status_code == 200
+    assert [item['serial'] for item in response.get_json()['items']] == ['FTS-1']
@@ -0,0 +1,24 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from config.sql_profiler import RequestProfile, _current_profile, install_sql_listeners
+
+
+def test_failed_statement_leaves_no_state_on_connection():
+    """Una sentencia que falla no deja su inicio en la conexión ni se cuenta en la petición."""
+    install_sql_listeners()
+    engine = create_engine('sqlite://')
+    token = _current_profile.set(RequestProfile('GET /prueba'))
+    try:
+        with engine.connect() as conn:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    conn.execute(text('SELECT * FROM tabla_inexistente'))
+            conn.execute(text('SELECT 1'))
+            assert not any(key.startswith('sql_profiler') for key in conn.info)
+        profile = _current_profile.get()
+        assert profile.count == 1
+    finally:
+        _current_profile.reset(token)
+        engine.dispose()